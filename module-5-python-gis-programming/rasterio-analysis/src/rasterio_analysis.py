@@ -95,6 +95,9 @@ def calculate_topographic_metrics(dem_path: str, output_dir: Optional[str] = Non
     #
     # STEP 7: Optionally save outputs as GeoTIFF files
     # HINT: Use rasterio.open() in write mode with proper profile
+    # HINT: For outputs that others will read by window, use tiled=True,
+    #       blockxsize=512, blockysize=512, compress='deflate' and predictor=3
+    #       (float data) - or rasterio.shutil.copy(path, cog_path, driver='COG')
 
     pass  # Replace with your implementation
 
@@ -157,6 +160,9 @@ def analyze_vegetation_indices(multispectral_path: str, red_band: int = 3,
     #
     # STEP 4: Classify vegetation based on NDVI thresholds
     # HINT: Create classification arrays using np.digitize() or conditions
+    # HINT: np.digitize(ndvi, [0, 0.2, 0.4, 0.6, 0.8]) gives class 0-5 in one pass
+    #       (NaN lands in the last class, so set those pixels to -1 afterwards)
+    # HINT: np.bincount(classes[valid], minlength=6) counts all six classes at once
     #
     # STEP 5: Create land cover masks
     # HINT: Water: NDVI < 0, Vegetation: NDVI > 0.2, etc.
@@ -229,18 +235,37 @@ def sample_raster_at_locations(raster_path: str, locations: List[Tuple[float, fl
     #
     # STEP 3: Convert geographic coordinates to pixel indices
     # HINT: Use rasterio transform methods (~transform * coords)
+    # HINT: Keep the coordinates in numpy arrays (xs, ys) rather than a list
+    #       of tuples - and for millions of points, work through them in
+    #       chunks of e.g. 100,000 so memory stays the same size
     #
     # STEP 4: For each location, extract values based on sampling method
     # HINT: Point sampling: use array indexing with interpolation
     # HINT: Buffer sampling: define circular buffer and extract all pixels
+    # HINT: For many points, group them by raster block (row // block_height,
+    #       col // block_width) and read each block once instead of one
+    #       window per point. Sorting the blocks along a Hilbert or Morton
+    #       (Z-order) curve keeps neighbouring blocks together; use
+    #       np.argsort() to sort and put the values back in the original order
     #
     # STEP 5: Handle different interpolation methods
     # HINT: 'nearest': simple array indexing
     # HINT: 'bilinear': weighted average of 4 nearest pixels
     # HINT: 'cubic': more complex interpolation algorithm
+    # HINT: Work on all points at once instead of looping: with fractional
+    #       positions r, c (pixel centres at .5), r0 = np.floor(r - 0.5) gives
+    #       the top-left neighbour, and data[r0[:, None] + [0, 1], ...] gathers
+    #       every point's 2x2 (or 4x4) neighbourhood in one indexing step
+    # HINT: np.clip() the neighbour indices at the edges, and leave nodata
+    #       neighbours out by setting their weights to 0 and rescaling
     #
     # STEP 6: Calculate buffer statistics if buffer_radius > 0
     # HINT: Use np.mean, np.std, np.min, np.max on pixels within buffer
+    # HINT: For many points or big radii, build summed-area tables first:
+    #       S = np.cumsum(np.cumsum(values, axis=0), axis=1) (and the same for
+    #       values**2 and a valid-pixel count). The sum of any rectangle is then
+    #       S[r1, c1] - S[r0, c1] - S[r1, c0] + S[r0, c0], whatever its size,
+    #       and std = sqrt(sum_sq / n - mean**2)
     #
     # STEP 7: Compile results with comprehensive metadata
     # HINT: Track successful/failed samples, CRS info, etc.
@@ -297,21 +322,38 @@ def process_cloud_optimized_geotiff(cog_url: str, bounds: Optional[Tuple[float,
     #
     # STEP 1: Open COG and analyze structure
     # HINT: Use rasterio.open() with GDAL options for COG info
+    # HINT: Every rasterio.open(url) downloads the header again. If you run the
+    #       same cell often, rasterio.open(url, opener=...) accepts a Python
+    #       object that serves byte ranges - one that keeps them on disk means
+    #       the second run needs no downloads at all
     # HINT: Check for tiling, overviews, compression using dataset properties
     #
     # STEP 2: Determine optimal reading strategy
     # HINT: If bounds specified, calculate window for reading
     # HINT: If target_resolution specified, select appropriate overview level
     # HINT: Use dataset.overviews() to get available levels
+    # HINT: Overview factor f has a pixel size of about f * dataset.res; pick the
+    #       coarsest level that is not coarser than target_resolution and open it
+    #       with rasterio.open(url, overview_level=level)
     #
     # STEP 3: Perform efficient windowed reading
     # HINT: Use rasterio.windows.from_bounds() for spatial window
     # HINT: Read data using dataset.read(window=window)
+    # HINT: Over a slow connection the waiting per tile adds up. The byte range
+    #       of each tile is in the header: src.get_tag_item('BLOCK_OFFSET_0_0',
+    #       'TIFF', bidx=1) and 'BLOCK_SIZE_0_0' - tiles can be downloaded at
+    #       the same time with concurrent.futures.ThreadPoolExecutor
     # HINT: Track bytes read using dataset properties or file size info
+    # HINT: Time each part (open, read, resample, write) with time.perf_counter();
+    #       bytes_read is about window pixels x bands x np.dtype(src.dtypes[0]).itemsize
+    #       before compression, and processing_efficiency can compare it with
+    #       the bytes of a full-resolution read of the whole file
     #
     # STEP 4: Handle resampling if needed
     # HINT: Use rasterio.warp.reproject() for resolution changes
     # HINT: Calculate new dimensions based on target resolution
+    # HINT: dataset.read(window=window, out_shape=(bands, rows, cols)) resamples
+    #       while reading, without reading the full resolution first
     #
     # STEP 5: Analyze processing efficiency
     # HINT: Compare bytes read vs. full file size
@@ -324,6 +366,9 @@ def process_cloud_optimized_geotiff(cog_url: str, bounds: Optional[Tuple[float,
     #
     # STEP 7: Save results if output path provided
     # HINT: Create new COG with proper tiling and compression
+    # HINT: Write the windows one by one to a tiled GeoTIFF, then convert it with
+    #       rasterio.shutil.copy(tmp_path, output_path, driver='COG',
+    #       compress='DEFLATE', predictor='YES', overview_resampling='AVERAGE')
 
     pass  # Replace with your implementation
 
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Buffered Point Statistics
+
+Compares cutting out every circular buffer and calling np.mean() / np.std()
+(naive_buffer_stats below) with the running-sum tables of buffer_stats.py,
+for several buffer radii. The naive time grows with the square of the
+radius; the square-buffer time of buffer_stats() does not grow at all.
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_buffer_stats.py --size 4096 --points 50000
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.buffer_stats import buffer_kernel, buffer_stats
+
+
+def naive_buffer_stats(raster_path: str, xs: np.ndarray, ys: np.ndarray, radius: float):
+    """Cut out each circular buffer with a mask and summarize its pixels."""
+    with rasterio.open(raster_path) as src:
+        data = src.read(1)
+        rows, cols = rasterio.transform.rowcol(src.transform, xs, ys)
+        nodata = src.nodata
+    offsets, half_widths = buffer_kernel(radius, 1.0, 1.0)
+    k = int(offsets.max())
+    dy, dx = np.mgrid[-k:k + 1, -k:k + 1]
+    mask = np.abs(dx) <= half_widths[dy + k]
+
+    means, stds = np.full(len(xs), np.nan), np.full(len(xs), np.nan)
+    for i, (row, col) in enumerate(zip(rows, cols, strict=True)):
+        top, left = row - k, col - k
+        window = data[max(top, 0):row + k + 1, max(left, 0):col + k + 1]
+        window_mask = mask[max(-top, 0):max(-top, 0) + window.shape[0],
+                           max(-left, 0):max(-left, 0) + window.shape[1]]
+        values = window[window_mask & (window != nodata)].astype(np.float64)
+        if values.size:
+            means[i], stds[i] = np.mean(values), np.std(values)
+    return means, stds
+
+
+def create_benchmark_raster(path: str, size: int):
+    """Write a size x size DEM with 1 map unit pixels."""
+    rng = np.random.default_rng(0)
+    transform = rasterio.transform.from_bounds(0, 0, size, size, size, size)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=1, dtype='float32',
+        crs='EPSG:32612', transform=transform, nodata=-9999, tiled=True,
+        blockxsize=256, blockysize=256
+    ) as dst:
+        for _, window in dst.block_windows(1):
+            block = 1500 + rng.normal(0, 40, size=(window.height, window.width))
+            dst.write(block.astype(np.float32), 1, window=window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=4096, help="raster width and height in pixels")
+    parser.add_argument("--points", type=int, default=50000, help="number of points")
+    parser.add_argument("--radii", type=float, nargs="+", default=[2, 8, 32, 64],
+                        help="buffer radii in pixels")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    xs = rng.uniform(0, args.size, args.points)
+    ys = rng.uniform(0, args.size, args.points)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "buffer_benchmark.tif")
+        print(f"Creating {args.size} x {args.size} DEM...")
+        create_benchmark_raster(path, args.size)
+
+        print(f"\n{args.points:,} points")
+        print(f"{'radius':>8}{'pixels':>10}{'naive s':>10}{'circle s':>10}{'square s':>10}{'speedup':>10}")
+        for radius in args.radii:
+            start = time.perf_counter()
+            naive_mean, _ = naive_buffer_stats(path, xs, ys, radius)
+            naive_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            circle = buffer_stats(path, xs, ys, radius, shape='circle')
+            circle_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            buffer_stats(path, xs, ys, radius, shape='square')
+            square_seconds = time.perf_counter() - start
+
+            np.testing.assert_allclose(circle['mean'], naive_mean, rtol=1e-6)
+            print(f"{radius:>8g}{circle['info']['kernel_pixels']:>10,}{naive_seconds:>10.2f}"
+                  f"{circle_seconds:>10.2f}{square_seconds:>10.2f}{naive_seconds / circle_seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Concurrent COG Tile Fetching
+
+Serves a tiled, compressed GeoTIFF from a local web server that waits a
+fixed time before answering every request (like a far-away cloud bucket),
+then reads the same windows with:
+- plain rasterio: rasterio.open(url) and src.read(window=...), where GDAL
+  fetches the tiles itself
+- read_cog_window() from cog_reader.py, which looks up the tile byte
+  ranges in the IFD and downloads them all at the same time first
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_cog_fetch.py --latency 0.05 --window 2048
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.cog_reader import read_cog_window
+
+
+class SlowRangeHandler(BaseHTTPRequestHandler):
+    """Serve one file with HTTP range support, after an artificial delay."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, send_body: bool):
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.request_count += 1
+        body = self.server.body
+        first, last, status = 0, len(body) - 1, 200
+        if self.headers.get('Range'):
+            first, last = (int(value) if value else None
+                           for value in self.headers['Range'].split('=')[1].split('-'))
+            last = len(body) - 1 if last is None else min(last, len(body) - 1)
+            status = 206
+        self.send_response(status)
+        self.send_header('ETag', '"benchmark"')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(last - first + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {first}-{last}/{len(body)}')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body[first:last + 1])
+
+    def do_GET(self):
+        self._reply(True)
+
+    def do_HEAD(self):
+        self._reply(False)
+
+    def log_message(self, *args):
+        pass
+
+
+def create_benchmark_cog(path: str, size: int):
+    """Write a size x size DEFLATE-compressed float32 DEM with 512 x 512 tiles."""
+    rng = np.random.default_rng(0)
+    transform = rasterio.transform.from_origin(400000, 3700000, 30, 30)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=1, dtype='float32',
+        crs='EPSG:32612', transform=transform, tiled=True, blockxsize=512, blockysize=512,
+        compress='deflate', predictor=3
+    ) as dst:
+        for _, window in dst.block_windows(1):
+            rows, cols = np.mgrid[0:window.height, 0:window.width]
+            block = 1500 + 0.1 * (rows + window.row_off) + rng.normal(0, 2, size=rows.shape)
+            dst.write(block.astype(np.float32), 1, window=window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=8192, help="raster width and height in pixels")
+    parser.add_argument("--window", type=int, default=2048, help="window width and height in pixels")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds of delay per request")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests for read_cog_window")
+    parser.add_argument("--repeats", type=int, default=3, help="windows read by each method")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "benchmark_cog.tif")
+        print(f"Creating {args.size} x {args.size} tiled COG...")
+        create_benchmark_cog(path, args.size)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), SlowRangeHandler)
+        with open(path, 'rb') as f:
+            server.body = f.read()
+        server.latency, server.request_count, server.lock = args.latency, 0, threading.Lock()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/benchmark_cog.tif"
+
+        rng = np.random.default_rng(1)
+        offsets = rng.integers(0, args.size - args.window, size=(args.repeats, 2))
+        print(f"\n{args.window} x {args.window} window, {args.latency * 1000:.0f} ms per request, "
+              f"{len(server.body) / 1e6:.1f} MB file")
+        print(f"{'method':<28}{'seconds':>10}{'requests':>10}")
+
+        results = {}
+        for method in ('plain rasterio', f'read_cog_window ({args.workers})'):
+            seconds, requests = 0.0, 0
+            for repeat, (row, col) in enumerate(offsets):
+                window = Window(int(col), int(row), args.window, args.window)
+                # A new query string stops GDAL from reusing its own cache between runs
+                url = f"{base_url}?run={method[:5]}{repeat}"
+                before = server.request_count
+                start = time.perf_counter()
+                if method == 'plain rasterio':
+                    with rasterio.Env(GDAL_DISABLE_READDIR_ON_OPEN='EMPTY_DIR'), rasterio.open(url) as src:
+                        data = src.read(1, window=window)
+                else:
+                    data = read_cog_window(url, window=window, max_workers=args.workers)[0][0]
+                seconds += time.perf_counter() - start
+                requests += server.request_count - before
+                results.setdefault(repeat, []).append(data)
+            print(f"{method:<28}{seconds / args.repeats:>10.2f}{requests / args.repeats:>10.1f}")
+
+        for plain, concurrent in results.values():
+            np.testing.assert_array_equal(plain, concurrent)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Windowed Reads from Stripped GeoTIFFs vs COGs
+
+Writes the same smooth float32 DEM twice:
+- as a plain LZW GeoTIFF in strips, the way rasterio.open(path, 'w',
+  compress='lzw') writes it
+- as a Cloud-Optimized GeoTIFF with write_cog() from cog_writer.py
+  (512 x 512 tiles, DEFLATE with the floating-point predictor, overviews),
+  fed one strip of rows at a time
+
+and then times random windowed reads and a zoomed-out (1/16 size) read
+from both files.
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_cog_writer.py --size 8192 --window 512
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.cog_writer import write_cog
+
+
+def dem_strips(size: int, rows_per_strip: int = 256):
+    """Yield (window, array) strips of a smooth synthetic DEM."""
+    rng = np.random.default_rng(0)
+    cols = np.arange(size)
+    for row in range(0, size, rows_per_strip):
+        height = min(rows_per_strip, size - row)
+        rows = np.arange(row, row + height)[:, None]
+        block = 1500 + 200 * np.sin(rows / 700) * np.cos(cols / 900) + rng.normal(0, 0.5, (height, size))
+        yield Window(0, row, size, height), block.astype(np.float32)
+
+
+def time_reads(path: str, windows, out_size: int) -> tuple:
+    """Seconds for the windowed reads, and for one read of the whole raster at out_size."""
+    with rasterio.open(path) as src:
+        start = time.perf_counter()
+        for window in windows:
+            src.read(1, window=window)
+        window_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        src.read(1, out_shape=(out_size, out_size))
+        overview_seconds = time.perf_counter() - start
+    return window_seconds, overview_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=8192, help="raster width and height in pixels")
+    parser.add_argument("--window", type=int, default=512, help="window width and height in pixels")
+    parser.add_argument("--reads", type=int, default=50, help="random windows to read")
+    args = parser.parse_args()
+
+    profile = {
+        'driver': 'GTiff', 'width': args.size, 'height': args.size, 'count': 1, 'dtype': 'float32',
+        'crs': 'EPSG:32612', 'transform': rasterio.transform.from_origin(400000, 3700000, 30, 30),
+        'nodata': -9999.0
+    }
+    rng = np.random.default_rng(1)
+    offsets = rng.integers(0, args.size - args.window, size=(args.reads, 2))
+    windows = [Window(int(col), int(row), args.window, args.window) for row, col in offsets]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        strip_path = os.path.join(temp_dir, "strips.tif")
+        cog_path = os.path.join(temp_dir, "cog.tif")
+
+        print(f"Writing {args.size} x {args.size} DEM in both layouts...")
+        start = time.perf_counter()
+        with rasterio.open(strip_path, 'w', compress='lzw', **profile) as dst:
+            for window, block in dem_strips(args.size):
+                dst.write(block, 1, window=window)
+        strip_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = write_cog(cog_path, dem_strips(args.size), profile)
+        cog_write = time.perf_counter() - start
+        assert summary['is_cog'], summary['validation']['errors']
+
+        print(f"\n{args.reads} random {args.window} x {args.window} windows, "
+              f"plus one read at {args.size // 16} x {args.size // 16}")
+        print(f"{'layout':<16}{'MB':>8}{'write s':>10}{'windows s':>12}{'zoomed-out s':>15}")
+        for name, path, write_seconds in (('LZW strips', strip_path, strip_write),
+                                          ('COG', cog_path, cog_write)):
+            window_seconds, overview_seconds = time_reads(path, windows, args.size // 16)
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{name:<16}{size_mb:>8.1f}{write_seconds:>10.2f}{window_seconds:>12.3f}{overview_seconds:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
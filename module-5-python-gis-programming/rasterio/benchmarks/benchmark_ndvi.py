@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NDVI Memory and Speed
+
+Compares the original whole-array calculate_ndvi() (reproduced below as
+legacy_calculate_ndvi) with the current block-by-block version that writes
+straight into one preallocated float32 array. Each version runs in its own
+Python process so that its peak memory (peak RSS) can be measured fairly.
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_ndvi.py --size 10000
+
+A 10,000 x 10,000 scene needs about 3 GB of RAM for the legacy version.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.band_math import calculate_ndvi
+
+
+def legacy_calculate_ndvi(raster_path: str, red_band: int = 1, nir_band: int = 2):
+    """The original calculate_ndvi(): whole bands, boolean masks and fancy indexing."""
+    with rasterio.open(raster_path) as src:
+        red_data = src.read(red_band).astype(np.float32)
+        nir_data = src.read(nir_band).astype(np.float32)
+
+        nodata_value = src.nodata
+        if nodata_value is not None:
+            red_valid = red_data != nodata_value
+            nir_valid = nir_data != nodata_value
+            valid_mask = red_valid & nir_valid
+        else:
+            valid_mask = np.ones_like(red_data, dtype=bool)
+
+        ndvi = np.full_like(red_data, np.nan, dtype=np.float32)
+        nir_plus_red = nir_data + red_data
+        nir_minus_red = nir_data - red_data
+        calculation_mask = valid_mask & (nir_plus_red != 0)
+        ndvi[calculation_mask] = nir_minus_red[calculation_mask] / nir_plus_red[calculation_mask]
+
+        valid_ndvi = ndvi[~np.isnan(ndvi)]
+        return {
+            'ndvi_array': ndvi,
+            'min_ndvi': float(np.min(valid_ndvi)),
+            'max_ndvi': float(np.max(valid_ndvi)),
+            'mean_ndvi': float(np.mean(valid_ndvi)),
+            'vegetation_pixels': int(np.sum(valid_ndvi > 0.2)),
+            'total_pixels': int(np.sum(valid_mask)),
+            'nodata_pixels': int(np.sum(~valid_mask))
+        }
+
+
+def create_benchmark_raster(path: str, size: int):
+    """Write a size x size, 2-band (red, NIR) tiled raster with a little nodata."""
+    rng = np.random.default_rng(0)
+    transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, size, size)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=2, dtype='uint16',
+        crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+        blockxsize=512, blockysize=512
+    ) as dst:
+        for _, window in dst.block_windows(1):
+            shape = (2, window.height, window.width)
+            dst.write(rng.integers(0, 10000, size=shape, dtype=np.uint16), window=window)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (Linux reports KB, macOS bytes)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_one(method: str, path: str):
+    """Run one NDVI version in this process and print its timing as JSON."""
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    if method == 'legacy':
+        result = legacy_calculate_ndvi(path, 1, 2)
+    else:
+        result = calculate_ndvi(path, red_band=1, nir_band=2)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'seconds': elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'baseline_rss_mb': baseline_mb,
+        'mean_ndvi': result['mean_ndvi'],
+        'total_pixels': result['total_pixels']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=10000, help="raster width and height in pixels")
+    parser.add_argument("--run", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "ndvi_benchmark.tif")
+        print(f"Creating {args.size} x {args.size} red/NIR raster...")
+        create_benchmark_raster(path, args.size)
+
+        results = {}
+        for method in ('legacy', 'current'):
+            output = subprocess.run([sys.executable, __file__, "--run", method, path],
+                                    check=True, capture_output=True, text=True).stdout
+            results[method] = json.loads(output.strip().splitlines()[-1])
+
+    legacy, current = results['legacy'], results['current']
+    assert legacy['total_pixels'] == current['total_pixels']
+    assert abs(legacy['mean_ndvi'] - current['mean_ndvi']) < 1e-4
+
+    ndvi_mb = args.size * args.size * 4 / (1024 * 1024)
+    print(f"\nNDVI output array alone: {ndvi_mb:.0f} MB")
+    print(f"{'version':<10}{'seconds':>10}{'peak RSS MB':>14}{'above start MB':>16}")
+    for method in ('legacy', 'current'):
+        r = results[method]
+        print(f"{method:<10}{r['seconds']:>10.2f}{r['peak_rss_mb']:>14.0f}"
+              f"{r['peak_rss_mb'] - r['baseline_rss_mb']:>16.0f}")
+    print(f"\nspeedup: {legacy['seconds'] / current['seconds']:.2f}x, "
+          f"peak memory: {current['peak_rss_mb'] / legacy['peak_rss_mb']:.2f}x of legacy")
+
+
+if __name__ == "__main__":
+    main()
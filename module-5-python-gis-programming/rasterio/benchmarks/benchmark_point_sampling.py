@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Point Sampling Throughput
+
+Compares the original point-by-point sampler (rowcol() and a 1 x 1
+src.read() for every point, reproduced below as legacy_sample) with the
+block-grouped sampler in point_sampling.py. The legacy version is only run
+on a small subset of the points, because it makes one GDAL call per point.
+
+It then samples the same points with each block order (row-major, the
+default, then Morton and Hilbert) through a small block cache, and
+reports the cache hit rate and the bytes read for each.
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_point_sampling.py --size 8192 --points 2000000
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+from rasterio.transform import rowcol
+from rasterio.windows import Window
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.point_sampling import sample_raster_points
+
+
+def legacy_sample(raster_path: str, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """The original sampler: one rowcol() and one 1 x 1 read per point."""
+    values = np.full(len(xs), np.nan)
+    with rasterio.open(raster_path) as src:
+        for i, (x, y) in enumerate(zip(xs, ys, strict=True)):
+            row, col = rowcol(src.transform, x, y)
+            if 0 <= row < src.height and 0 <= col < src.width:
+                value = src.read(1, window=Window(col, row, 1, 1))[0, 0]
+                if value != src.nodata:
+                    values[i] = value
+    return values
+
+
+def create_benchmark_raster(path: str, size: int):
+    """Write a size x size, single-band, tiled and compressed elevation raster."""
+    rng = np.random.default_rng(0)
+    transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, size, size)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=1, dtype='int16',
+        crs='EPSG:4326', transform=transform, nodata=-9999, tiled=True,
+        blockxsize=256, blockysize=256, compress='deflate'
+    ) as dst:
+        for _, window in dst.block_windows(1):
+            dst.write(rng.integers(0, 3000, size=(window.height, window.width), dtype=np.int16),
+                      1, window=window)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=8192, help="raster width and height in pixels")
+    parser.add_argument("--points", type=int, default=2_000_000, help="number of points to sample")
+    parser.add_argument("--legacy-points", type=int, default=5_000,
+                        help="number of points for the slow point-by-point version")
+    parser.add_argument("--cache-blocks", type=int, default=16,
+                        help="block cache size for the ordering comparison")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    xs = rng.uniform(-112.5, -111.5, args.points)
+    ys = rng.uniform(33.0, 34.0, args.points)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "points_benchmark.tif")
+        print(f"Creating {args.size} x {args.size} raster...")
+        create_benchmark_raster(path, args.size)
+
+        legacy_count = min(args.legacy_points, args.points)
+        start = time.perf_counter()
+        legacy_values = legacy_sample(path, xs[:legacy_count], ys[:legacy_count])
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        values, info = sample_raster_points(path, xs, ys)
+        current_seconds = time.perf_counter() - start
+
+        orderings = {}
+        for order in ('row', 'morton', 'hilbert'):
+            start = time.perf_counter()
+            ordered_values, ordered_info = sample_raster_points(path, xs, ys, order=order,
+                                                                cache_blocks=args.cache_blocks)
+            ordered_info['seconds'] = time.perf_counter() - start
+            np.testing.assert_array_equal(ordered_values, values)
+            orderings[order] = ordered_info
+
+    np.testing.assert_array_equal(values[:legacy_count, 0], legacy_values)
+
+    legacy_rate = legacy_count / legacy_seconds
+    current_rate = args.points / current_seconds
+    print(f"\n{'version':<10}{'points':>12}{'seconds':>10}{'points/s':>14}{'reads':>10}")
+    print(f"{'legacy':<10}{legacy_count:>12,}{legacy_seconds:>10.2f}{legacy_rate:>14,.0f}{legacy_count:>10,}")
+    print(f"{'current':<10}{args.points:>12,}{current_seconds:>10.2f}{current_rate:>14,.0f}"
+          f"{info['blocks_read']:>10,}")
+    print(f"\nthroughput: {current_rate / legacy_rate:.0f}x")
+
+    print(f"\nBlock order with a {args.cache_blocks}-block cache:")
+    print(f"{'order':<10}{'seconds':>10}{'blocks read':>14}{'cache hits':>14}{'hit rate':>10}{'MB read':>10}")
+    for name, r in orderings.items():
+        print(f"{name:<10}{r['seconds']:>10.2f}{r['blocks_read']:>14,}{r['cache_hits']:>14,}"
+              f"{r['cache_hit_rate']:>10.1%}{r['bytes_read'] / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
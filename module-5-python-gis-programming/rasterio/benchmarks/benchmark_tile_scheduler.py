@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Parallel Tile Statistics
+
+Compares single-threaded streaming statistics (block_stats.py) with the
+thread-pool tile scheduler (tile_scheduler.py) on a DEFLATE-compressed,
+tiled raster. Decompression dominates the run time, and GDAL releases the
+GIL while decompressing, so the speedup should grow with the number of
+CPU cores.
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_tile_scheduler.py --size 8192 --workers 1 2 4 8 16
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import rasterio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.block_stats import stream_band_stats
+from src.rasterio_analysis.tile_scheduler import parallel_band_stats, parallel_ndvi
+
+
+def create_benchmark_raster(path: str, size: int, compress: str):
+    """Write a size x size, 4-band, tiled and compressed raster."""
+    rng = np.random.default_rng(0)
+    transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, size, size)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=4, dtype='uint16',
+        crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+        blockxsize=256, blockysize=256, compress=compress
+    ) as dst:
+        for _, window in dst.block_windows(1):
+            shape = (4, window.height, window.width)
+            dst.write(rng.integers(1, 10000, size=shape, dtype=np.uint16), window=window)
+
+
+def best_time(function, repeats: int) -> float:
+    """Run a function several times and return the fastest run in seconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=4096, help="raster width and height in pixels")
+    parser.add_argument("--compress", default="deflate", choices=["deflate", "lzw", "none"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "benchmark.tif")
+        print(f"Creating {args.size} x {args.size} x 4 {args.compress} raster...")
+        create_benchmark_raster(path, args.size, args.compress)
+
+        baseline = best_time(lambda: stream_band_stats(path, 1), args.repeats)
+        print(f"\n{'method':<28}{'seconds':>10}{'speedup':>10}")
+        print(f"{'stream_band_stats':<28}{baseline:>10.3f}{1.0:>10.2f}")
+
+        reference = stream_band_stats(path, 1)
+        for workers in args.workers:
+            elapsed = best_time(lambda workers=workers: parallel_band_stats(path, 1, max_workers=workers),
+                                args.repeats)
+            assert parallel_band_stats(path, 1, max_workers=workers)['mean'] == \
+                   parallel_band_stats(path, 1, max_workers=1)['mean']
+            assert abs(parallel_band_stats(path, 1, max_workers=workers)['mean'] - reference['mean']) < 1e-6
+            print(f"{f'parallel_band_stats x{workers}':<28}{elapsed:>10.3f}{baseline / elapsed:>10.2f}")
+
+        ndvi_baseline = best_time(lambda: parallel_ndvi(path, 3, 4, max_workers=1), args.repeats)
+        for workers in args.workers:
+            elapsed = best_time(lambda workers=workers: parallel_ndvi(path, 3, 4, max_workers=workers),
+                                args.repeats)
+            print(f"{f'parallel_ndvi x{workers}':<28}{elapsed:>10.3f}{ndvi_baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
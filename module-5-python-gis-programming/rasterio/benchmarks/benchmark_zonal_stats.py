@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Zonal Statistics
+
+Compares masking the raster with one polygon at a time (rasterio.mask.mask
+plus np.mean(), the usual tutorial approach) with the single-pass
+zonal_stats() of zonal_stats.py, for a grid of square "census tracts".
+
+Run it from the rasterio assignment folder:
+    python benchmarks/benchmark_zonal_stats.py --size 4096 --zones 2500
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import geopandas as gpd
+import numpy as np
+import rasterio
+import rasterio.mask
+from shapely.geometry import box
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.rasterio_analysis.zonal_stats import zonal_stats
+
+
+def naive_zonal_means(raster_path: str, zones: gpd.GeoDataFrame) -> np.ndarray:
+    """Mask the raster with each polygon in turn and take the mean."""
+    means = np.full(len(zones), np.nan)
+    with rasterio.open(raster_path) as src:
+        for i, geometry in enumerate(zones.geometry):
+            data, _ = rasterio.mask.mask(src, [geometry], crop=True, filled=False)
+            values = data.compressed()
+            if values.size:
+                means[i] = values.astype(np.float64).mean()
+    return means
+
+
+def create_benchmark_raster(path: str, size: int):
+    """Write a size x size DEM with 1 map unit pixels."""
+    rng = np.random.default_rng(0)
+    transform = rasterio.transform.from_bounds(0, 0, size, size, size, size)
+    with rasterio.open(
+        path, 'w', driver='GTiff', height=size, width=size, count=1, dtype='float32',
+        crs='EPSG:32612', transform=transform, nodata=-9999, tiled=True,
+        blockxsize=256, blockysize=256
+    ) as dst:
+        for _, window in dst.block_windows(1):
+            block = 1500 + rng.normal(0, 40, size=(window.height, window.width))
+            dst.write(block.astype(np.float32), 1, window=window)
+
+
+def create_zones(size: int, n_zones: int) -> gpd.GeoDataFrame:
+    """A grid of slightly shrunken squares covering the raster."""
+    per_side = int(np.ceil(np.sqrt(n_zones)))
+    step = size / per_side
+    squares = [box(i * step + 0.3, j * step + 0.3, (i + 1) * step - 0.3, (j + 1) * step - 0.3)
+               for j in range(per_side) for i in range(per_side)][:n_zones]
+    return gpd.GeoDataFrame({'zone': range(len(squares))}, geometry=squares, crs='EPSG:32612')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=4096, help="raster width and height in pixels")
+    parser.add_argument("--zones", type=int, default=2500, help="number of polygons")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "zonal_benchmark.tif")
+        print(f"Creating {args.size} x {args.size} DEM...")
+        create_benchmark_raster(path, args.size)
+        zones = create_zones(args.size, args.zones)
+
+        start = time.perf_counter()
+        naive_means = naive_zonal_means(path, zones)
+        naive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = zonal_stats(path, zones, stats=['mean'])
+        mean_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        zonal_stats(path, zones)
+        all_seconds = time.perf_counter() - start
+
+        np.testing.assert_allclose(result['mean'], naive_means, rtol=1e-9)
+        print(f"\n{len(zones):,} polygons")
+        print(f"  one polygon at a time (mean):    {naive_seconds:8.2f} s")
+        print(f"  zonal_stats (mean):              {mean_seconds:8.2f} s  ({naive_seconds / mean_seconds:.1f}x)")
+        print(f"  zonal_stats (all six statistics): {all_seconds:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
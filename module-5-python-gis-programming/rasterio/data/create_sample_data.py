@@ -77,6 +77,14 @@ try:
 except ImportError:
     missing_packages.append("tqdm")
 
+# The synthetic rasters are written as Cloud-Optimized GeoTIFFs with the
+# assignment's own COG writer (src/rasterio_analysis/cog_writer.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+try:
+    from src.rasterio_analysis.cog_writer import CogWriter
+except ImportError:
+    missing_packages.append("rasterio_analysis (run this script from the rasterio folder)")
+
 if missing_packages:
     print(f"❌ Missing required libraries: {', '.join(missing_packages)}")
     print()
@@ -659,11 +667,10 @@ def create_synthetic_dem() -> Path:
         'dtype': 'float32',
         'crs': 'EPSG:4326',
         'transform': transform,
-        'nodata': -9999.0,
-        'compress': 'lzw'
+        'nodata': -9999.0
     }
 
-    with rasterio.open(dem_path, 'w', **profile) as dst:
+    with CogWriter(dem_path, profile) as dst:
         dst.write(elevation, 1)
         dst.update_tags(
             SOURCE='High-quality synthetic DEM based on real Phoenix topography',
@@ -745,11 +752,10 @@ def create_synthetic_landsat() -> Path:
         'dtype': 'uint16',
         'crs': 'EPSG:4326',
         'transform': transform,
-        'nodata': 0,
-        'compress': 'lzw'
+        'nodata': 0
     }
 
-    with rasterio.open(landsat_path, 'w', **profile) as dst:
+    with CogWriter(landsat_path, profile) as dst:
         dst.write(imagery)
         dst.update_tags(
             SOURCE='Synthetic Landsat-8 based on realistic spectral signatures',
@@ -804,11 +810,10 @@ def create_synthetic_temperature() -> Path:
         'dtype': 'float32',
         'crs': 'EPSG:4326',
         'transform': transform,
-        'nodata': -9999.0,
-        'compress': 'lzw'
+        'nodata': -9999.0
     }
 
-    with rasterio.open(temp_path, 'w', **profile) as dst:
+    with CogWriter(temp_path, profile) as dst:
         dst.write(temperature, 1)
         dst.update_tags(
             SOURCE='Synthetic MODIS LST based on realistic temperature patterns',
@@ -9,6 +9,28 @@ Modules:
 - raster_basics: Basic raster reading and information extraction
 - band_math: Vegetation indices and band calculations
 - applications: Practical raster analysis workflows
+- block_stats: Streaming (block-by-block) statistics for very large rasters
+- quantile_sketch: Approximate, mergeable medians and percentiles
+- dataset_cache: Reuse open datasets instead of reopening the same file
+- stats_cache: Remember statistics on disk between runs
+- overviews: Fast approximate statistics and resolution-aware reads from overviews (pyramids)
+- tile_scheduler: Multi-threaded block processing (statistics and NDVI)
+- batch_inventory: Summarize many rasters in parallel (Python and command line)
+- packed_mask: Valid/nodata masks stored with 1 bit per pixel
+- band_expressions: Block-by-block raster calculator for band-math formulas
+- classification: One-pass classification with np.digitize and np.bincount
+- spectral_indices: NDVI, EVI, SAVI, NDWI and NBR from a single read of each band
+- scaled_index: Store index rasters as int16 x 10000 with scale/offset metadata
+- point_sampling: Vectorized point sampling with one read per touched block
+- spatial_order: Morton (Z-order) and Hilbert curve keys for block ordering
+- interpolation: Vectorized nearest, bilinear and cubic point interpolation
+- buffer_stats: Buffer mean and std around points from summed-area tables
+- zonal_stats: Single-pass raster statistics for every polygon of a GeoDataFrame
+- stream_sampling: Sample millions of points in chunks, straight to Parquet or CSV
+- range_cache: Keep downloaded byte ranges of remote rasters on disk between runs
+- cog_reader: Fetch all tiles of a remote COG window at the same time
+- cog_writer: Write outputs as Cloud-Optimized GeoTIFFs, window by window
+- io_stats: Count bytes, requests, blocks and time per phase of raster jobs
 
 Author: Student (you!)
 Course: GIST 604B - Open Source GIS Programming
@@ -35,6 +57,78 @@ from .applications import (
     create_raster_summary
 )
 
+# Performance helpers (already implemented - you don't need to modify these)
+from .block_stats import (
+    RunningStats,
+    stream_band_stats,
+    stream_multiband_stats
+)
+from .quantile_sketch import QuantileSketch
+from .dataset_cache import (
+    DatasetCache,
+    open_raster,
+    use_dataset_cache
+)
+from .stats_cache import (
+    StatsCache,
+    cached_multiband_stats
+)
+from .overviews import (
+    approximate_band_stats,
+    approximate_multiband_stats,
+    read_at_resolution
+)
+from .tile_scheduler import (
+    parallel_band_stats,
+    parallel_multiband_stats,
+    parallel_ndvi
+)
+from .batch_inventory import (
+    find_rasters,
+    run_raster_inventory,
+    read_inventory
+)
+from .packed_mask import PackedMask
+from .band_expressions import (
+    BandExpression,
+    evaluate_expression,
+    iter_expression_windows
+)
+from .classification import (
+    ClassScheme,
+    VEGETATION_CLASSES,
+    VEGETATION_INDEX_CLASSES,
+    classify_array,
+    classify_raster
+)
+from .spectral_indices import (
+    SPECTRAL_INDICES,
+    BAND_PRESETS,
+    calculate_spectral_indices
+)
+from .scaled_index import (
+    INDEX_SCALE,
+    INDEX_NODATA,
+    encode_index,
+    decode_index
+)
+from .point_sampling import (
+    sample_points,
+    sample_raster_points
+)
+from .spatial_order import (
+    hilbert_key,
+    morton_key
+)
+from .interpolation import interpolate
+from .buffer_stats import buffer_stats
+from .zonal_stats import zonal_stats
+from .stream_sampling import iter_sample_batches, write_sampled_points
+from .range_cache import RangeCache
+from .cog_reader import read_cog_window
+from .cog_writer import CogWriter, validate_cog, write_cog
+from .io_stats import IOStats, track_io
+
 # Package metadata
 __version__ = "1.0.0"
 __author__ = "GIST 604B Student"
@@ -53,7 +147,59 @@ __all__ = [
     # Applications (Part 3)
     'sample_raster_at_points',
     'read_remote_raster',
-    'create_raster_summary'
+    'create_raster_summary',
+
+    # Performance helpers
+    'RunningStats',
+    'stream_band_stats',
+    'stream_multiband_stats',
+    'QuantileSketch',
+    'DatasetCache',
+    'open_raster',
+    'use_dataset_cache',
+    'StatsCache',
+    'cached_multiband_stats',
+    'approximate_band_stats',
+    'approximate_multiband_stats',
+    'parallel_band_stats',
+    'parallel_multiband_stats',
+    'parallel_ndvi',
+    'find_rasters',
+    'run_raster_inventory',
+    'read_inventory',
+    'PackedMask',
+    'BandExpression',
+    'evaluate_expression',
+    'iter_expression_windows',
+    'ClassScheme',
+    'VEGETATION_CLASSES',
+    'VEGETATION_INDEX_CLASSES',
+    'classify_array',
+    'classify_raster',
+    'SPECTRAL_INDICES',
+    'BAND_PRESETS',
+    'calculate_spectral_indices',
+    'INDEX_SCALE',
+    'INDEX_NODATA',
+    'encode_index',
+    'decode_index',
+    'sample_points',
+    'sample_raster_points',
+    'hilbert_key',
+    'morton_key',
+    'interpolate',
+    'buffer_stats',
+    'zonal_stats',
+    'iter_sample_batches',
+    'write_sampled_points',
+    'RangeCache',
+    'read_cog_window',
+    'read_at_resolution',
+    'CogWriter',
+    'write_cog',
+    'validate_cog',
+    'IOStats',
+    'track_io'
 ]
 
 print("📦 Rasterio Analysis Package loaded successfully!")
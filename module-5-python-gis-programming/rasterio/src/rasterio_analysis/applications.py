@@ -13,18 +13,27 @@ Assignment: Python Rasterio - Working with Raster Data
 # Import the libraries we need
 import rasterio
 from rasterio.windows import from_bounds
-from rasterio.transform import rowcol
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Union, Any, Tuple
+from typing import Dict, List, Optional, Union, Any, Tuple
 import json
 
 # Import our other modules to reuse functions
 from .raster_basics import read_raster_info, get_raster_stats, get_raster_extent
 from .band_math import calculate_ndvi
-
-
-def sample_raster_at_points(raster_path: str, points_list: List[Tuple[float, float]]) -> Dict[str, Any]:
+from .block_stats import stream_multiband_stats
+from .dataset_cache import open_raster, use_dataset_cache
+from .stats_cache import StatsCache, cached_multiband_stats
+from .overviews import DEFAULT_MAX_PIXELS, approximate_multiband_stats
+from .point_sampling import sample_points
+from .range_cache import RangeCache
+from .cog_reader import fit_cache_to_window, prefetch_window
+from .io_stats import report_io
+
+
+@report_io
+def sample_raster_at_points(raster_path: str, points_list: List[Tuple[float, float]],
+                            order: Optional[str] = None) -> Dict[str, Any]:
     """
     Extract raster values at specific coordinate locations.
 
@@ -41,6 +50,10 @@ def sample_raster_at_points(raster_path: str, points_list: List[Tuple[float, flo
         raster_path (str): Path to the raster file
         points_list (List[Tuple[float, float]]): List of (x, y) coordinate pairs
             Example: [(-120.5, 35.2), (-120.3, 35.4), (-120.1, 35.6)]
+            An (n, 2) numpy array works too, and is faster for millions of points
+        order (str, optional): Order to read the raster blocks in: 'hilbert',
+            'morton' or 'row' (see spatial_order.py). Default None reads them
+            row by row. Values are always returned in the order of points_list.
 
     Returns:
         Dict[str, Any]: Dictionary containing point values and metadata
@@ -52,74 +65,34 @@ def sample_raster_at_points(raster_path: str, points_list: List[Tuple[float, flo
             'points_inside_raster': 3,
             'points_outside_raster': 0,
             'raster_crs': 'EPSG:4326',
-            'total_points': 3
+            'total_points': 3,
+            'sampling': {'order': None, 'blocks_read': 2, 'cache_hit_rate': 0.0, ...}
         }
     """
     # STEP 1: Open the raster file and get its properties
-    with rasterio.open(raster_path) as src:
+    with open_raster(raster_path) as src:
 
         # Get raster properties we'll need
         raster_bounds = src.bounds
-        raster_transform = src.transform
         raster_crs = str(src.crs)
 
-        # STEP 2: Initialize lists to store results
-        point_values = []
-        points_inside = 0
-        points_outside = 0
-
-        # STEP 3: Loop through each point and extract the raster value
-        for i, (x, y) in enumerate(points_list):
-
-            # STEP 3a: Check if the point is within the raster bounds
-            # TODO: Check if x and y are within the raster extent
-            # HINT: Compare with raster_bounds.left, right, bottom, top
-
-            if (raster_bounds.left <= x <= raster_bounds.right and
-                raster_bounds.bottom <= y <= raster_bounds.top):
-
-                # Point is inside the raster
-                points_inside += 1
-
-                # STEP 3b: Convert geographic coordinates to pixel coordinates
-                # HINT: Use rowcol() function to convert x,y to row,col
-                try:
-                    row, col = rowcol(raster_transform, x, y)
-
-                    # STEP 3c: Make sure the pixel coordinates are valid
-                    # Check if row and col are within the raster dimensions
-                    if (0 <= row < src.height and 0 <= col < src.width):
-
-                        # STEP 3d: Read the pixel value
-                        # TODO: Read the value at the specific pixel location
-                        # HINT: Use src.read(1, window=Window(col, row, 1, 1)) for one pixel
-                        # Or use array indexing after reading the whole band
-
-                        # Method 1: Read just one pixel (more efficient for few points)
-                        from rasterio.windows import Window
-                        window = Window(col, row, 1, 1)
-                        pixel_value = src.read(1, window=window)[0, 0]
-
-                        # Handle nodata values
-                        if src.nodata is not None and pixel_value == src.nodata:
-                            point_values.append(None)  # No data at this location
-                        else:
-                            point_values.append(float(pixel_value))
-
-                    else:
-                        # Pixel coordinates are outside raster dimensions
-                        point_values.append(None)
-                        points_outside += 1
-
-                except Exception as e:
-                    # Error in coordinate conversion
-                    point_values.append(None)
-                    points_outside += 1
-
-            else:
-                # Point is outside the raster bounds
-                points_outside += 1
-                point_values.append(None)
+        # STEP 2: Put all x and y coordinates into two numpy arrays
+        points = np.asarray(points_list, dtype=np.float64).reshape(-1, 2)
+        xs, ys = points[:, 0], points[:, 1]
+
+        # STEP 3: Read the raster value at every point at once
+        # Looping over points with rowcol() and a 1x1 src.read() costs one
+        # GDAL call per point. sample_points() converts all coordinates to
+        # pixels with the inverse geotransform and reads each raster block
+        # only once, however many points fall in it (see point_sampling.py).
+        # Points outside the raster and nodata pixels come back as NaN.
+        # With order='hilbert' the blocks are visited along a space-filling
+        # curve, so neighbouring blocks are read one after the other
+        # (see spatial_order.py)
+        values, sampling = sample_points(src, xs, ys, order=order)
+        point_values = np.where(np.isnan(values[:, 0]), None, values[:, 0]).tolist()
+        points_inside = sampling['points_inside']
+        points_outside = sampling['points_outside']
 
         # STEP 4: Create the results dictionary
         results = {
@@ -134,14 +107,19 @@ def sample_raster_at_points(raster_path: str, points_list: List[Tuple[float, flo
                 'bottom': float(raster_bounds.bottom),
                 'right': float(raster_bounds.right),
                 'top': float(raster_bounds.top)
-            }
+            },
+            'sampling': {key: value for key, value in sampling.items()
+                         if key not in ('points_inside', 'points_outside')}
         }
 
         # STEP 5: Return the results
         return results
 
 
-def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None) -> Dict[str, Any]:
+@report_io
+def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None,
+                       range_cache: Optional[RangeCache] = None,
+                       max_workers: Optional[int] = None) -> Dict[str, Any]:
     """
     Read a raster from a remote URL (like a Cloud-Optimized GeoTIFF).
 
@@ -156,6 +134,13 @@ def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None)
         url (str): URL to the remote raster file
         bbox (Tuple[float, float, float, float], optional): Bounding box to read
             Format: (left, bottom, right, top) in the raster's coordinate system
+        range_cache (RangeCache, optional): Keep the downloaded parts of the
+            file on disk, so reading the same area again needs no downloads
+            (see range_cache.py)
+        max_workers (int, optional): Download all tiles of the bbox at the
+            same time with this many requests in flight before reading
+            (see cog_reader.py). Uses a temporary range cache, just big
+            enough for the bbox, if none is given.
 
     Returns:
         Dict[str, Any]: Dictionary containing raster data and metadata
@@ -174,8 +159,12 @@ def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None)
     """
     # STEP 1: Try to open the remote raster
     # HINT: rasterio.open() works with URLs just like local files!
+    temporary_cache = bool(max_workers) and range_cache is None
+    if temporary_cache:
+        range_cache = RangeCache(':memory:')
+    options = {'opener': range_cache} if range_cache is not None else {}
     try:
-        with rasterio.open(url) as src:
+        with open_raster(url, **options) as src:
 
             # STEP 2: Get basic information about the remote raster
             raster_info = {
@@ -206,6 +195,13 @@ def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None)
                 try:
                     window = from_bounds(left, bottom, right, top, src.transform)
 
+                    # Fetch every tile of the window at once, instead of a few at a time
+                    if max_workers:
+                        if temporary_cache:
+                            fit_cache_to_window(src, window, range_cache, [1])
+                        raster_info['prefetch'] = prefetch_window(src, url, window, range_cache,
+                                                                  [1], max_workers)
+
                     # Read the data within the window
                     data = src.read(1, window=window)  # Read first band
 
@@ -253,6 +249,9 @@ def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None)
                     'total_pixels': data.size
                 })
 
+            if range_cache is not None:
+                raster_info['range_cache'] = range_cache.stats()
+
             return raster_info
 
     except Exception as e:
@@ -264,8 +263,15 @@ def read_remote_raster(url: str, bbox: Tuple[float, float, float, float] = None)
             'message': f"Could not read remote raster: {e}"
         }
 
+    finally:
+        # The temporary range cache is only needed for this one read
+        if temporary_cache:
+            range_cache.close()
 
-def create_raster_summary(raster_path: str) -> Dict[str, Any]:
+
+@report_io
+def create_raster_summary(raster_path: str, use_cache: bool = False,
+                          approximate: bool = False, max_pixels: int = None) -> Dict[str, Any]:
     """
     Create a comprehensive summary of a raster dataset.
 
@@ -275,6 +281,12 @@ def create_raster_summary(raster_path: str) -> Dict[str, Any]:
 
     Args:
         raster_path (str): Path to the raster file (local or remote URL)
+        use_cache (bool): Reuse band and NDVI statistics stored on disk by an
+            earlier run, as long as the file has not changed (see stats_cache.py)
+        approximate (bool): Estimate statistics and NDVI from an overview for a
+            fast preview of very large files (see overviews.py)
+        max_pixels (int, optional): Pixel budget for approximate mode (setting
+            it turns on approximate mode)
 
     Returns:
         Dict[str, Any]: Comprehensive summary of the raster
@@ -282,7 +294,8 @@ def create_raster_summary(raster_path: str) -> Dict[str, Any]:
     Example return format:
         {
             'file_info': {...},      # From read_raster_info()
-            'statistics': {...},     # From get_raster_stats()
+            'statistics': {...},     # Band 1 statistics (same keys as get_raster_stats())
+            'band_statistics': {1: {...}, 2: {...}},  # Every band, read in one pass
             'extent': {...},         # From get_raster_extent()
             'ndvi_analysis': {...},  # From calculate_ndvi() if multi-band
             'summary': {             # High-level summary
@@ -300,93 +313,118 @@ def create_raster_summary(raster_path: str) -> Dict[str, Any]:
         'analysis_date': str(pd.Timestamp.now().date()) if 'pd' in globals() else 'Unknown'
     }
 
-    try:
-        # STEP 2: Get basic file information
-        # TODO: Use your read_raster_info() function
-        # HINT: You already wrote this function in raster_basics.py!
-
-        file_info = read_raster_info(raster_path)
-        summary['file_info'] = file_info
-
-        # STEP 3: Get basic statistics for the first band
-        # TODO: Use your get_raster_stats() function
-        statistics = get_raster_stats(raster_path, band_number=1)
-        summary['statistics'] = statistics
-
-        # STEP 4: Get the geographic extent
-        # TODO: Use your get_raster_extent() function
-        extent = get_raster_extent(raster_path)
-        summary['extent'] = extent
-
-        # STEP 5: Try to calculate NDVI if this is a multi-band image
-        if file_info['count'] >= 4:  # Need at least 4 bands for typical NDVI
-            try:
-                # TODO: Use your calculate_ndvi() function
-                # HINT: Assume red=3, NIR=4 for Landsat-style imagery
-                ndvi_results = calculate_ndvi(raster_path, red_band=3, nir_band=4)
-                summary['ndvi_analysis'] = {
-                    'min_ndvi': ndvi_results['min_ndvi'],
-                    'max_ndvi': ndvi_results['max_ndvi'],
-                    'mean_ndvi': ndvi_results['mean_ndvi'],
-                    'vegetation_pixels': ndvi_results['vegetation_pixels'],
-                    'vegetation_percentage': round(
-                        (ndvi_results['vegetation_pixels'] / ndvi_results['total_pixels']) * 100, 1
-                    ) if ndvi_results['total_pixels'] > 0 else 0
-                }
-                has_ndvi = True
-            except Exception as e:
-                summary['ndvi_analysis'] = {'error': str(e)}
+    # Reuse one open dataset for every step below instead of reopening the
+    # file in each function (see dataset_cache.py)
+    with use_dataset_cache():
+        try:
+            # STEP 2: Get basic file information
+            # TODO: Use your read_raster_info() function
+            # HINT: You already wrote this function in raster_basics.py!
+
+            file_info = read_raster_info(raster_path)
+            summary['file_info'] = file_info
+
+            # STEP 3: Get basic statistics for every band in a single pass
+            # (stream_multiband_stats() reads each block once for all bands
+            # instead of calling get_raster_stats() once per band)
+            # Approximate results are never stored in the on-disk cache
+            if approximate or max_pixels is not None:
+                max_pixels = max_pixels or DEFAULT_MAX_PIXELS
+                use_cache = False
+            stats_cache = StatsCache() if use_cache else None
+            if max_pixels is not None:
+                band_statistics = approximate_multiband_stats(raster_path, max_pixels=max_pixels)
+                summary['approximation'] = band_statistics[1]['approximation']
+            elif stats_cache is not None:
+                band_statistics = cached_multiband_stats(raster_path, cache=stats_cache)
+            else:
+                band_statistics = stream_multiband_stats(raster_path)
+            statistics = band_statistics[1]
+            summary['statistics'] = statistics
+            summary['band_statistics'] = band_statistics
+
+            # STEP 4: Get the geographic extent
+            # TODO: Use your get_raster_extent() function
+            extent = get_raster_extent(raster_path)
+            summary['extent'] = extent
+
+            # STEP 5: Try to calculate NDVI if this is a multi-band image
+            if file_info['count'] >= 4:  # Need at least 4 bands for typical NDVI
+                try:
+                    ndvi_analysis = stats_cache.get(raster_path, 'ndvi_analysis') if stats_cache else None
+                    if ndvi_analysis is None:
+                        fingerprint = stats_cache.fingerprint(raster_path) if stats_cache else None
+                        # TODO: Use your calculate_ndvi() function
+                        # HINT: Assume red=3, NIR=4 for Landsat-style imagery
+                        ndvi_results = calculate_ndvi(raster_path, red_band=3, nir_band=4,
+                                                      max_pixels=max_pixels)
+                        ndvi_analysis = {
+                            'min_ndvi': ndvi_results['min_ndvi'],
+                            'max_ndvi': ndvi_results['max_ndvi'],
+                            'mean_ndvi': ndvi_results['mean_ndvi'],
+                            'vegetation_pixels': ndvi_results['vegetation_pixels'],
+                            'vegetation_percentage': round(
+                                (ndvi_results['vegetation_pixels'] / ndvi_results['total_pixels']) * 100, 1
+                            ) if ndvi_results['total_pixels'] > 0 else 0
+                        }
+                        if stats_cache is not None:
+                            stats_cache.put(raster_path, 'ndvi_analysis', ndvi_analysis,
+                                            fingerprint=fingerprint)
+                    summary['ndvi_analysis'] = ndvi_analysis
+                    has_ndvi = True
+                except Exception as e:
+                    summary['ndvi_analysis'] = {'error': str(e)}
+                    has_ndvi = False
+            else:
+                summary['ndvi_analysis'] = {'note': 'Insufficient bands for NDVI calculation'}
                 has_ndvi = False
-        else:
-            summary['ndvi_analysis'] = {'note': 'Insufficient bands for NDVI calculation'}
-            has_ndvi = False
-
-        # STEP 6: Create a high-level summary
-        # TODO: Calculate some useful summary statistics
-
-        # Estimate pixel size in meters (rough approximation)
-        if 'EPSG:4326' in str(file_info['crs']):
-            # Geographic coordinates - rough conversion to meters at equator
-            pixel_size_degrees = extent['width'] / file_info['width']
-            pixel_size_meters = pixel_size_degrees * 111320  # meters per degree at equator
-        else:
-            pixel_size_meters = None  # Unknown for projected coordinates
-
-        # Estimate file size (very rough)
-        total_pixels = file_info['width'] * file_info['height'] * file_info['count']
-        estimated_size_mb = (total_pixels * 4) / (1024 * 1024)  # Assume 4 bytes per pixel
-
-        # Assess data quality
-        if statistics['nodata_count'] == 0:
-            data_quality = 'Excellent'
-        elif statistics['nodata_count'] < (file_info['width'] * file_info['height'] * 0.05):
-            data_quality = 'Good'
-        elif statistics['nodata_count'] < (file_info['width'] * file_info['height'] * 0.20):
-            data_quality = 'Fair'
-        else:
-            data_quality = 'Poor - many missing values'
-
-        summary['summary'] = {
-            'total_pixels': total_pixels,
-            'estimated_size_mb': round(estimated_size_mb, 1),
-            'pixel_size_meters': round(pixel_size_meters, 1) if pixel_size_meters else None,
-            'is_multiband': file_info['count'] > 1,
-            'has_ndvi_capability': has_ndvi,
-            'data_quality': data_quality,
-            'coverage_area_km2': round((extent['width'] * extent['height']) / 1000000, 1) if pixel_size_meters else None
-        }
 
-        # STEP 7: Return the complete summary
-        return summary
+            # STEP 6: Create a high-level summary
+            # TODO: Calculate some useful summary statistics
 
-    except Exception as e:
-        # Handle any errors
-        return {
-            'raster_path': raster_path,
-            'error': str(e),
-            'success': False,
-            'message': f"Could not create raster summary: {e}"
-        }
+            # Estimate pixel size in meters (rough approximation)
+            if 'EPSG:4326' in str(file_info['crs']):
+                # Geographic coordinates - rough conversion to meters at equator
+                pixel_size_degrees = extent['width'] / file_info['width']
+                pixel_size_meters = pixel_size_degrees * 111320  # meters per degree at equator
+            else:
+                pixel_size_meters = None  # Unknown for projected coordinates
+
+            # Estimate file size (very rough)
+            total_pixels = file_info['width'] * file_info['height'] * file_info['count']
+            estimated_size_mb = (total_pixels * 4) / (1024 * 1024)  # Assume 4 bytes per pixel
+
+            # Assess data quality
+            if statistics['nodata_count'] == 0:
+                data_quality = 'Excellent'
+            elif statistics['nodata_count'] < (file_info['width'] * file_info['height'] * 0.05):
+                data_quality = 'Good'
+            elif statistics['nodata_count'] < (file_info['width'] * file_info['height'] * 0.20):
+                data_quality = 'Fair'
+            else:
+                data_quality = 'Poor - many missing values'
+
+            summary['summary'] = {
+                'total_pixels': total_pixels,
+                'estimated_size_mb': round(estimated_size_mb, 1),
+                'pixel_size_meters': round(pixel_size_meters, 1) if pixel_size_meters else None,
+                'is_multiband': file_info['count'] > 1,
+                'has_ndvi_capability': has_ndvi,
+                'data_quality': data_quality,
+                'coverage_area_km2': round((extent['width'] * extent['height']) / 1000000, 1) if pixel_size_meters else None
+            }
+
+            # STEP 7: Return the complete summary
+            return summary
+
+        except Exception as e:
+            # Handle any errors
+            return {
+                'raster_path': raster_path,
+                'error': str(e),
+                'success': False,
+                'message': f"Could not create raster summary: {e}"
+            }
 
 
 # BONUS: Helper function to print the summary in a nice format
@@ -428,6 +466,15 @@ def print_raster_summary_report(summary: Dict[str, Any]):
         print(f"  Standard Deviation: {stats['std']:.2f}")
         print(f"  Missing pixels: {stats['nodata_count']:,}")
 
+    if len(summary.get('band_statistics', {})) > 1:
+        print("\nALL BANDS:")
+        for band_number, band_stats in summary['band_statistics'].items():
+            if band_stats['mean'] is None:
+                print(f"  Band {band_number}: no valid data")
+                continue
+            print(f"  Band {band_number}: {band_stats['min']:.2f} to {band_stats['max']:.2f}, "
+                  f"mean {band_stats['mean']:.2f}, std {band_stats['std']:.2f}")
+
     if 'ndvi_analysis' in summary and 'min_ndvi' in summary['ndvi_analysis']:
         ndvi = summary['ndvi_analysis']
         print(f"\nVEGETATION ANALYSIS (NDVI):")
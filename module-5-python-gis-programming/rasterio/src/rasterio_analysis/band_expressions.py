@@ -0,0 +1,464 @@
+"""
+Band Expressions - Raster calculator for any band-math formula
+
+calculate_ndvi() is one hand-written formula. Every new index (EVI, NDWI,
+NBR, ...) would need another function that reads whole bands into memory
+and creates several temporary arrays.
+
+This module is a small "raster calculator". You write the formula as a
+string, like "(b4 - b3) / (b4 + b3)", and it is evaluated one block
+(window) at a time, so memory use stays the same no matter how big the
+raster is. A pixel is nodata in the result if it is nodata in any input
+band, or if the formula cannot be calculated there (like dividing by zero).
+
+The result can be written to a tiled GeoTIFF (float32, or int16 scaled by
+10000 - see scaled_index.py), or you can just get the statistics (or loop
+over the windows yourself). Input bands that carry a scale and offset in
+their metadata are converted to real units one window at a time. The
+valid-data mask of every window is kept as a PackedMask (1 bit per pixel,
+see packed_mask.py), so valid pixels are counted with a popcount.
+
+Formulas can use:
+- band variables: b1, b2, ... for a single raster, or your own names
+  (like red and nir) when you pass a dictionary of sources
+- numbers and + - * / ** and comparisons (< <= > >= == !=)
+- functions: sqrt, abs, log, exp, minimum, maximum, where, clip
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import ast
+import re
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+from .block_stats import RunningStats, band_scaling
+from .cog_writer import CogWriter
+from .dataset_cache import open_raster
+from .io_stats import report_io
+from .packed_mask import PackedMask
+from .scaled_index import (
+    INDEX_DTYPE,
+    INDEX_NODATA,
+    INDEX_OFFSET,
+    INDEX_SCALE,
+    check_output_dtype,
+    encode_index,
+)
+
+# NDVI written as an expression (see calculate_ndvi() in band_math.py)
+NDVI_EXPRESSION = "(nir - red) / (nir + red)"
+
+# Functions that formulas are allowed to call
+EXPRESSION_FUNCTIONS = {
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'log': np.log,
+    'exp': np.exp,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+    'where': np.where,
+    'clip': np.clip,
+}
+
+# Python syntax that formulas are allowed to use (no attributes, imports, ...)
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+_BAND_VARIABLE = re.compile(r'^b(\d+)$')
+
+# A source is a raster path, or (raster path, band number)
+Source = Union[str, Tuple[str, int]]
+
+
+def normalized_difference(a: np.ndarray, b: np.ndarray, out: np.ndarray,
+                          valid: Optional[Union[np.ndarray, PackedMask]] = None) -> np.ndarray:
+    """
+    Calculate (a - b) / (a + b) straight into a float32 output array.
+
+    This is the shape of NDVI, NDWI, NBR and many other indices. Instead of
+    letting numpy create a new array for every step, the difference is
+    written into `out` and the sum into one scratch array, and the division
+    happens in place (np.divide with out= and where=).
+
+    Args:
+        a, b (np.ndarray): Input bands (any numeric type)
+        out (np.ndarray): float32 array that receives the result
+        valid (np.ndarray or PackedMask, optional): Mask of valid input pixels
+
+    Returns:
+        np.ndarray: `out`, with NaN where a pixel is invalid or a + b is zero
+    """
+    scratch = np.add(a, b, dtype=np.float32)
+    np.subtract(a, b, out=out, dtype=np.float32)
+    _fill_invalid(scratch, valid, 0)
+
+    undefined = scratch == 0
+    np.divide(out, scratch, out=out, where=~undefined)
+    out[undefined] = np.nan
+    return out
+
+
+def _fill_invalid(array: np.ndarray, valid: Optional[Union[np.ndarray, PackedMask]],
+                  fill_value: float) -> np.ndarray:
+    """Set the pixels of `array` that `valid` marks as invalid to fill_value."""
+    if isinstance(valid, PackedMask):
+        valid.fill_invalid(array, fill_value)
+    elif valid is not None:
+        np.copyto(array, fill_value, where=~valid)
+    return array
+
+
+class BandExpression:
+    """
+    A checked, ready-to-run band-math formula.
+
+    Example:
+        >>> ndvi = BandExpression("(nir - red) / (nir + red)")
+        >>> ndvi.variables
+        ['nir', 'red']
+        >>> ndvi.evaluate({'red': np.array([1.0, 2.0]), 'nir': np.array([3.0, 2.0])})
+        array([0.5, 0. ], dtype=float32)
+    """
+
+    def __init__(self, expression: str, kernel: Optional[Callable] = None):
+        self.expression = expression
+        self.kernel = kernel  # optional hand-written version: kernel(arrays, out, valid)
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression {expression!r}: {e.msg}") from None
+
+        names = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"Invalid expression {expression!r}: "
+                                 f"{type(node).__name__} is not allowed")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f"Invalid expression {expression!r}: only numbers are allowed")
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name)
+                                                   and node.func.id in EXPRESSION_FUNCTIONS):
+                raise ValueError(f"Invalid expression {expression!r}: unknown function "
+                                 f"(allowed: {', '.join(sorted(EXPRESSION_FUNCTIONS))})")
+            if isinstance(node, ast.Name) and node.id not in EXPRESSION_FUNCTIONS:
+                names.add(node.id)
+
+        if not names:
+            raise ValueError(f"Invalid expression {expression!r}: it does not use any bands")
+
+        self.variables = sorted(names)
+        self._code = compile(tree, '<band expression>', 'eval')
+
+    @classmethod
+    def normalized_difference(cls, a: str, b: str) -> "BandExpression":
+        """
+        The expression "(a - b) / (a + b)", calculated in place.
+
+        Example:
+            >>> ndvi = BandExpression.normalized_difference('nir', 'red')
+            >>> ndvi.expression
+            '(nir - red) / (nir + red)'
+        """
+        return cls(f"({a} - {b}) / ({a} + {b})",
+                   kernel=lambda arrays, out, valid: normalized_difference(arrays[a], arrays[b], out, valid))
+
+    def evaluate(self, arrays: Dict[str, np.ndarray], valid: Optional[Union[np.ndarray, PackedMask]] = None,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculate the formula for one set of arrays (usually one window).
+
+        Args:
+            arrays (Dict[str, np.ndarray]): Pixel values for every variable
+            valid (np.ndarray or PackedMask, optional): Mask of valid input pixels
+            out (np.ndarray, optional): float32 array to write the result into
+                (for example a slice of a bigger output array)
+
+        Returns:
+            np.ndarray: float32 result, NaN where the input was invalid or the
+                formula could not be calculated
+        """
+        shape = np.shape(arrays[self.variables[0]])
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+
+        if self.kernel is not None:
+            return self.kernel(arrays, out, valid)
+
+        namespace = {name: np.asarray(arrays[name]).astype(np.float32, copy=False)
+                     for name in self.variables}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = eval(self._code, {'__builtins__': {}, **EXPRESSION_FUNCTIONS}, namespace)
+
+        np.copyto(out, np.broadcast_to(result, shape), casting='unsafe')
+        np.nan_to_num(out, copy=False, nan=np.nan, posinf=np.nan, neginf=np.nan)
+        return _fill_invalid(out, valid, np.nan)
+
+    def __repr__(self) -> str:
+        return f"BandExpression({self.expression!r})"
+
+
+def resolve_sources(expression: BandExpression,
+                    sources: Union[str, Dict[str, Source]]) -> Dict[str, Tuple[str, int]]:
+    """
+    Work out which raster and band every variable of a formula refers to.
+
+    Args:
+        expression (BandExpression): The formula
+        sources: Either one raster path (variables are b1, b2, ...), or a
+            dictionary like {'red': ('scene.tif', 3), 'nir': ('scene.tif', 4)}
+            (a plain path means band 1)
+
+    Returns:
+        Dict[str, Tuple[str, int]]: (raster path, band number) for each variable
+    """
+    bindings = {}
+    for name in expression.variables:
+        if isinstance(sources, dict):
+            if name not in sources:
+                raise ValueError(f"No source given for variable '{name}' in {expression.expression!r}")
+            source = sources[name]
+            bindings[name] = (source, 1) if isinstance(source, str) else (str(source[0]), int(source[1]))
+        else:
+            match = _BAND_VARIABLE.match(name)
+            if match is None:
+                raise ValueError(f"Unknown variable '{name}': use b1, b2, ... or pass a dictionary of sources")
+            bindings[name] = (str(sources), int(match.group(1)))
+    return bindings
+
+
+def _as_expression(expression: Union[str, BandExpression]) -> BandExpression:
+    return expression if isinstance(expression, BandExpression) else BandExpression(expression)
+
+
+def iter_expression_windows(expression: Union[str, BandExpression],
+                            sources: Union[str, Dict[str, Source]],
+                            block_size: Optional[int] = None,
+                            out: Optional[np.ndarray] = None
+                            ) -> Iterator[Tuple[Window, np.ndarray, PackedMask]]:
+    """
+    Evaluate a formula one window at a time.
+
+    Args:
+        expression (str or BandExpression): The formula
+        sources: Raster path or dictionary of sources (see resolve_sources())
+        block_size (int, optional): Use square windows of this size instead
+            of the raster's own blocks
+        out (np.ndarray, optional): Full-size float32 array; each window's
+            result is written straight into its place (no extra copy)
+
+    Yields:
+        Tuple[Window, np.ndarray, PackedMask]: (window, result, valid) where
+            valid marks pixels that are valid in every input band
+    """
+    expression = _as_expression(expression)
+    bindings = resolve_sources(expression, sources)
+
+    for window, arrays, valid in iter_band_windows(bindings, block_size, out_shape=None if out is None else out.shape):
+        result = out[window.toslices()] if out is not None else None
+        yield window, expression.evaluate(arrays, valid, out=result), valid
+
+
+def iter_band_windows(bindings: Dict[str, Tuple[str, int]], block_size: Optional[int] = None,
+                      out_shape: Optional[Tuple[int, int]] = None,
+                      windows: Optional[Iterable[Window]] = None
+                      ) -> Iterator[Tuple[Window, Dict[str, np.ndarray], PackedMask]]:
+    """
+    Read several bands (possibly from several rasters) one window at a time.
+
+    Every band is read once per window, together with GDAL's valid-data mask
+    (packed to 1 bit per pixel, see packed_mask.py).
+    Bands with a scale or offset in their metadata (like NDVI stored as
+    int16 x 10000) are returned as float32 real values.
+
+    The generator opens its rasters itself and closes them when it finishes
+    (or is thrown away). It never switches the active dataset cache: a
+    paused generator does not run in its own context, so a cache block
+    inside it would leak into the caller. Wrap the loop in
+    use_dataset_cache() to share open datasets with other calls.
+
+    Args:
+        bindings (Dict[str, Tuple[str, int]]): (raster path, band number) for
+            each variable name (see resolve_sources())
+        block_size (int, optional): Use square windows of this size instead
+            of the first raster's own blocks
+        out_shape (Tuple[int, int], optional): Check that the rasters have
+            this (rows, cols) shape
+        windows (Iterable[Window], optional): Read only these windows (for
+            example one batch of blocks in tile_scheduler.py)
+
+    Yields:
+        Tuple[Window, Dict[str, np.ndarray], PackedMask]: (window, pixel
+            values for every variable, valid) where valid marks pixels that
+            are valid in every band
+    """
+    with ExitStack() as stack:
+        datasets = {}
+        for path, band_number in bindings.values():
+            if path not in datasets:
+                datasets[path] = stack.enter_context(open_raster(path))
+            if not 1 <= band_number <= datasets[path].count:
+                raise ValueError(f"Raster {path} only has {datasets[path].count} bands, "
+                                 f"but band {band_number} was requested")
+
+        first = next(iter(datasets.values()))
+        for path, src in datasets.items():
+            if (src.width, src.height) != (first.width, first.height) or src.transform != first.transform:
+                raise ValueError(f"Raster {path} does not line up with {first.name} "
+                                 f"(different size or transform)")
+        if out_shape is not None and tuple(out_shape) != (first.height, first.width):
+            raise ValueError(f"Output array shape {tuple(out_shape)} does not match the raster "
+                             f"({first.height}, {first.width})")
+
+        if windows is None and block_size is None:
+            first_band = next(iter(bindings.values()))[1]
+            windows = (window for _, window in first.block_windows(first_band))
+        elif windows is None:
+            windows = (Window(col, row, min(block_size, first.width - col), min(block_size, first.height - row))
+                       for row in range(0, first.height, block_size)
+                       for col in range(0, first.width, block_size))
+
+        scalings = {name: band_scaling(datasets[path], band_number)
+                    for name, (path, band_number) in bindings.items()}
+
+        for window in windows:
+            arrays = {}
+            valid = None
+            for name, (path, band_number) in bindings.items():
+                src = datasets[path]
+                values = src.read(band_number, window=window)
+                scale, offset = scalings[name]
+                if (scale, offset) != (1.0, 0.0):
+                    values = values.astype(np.float32)
+                    values *= scale
+                    values += offset
+                arrays[name] = values
+                band_valid = PackedMask.from_dataset(src, band_number, window=window)
+                valid = band_valid if valid is None else valid & band_valid
+            yield window, arrays, valid
+
+
+@report_io
+def evaluate_expression(expression: Union[str, BandExpression],
+                        sources: Union[str, Dict[str, Source]],
+                        output_path: Optional[str] = None,
+                        block_size: Optional[int] = None,
+                        output_dtype: str = 'float32') -> Dict[str, Any]:
+    """
+    Evaluate a formula over whole rasters with bounded memory.
+
+    Args:
+        expression (str or BandExpression): The formula, like "(b4 - b3) / (b4 + b3)"
+        sources: Raster path or dictionary of sources (see resolve_sources())
+        output_path (str, optional): Write the result to this Cloud-Optimized
+            GeoTIFF (see cog_writer.py)
+        block_size (int, optional): Use square windows of this size instead
+            of the raster's own blocks
+        output_dtype (str): 'float32' (nodata = NaN) or 'int16' (scaled by
+            10000, nodata = -32768, see scaled_index.py)
+
+    Returns:
+        Dict[str, Any]: Statistics of the result (always in real units)
+
+    Example return format:
+        {
+            'expression': '(b4 - b3) / (b4 + b3)',
+            'min': -0.31, 'max': 0.87, 'mean': 0.24, 'std': 0.18,
+            'valid_pixels': 1450000,    # pixels with a result
+            'nodata_count': 50000,      # nodata input or no result (like 0 / 0)
+            'windows': 36,
+            'output_path': 'ndvi.tif'   # None when nothing was written
+        }
+    """
+    expression = _as_expression(expression)
+    check_output_dtype(output_dtype)
+    stats = RunningStats()
+    window_count = 0
+
+    with ExitStack() as stack:
+        dst = None
+        if output_path is not None:
+            reference_path, _ = next(iter(resolve_sources(expression, sources).values()))
+            dst = stack.enter_context(open_index_output(output_path, reference_path,
+                                                        output_dtype=output_dtype))
+
+        for window, result, _ in iter_expression_windows(expression, sources, block_size):
+            if dst is not None:
+                write_index_block(dst, result, 1, window)
+
+            calculated = result[~np.isnan(result)]
+            stats.add_values(calculated, nodata_count=result.size - calculated.size)
+            window_count += 1
+
+    summary = stats.to_dict()
+    return {
+        'expression': expression.expression,
+        'min': summary['min'],
+        'max': summary['max'],
+        'mean': summary['mean'],
+        'std': summary['std'],
+        'valid_pixels': stats.count,
+        'nodata_count': stats.nodata_count,
+        'windows': window_count,
+        'output_path': output_path
+    }
+
+
+def open_aligned_output(output_path: str, reference_path: str, count: int = 1,
+                        dtype: str = 'float32', nodata: Optional[float] = np.nan,
+                        overview_resampling: Resampling = Resampling.average) -> CogWriter:
+    """
+    Create a Cloud-Optimized GeoTIFF that lines up with a reference raster.
+
+    Returns:
+        CogWriter: Use it like a rasterio dataset in write mode, in a `with`
+            statement (the COG is written when the block ends)
+    """
+    with open_raster(reference_path) as src:
+        profile = {
+            'width': src.width,
+            'height': src.height,
+            'count': count,
+            'dtype': dtype,
+            'crs': src.crs,
+            'transform': src.transform,
+            'nodata': nodata
+        }
+    return CogWriter(output_path, profile, overview_resampling=overview_resampling)
+
+
+def open_index_output(output_path: str, reference_path: str, count: int = 1,
+                      output_dtype: str = 'float32'):
+    """
+    Create an output GeoTIFF for index values (see open_aligned_output()).
+
+    'float32' files use NaN for nodata. 'int16' files store the values
+    scaled by 10000 with nodata = -32768, and record the scale and offset
+    in the metadata of every band so GDAL, QGIS and rasterio can convert
+    them back (see scaled_index.py).
+    """
+    if check_output_dtype(output_dtype) != INDEX_DTYPE:
+        return open_aligned_output(output_path, reference_path, count=count)
+
+    dst = open_aligned_output(output_path, reference_path, count=count,
+                              dtype=INDEX_DTYPE, nodata=INDEX_NODATA)
+    dst.scales = (INDEX_SCALE,) * count
+    dst.offsets = (INDEX_OFFSET,) * count
+    return dst
+
+
+def write_index_block(dst, result: np.ndarray, band_number: int, window: Window):
+    """Write one window of index values (NaN = nodata), scaling them for int16 outputs."""
+    if dst.dtypes[band_number - 1] == INDEX_DTYPE:
+        result = encode_index(result)
+    dst.write(result, band_number, window=window)
@@ -18,14 +18,32 @@ Assignment: Python Rasterio - Working with Raster Data
 import rasterio
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Union, Any, Tuple
+from typing import Dict, List, Union, Any, Optional, Tuple
 import warnings
 
+from .band_expressions import BandExpression, iter_expression_windows
+from .block_stats import RunningStats
+from .classification import VEGETATION_CLASSES, class_summary, classify_array
+from .dataset_cache import open_raster
+from .io_stats import report_io
+from .overviews import read_decimated
+from .packed_mask import PackedMask
+from .scaled_index import INDEX_NODATA, INDEX_OFFSET, INDEX_SCALE, encode_index
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
+# NDVI = (NIR - Red) / (NIR + Red) (NDVI_EXPRESSION), calculated in place
+# without temporary arrays
+NDVI = BandExpression.normalized_difference('nir', 'red')
+
+# NDVI above this value is usually counted as vegetation
+VEGETATION_THRESHOLD = 0.2
 
-def calculate_ndvi(raster_path: str, red_band: int = 3, nir_band: int = 4) -> Dict[str, Any]:
+
+@report_io
+def calculate_ndvi(raster_path: str, red_band: int = 3, nir_band: int = 4,
+                   max_pixels: int = None, scaled: bool = False) -> Dict[str, Any]:
     """
     Calculate NDVI (Normalized Difference Vegetation Index) from multi-band imagery.
 
@@ -45,6 +63,11 @@ def calculate_ndvi(raster_path: str, red_band: int = 3, nir_band: int = 4) -> Di
         raster_path (str): Path to the multi-band raster file
         red_band (int): Band number for red light (default: 3)
         nir_band (int): Band number for near-infrared (default: 4)
+        max_pixels (int, optional): If given, calculate a quick approximate NDVI
+            from an overview with at most this many pixels (see overviews.py)
+        scaled (bool): Return the NDVI array as int16 values scaled by 10000
+            (nodata = -32768) instead of float32, which needs half the memory.
+            The statistics are still real NDVI values (see scaled_index.py).
 
     Returns:
         Dict[str, Any]: Dictionary containing NDVI array and statistics
@@ -58,67 +81,66 @@ def calculate_ndvi(raster_path: str, red_band: int = 3, nir_band: int = 4) -> Di
             'vegetation_pixels': 15432,
             'total_pixels': 20000
         }
+
+        With scaled=True the dictionary also has 'scale_factor' (0.0001),
+        'offset' (0.0) and 'nodata_value' (-32768) for the NDVI array
+        (pass them on to analyze_vegetation()).
     """
     # STEP 1: Open the multi-band raster file
-    with rasterio.open(raster_path) as src:
+    with open_raster(raster_path) as src:
 
         # STEP 2: Check that we have enough bands
         if src.count < max(red_band, nir_band):
             raise ValueError(f"Raster only has {src.count} bands, but you requested bands {red_band} and {nir_band}")
 
-        # STEP 3: Read the red and near-infrared bands
-        # HINT: Use src.read(band_number) to read each band
-        # The result will be a 2D numpy array for each band
-
-        red_data = src.read(red_band).astype(np.float32)   # Convert to float for calculations
-        nir_data = src.read(nir_band).astype(np.float32)   # Convert to float for calculations
-
-        # STEP 4: Handle nodata values
-        # Get the nodata value from the raster
-        nodata_value = src.nodata
-        if nodata_value is not None:
-            # Create masks for valid data (not nodata)
-            red_valid = red_data != nodata_value
-            nir_valid = nir_data != nodata_value
-            valid_mask = red_valid & nir_valid  # Both bands must be valid
-        else:
-            valid_mask = np.ones_like(red_data, dtype=bool)  # All pixels are valid
-
-        # STEP 5: Calculate NDVI using the formula
-        # NDVI = (NIR - Red) / (NIR + Red)
-
-        # Initialize NDVI array with NaN (Not a Number) values
-        ndvi = np.full_like(red_data, np.nan, dtype=np.float32)
-
-        # Calculate the sum and difference for valid pixels
-        nir_plus_red = nir_data + red_data
-        nir_minus_red = nir_data - red_data
-
-        # Only calculate NDVI where:
-        # 1. Both bands have valid data
-        # 2. The denominator (NIR + Red) is not zero
-        calculation_mask = valid_mask & (nir_plus_red != 0)
-
-        # TODO: Calculate NDVI for valid pixels
-        # HINT: Use the mask to only calculate where it's safe
-        ndvi[calculation_mask] = nir_minus_red[calculation_mask] / nir_plus_red[calculation_mask]
-
-        # STEP 6: Calculate statistics for the NDVI values
-        # Get only the valid NDVI values (not NaN)
-        valid_ndvi = ndvi[~np.isnan(ndvi)]
-
-        if len(valid_ndvi) > 0:
-            min_ndvi = float(np.min(valid_ndvi))
-            max_ndvi = float(np.max(valid_ndvi))
-            mean_ndvi = float(np.mean(valid_ndvi))
-
-            # Count vegetation pixels (NDVI > 0.2 is often considered vegetation)
-            vegetation_pixels = int(np.sum(valid_ndvi > 0.2))
+        # STEP 3: Calculate NDVI = (NIR - Red) / (NIR + Red)
+        # The formula is written once, as NDVI in band_expressions.py. It
+        # also takes care of nodata pixels and of dividing by zero (both
+        # become NaN), and writes straight into the output array.
+        stats = RunningStats()   # min, max and mean, gathered block by block
+        vegetation_pixels = 0
+
+        if max_pixels is not None:
+            # Quick approximate mode: read both bands from an overview
+            bands_data, approximation = read_decimated(src, [red_band, nir_band], max_pixels)
+
+            # GDAL already knows which pixels are valid (from the nodata value,
+            # an alpha band or an internal mask). PackedMask keeps that with
+            # 1 bit per pixel instead of 1 byte (see packed_mask.py)
+            mask_shape = approximation['out_shape'] if approximation['method'] != 'full' else None
+            valid_mask = (PackedMask.from_dataset(src, red_band, out_shape=mask_shape)
+                          & PackedMask.from_dataset(src, nir_band, out_shape=mask_shape))
+
+            ndvi = NDVI.evaluate({'red': bands_data[0], 'nir': bands_data[1]})
+            valid_mask.fill_invalid(ndvi, np.nan)
+            vegetation_pixels += _add_ndvi_block(stats, ndvi)
+            if scaled:
+                ndvi = encode_index(ndvi)
+            total_pixels = valid_mask.count()          # popcount of the packed mask
+            nodata_pixels = valid_mask.count_false()
         else:
-            min_ndvi = None
-            max_ndvi = None
-            mean_ndvi = None
-            vegetation_pixels = 0
+            # STEP 4: Work through the raster one block at a time, so only the
+            # NDVI result is held in memory (not the red and NIR bands too)
+            approximation = None
+            ndvi = np.empty((src.height, src.width), dtype=np.int16 if scaled else np.float32)
+            sources = {'red': (raster_path, red_band), 'nir': (raster_path, nir_band)}
+
+            # STEP 5: Each block's NDVI is written into its place in `ndvi`
+            # (as int16 x 10000 when scaled); count the valid pixels and
+            # collect statistics from the real NDVI values as we go
+            total_pixels = 0
+            for window, block_ndvi, valid in iter_expression_windows(NDVI, sources,
+                                                                     out=None if scaled else ndvi):
+                total_pixels += valid.count()  # both bands valid (popcount)
+                vegetation_pixels += _add_ndvi_block(stats, block_ndvi)
+                if scaled:
+                    encode_index(block_ndvi, out=ndvi[window.toslices()])
+            nodata_pixels = ndvi.size - total_pixels
+
+        # STEP 6: Statistics for the NDVI values (None if nothing was valid)
+        min_ndvi = stats.min
+        max_ndvi = stats.max
+        mean_ndvi = stats.mean if stats.count > 0 else None
 
         # STEP 7: Create the result dictionary
         result = {
@@ -127,15 +149,21 @@ def calculate_ndvi(raster_path: str, red_band: int = 3, nir_band: int = 4) -> Di
             'max_ndvi': max_ndvi,
             'mean_ndvi': mean_ndvi,
             'vegetation_pixels': vegetation_pixels,
-            'total_pixels': int(np.sum(valid_mask)),
-            'nodata_pixels': int(np.sum(~valid_mask))
+            'total_pixels': total_pixels,
+            'nodata_pixels': nodata_pixels
         }
+        if approximation is not None:
+            result['approximation'] = approximation
+        if scaled:
+            result.update({'scale_factor': INDEX_SCALE, 'offset': INDEX_OFFSET,
+                           'nodata_value': INDEX_NODATA})
 
         # STEP 8: Return the results
         return result
 
 
-def analyze_vegetation(ndvi_array: np.ndarray) -> Dict[str, Any]:
+def analyze_vegetation(ndvi_array: np.ndarray, scale_factor: Optional[float] = None,
+                       nodata_value: Optional[int] = None) -> Dict[str, Any]:
     """
     Classify vegetation health based on NDVI values.
 
@@ -152,6 +180,11 @@ def analyze_vegetation(ndvi_array: np.ndarray) -> Dict[str, Any]:
 
     Args:
         ndvi_array (np.ndarray): 2D array of NDVI values from calculate_ndvi()
+        scale_factor (float, optional): NDVI per stored unit, for an int16
+            array from calculate_ndvi(..., scaled=True) - pass its
+            'scale_factor'. Without it the values are classified as they are.
+        nodata_value (int, optional): Stored nodata value (the result's
+            'nodata_value', -32768 for scaled NDVI)
 
     Returns:
         Dict[str, Any]: Dictionary containing classification results
@@ -167,20 +200,10 @@ def analyze_vegetation(ndvi_array: np.ndarray) -> Dict[str, Any]:
             'classification_array': numpy_array
         }
     """
-    # STEP 1: Get only valid NDVI values (not NaN)
-    valid_mask = ~np.isnan(ndvi_array)
-    valid_ndvi = ndvi_array[valid_mask]
-    total_valid = len(valid_ndvi)
-
-    # STEP 2: Create a classification array
-    # Start with all pixels as 0 (will represent non-vegetation)
-    classification = np.zeros_like(ndvi_array, dtype=np.int8)
-
-    # Set invalid pixels to -1 (for nodata/NaN)
-    classification[~valid_mask] = -1
-
-    # STEP 3: Classify pixels based on NDVI values
-    # TODO: Use boolean indexing to classify pixels into categories
+    # STEP 1: Classify every pixel and count the classes in one pass
+    # np.digitize() looks up each pixel's class from the class breaks
+    # [0, 0.2, 0.4, 0.7], and np.bincount() counts all classes at once
+    # (see classification.py). NaN pixels get the code -1.
 
     # Classification codes:
     # -1 = No data
@@ -189,76 +212,26 @@ def analyze_vegetation(ndvi_array: np.ndarray) -> Dict[str, Any]:
     #  2 = Sparse vegetation (0.2 <= NDVI < 0.4)
     #  3 = Moderate vegetation (0.4 <= NDVI < 0.7)
     #  4 = Dense vegetation (NDVI >= 0.7)
+    #
+    # Scaled arrays hold NDVI x 10000: the breaks are scaled to
+    # [0, 2000, 4000, 7000] instead of converting every pixel back
+    classification, counts = classify_array(ndvi_array, VEGETATION_CLASSES,
+                                            scale=1.0 if scale_factor is None else scale_factor,
+                                            nodata=nodata_value)
 
-    # Water/Clouds: NDVI < 0
-    classification[valid_mask & (ndvi_array < 0)] = 0
-
-    # Non-vegetation: 0 <= NDVI < 0.2
-    classification[valid_mask & (ndvi_array >= 0) & (ndvi_array < 0.2)] = 1
-
-    # Sparse vegetation: 0.2 <= NDVI < 0.4
-    classification[valid_mask & (ndvi_array >= 0.2) & (ndvi_array < 0.4)] = 2
-
-    # Moderate vegetation: 0.4 <= NDVI < 0.7
-    classification[valid_mask & (ndvi_array >= 0.4) & (ndvi_array < 0.7)] = 3
-
-    # Dense vegetation: NDVI >= 0.7
-    classification[valid_mask & (ndvi_array >= 0.7)] = 4
-
-    # STEP 4: Count pixels in each category
-    # TODO: Count how many pixels fall into each category
-    # HINT: Use np.sum() with boolean conditions
+    # STEP 2: Turn the counts into pixels and percentages for each class
+    results = class_summary(counts, VEGETATION_CLASSES)
+    results['classification_array'] = classification
 
-    water_clouds_count = int(np.sum(classification == 0))
-    non_vegetation_count = int(np.sum(classification == 1))
-    sparse_vegetation_count = int(np.sum(classification == 2))
-    moderate_vegetation_count = int(np.sum(classification == 3))
-    dense_vegetation_count = int(np.sum(classification == 4))
+    # STEP 3: Return the results
+    return results
 
-    # STEP 5: Calculate percentages
-    # TODO: Calculate what percentage of valid pixels each category represents
 
-    if total_valid > 0:
-        water_clouds_percent = (water_clouds_count / total_valid) * 100
-        non_vegetation_percent = (non_vegetation_count / total_valid) * 100
-        sparse_vegetation_percent = (sparse_vegetation_count / total_valid) * 100
-        moderate_vegetation_percent = (moderate_vegetation_count / total_valid) * 100
-        dense_vegetation_percent = (dense_vegetation_count / total_valid) * 100
-    else:
-        water_clouds_percent = 0
-        non_vegetation_percent = 0
-        sparse_vegetation_percent = 0
-        moderate_vegetation_percent = 0
-        dense_vegetation_percent = 0
-
-    # STEP 6: Create the results dictionary
-    results = {
-        'water_clouds': {
-            'pixels': water_clouds_count,
-            'percent': round(water_clouds_percent, 2)
-        },
-        'non_vegetation': {
-            'pixels': non_vegetation_count,
-            'percent': round(non_vegetation_percent, 2)
-        },
-        'sparse_vegetation': {
-            'pixels': sparse_vegetation_count,
-            'percent': round(sparse_vegetation_percent, 2)
-        },
-        'moderate_vegetation': {
-            'pixels': moderate_vegetation_count,
-            'percent': round(moderate_vegetation_percent, 2)
-        },
-        'dense_vegetation': {
-            'pixels': dense_vegetation_count,
-            'percent': round(dense_vegetation_percent, 2)
-        },
-        'total_valid_pixels': total_valid,
-        'classification_array': classification
-    }
-
-    # STEP 7: Return the results
-    return results
+def _add_ndvi_block(stats: RunningStats, block_ndvi: np.ndarray) -> int:
+    """Add one block of NDVI values to `stats` and return its vegetation pixel count."""
+    calculated = block_ndvi[~np.isnan(block_ndvi)]  # one block, not the whole raster
+    stats.add_values(calculated)
+    return int(np.count_nonzero(calculated > VEGETATION_THRESHOLD))
 
 
 # BONUS: Helper function to print vegetation analysis results nicely
@@ -0,0 +1,461 @@
+"""
+Batch Inventory - Summarize thousands of rasters in one run
+
+create_raster_summary() looks at one file at a time. When you need an
+inventory of a whole archive, calling it in a notebook loop is slow (one
+CPU core) and fragile (one bad file stops the loop, and a crash means
+starting over).
+
+This module runs create_raster_summary() for many files at once using a
+process pool. Every summary is written to the output file as soon as it
+finishes - one JSON object per line (JSON Lines), or a folder of small
+Parquet files. If the run is interrupted, running it again skips the files
+that were already summarized. Files that fail are written to the output
+with their error message instead of stopping the run.
+
+Use it from Python:
+
+    >>> result = run_raster_inventory(['data/raster/*.tif'], 'inventory.jsonl')
+    >>> result['succeeded'], result['failed']
+    (12, 0)
+
+or from the command line:
+
+    python -m src.rasterio_analysis.batch_inventory "data/raster/*.tif" -o inventory.jsonl --report
+
+Parquet output needs the optional pyarrow package (pip install pyarrow).
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+from .applications import create_raster_summary, print_raster_summary_report
+
+# File extensions picked up when a directory is given as input
+RASTER_EXTENSIONS = ('.tif', '.tiff', '.vrt', '.img', '.jp2')
+
+# Number of records in each Parquet part file (a crash loses at most this many)
+DEFAULT_PARQUET_BATCH_SIZE = 100
+
+
+def find_rasters(inputs: Iterable[str], recursive: bool = True) -> List[str]:
+    """
+    Turn a mix of files, directories, glob patterns and URLs into a file list.
+
+    Args:
+        inputs (Iterable[str]): Paths, directories, glob patterns (like
+            'data/*.tif'), URLs, or text files that start with '@' and
+            contain one path per line (like '@files.txt')
+        recursive (bool): Search directories (and '**' patterns) recursively
+
+    Returns:
+        List[str]: Unique raster paths (local files as absolute paths), in a
+            stable order
+    """
+    found = []
+    for item in inputs:
+        item = str(item).strip()
+        if not item or item.startswith('#'):
+            continue
+
+        if item.startswith('@'):
+            # A text file with one path per line
+            with open(item[1:]) as file_list:
+                found.extend(find_rasters(file_list.read().splitlines(), recursive))
+        elif '://' in item or item.startswith('/vsi'):
+            found.append(item)  # Remote or GDAL virtual path: use as-is
+        elif os.path.isdir(item):
+            pattern = '**/*' if recursive else '*'
+            found.extend(sorted(str(path) for path in Path(item).glob(pattern)
+                                if path.suffix.lower() in RASTER_EXTENSIONS))
+        elif glob.has_magic(item):
+            found.extend(sorted(glob.glob(item, recursive=recursive)))
+        else:
+            found.append(item)
+
+    unique = []
+    seen = set()
+    for path in found:
+        path = _normalize_path(path)
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+
+def _normalize_path(raster_path: str) -> str:
+    """Use absolute paths for local files so resuming works from any folder."""
+    if '://' in raster_path or raster_path.startswith('/vsi'):
+        return raster_path
+    return str(Path(raster_path).resolve())
+
+
+def _json_default(value: Any) -> Any:
+    """Convert numpy numbers (and anything else unusual) for json.dumps()."""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def summarize_raster_record(raster_path: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Summarize one raster and turn the result into an output record.
+
+    This never raises: any error is stored in the record instead.
+
+    Args:
+        raster_path (str): Path or URL of the raster
+        options (Dict[str, Any], optional): Keyword arguments for
+            create_raster_summary() (use_cache, approximate, max_pixels)
+
+    Returns:
+        Dict[str, Any]: The summary plus 'success' and 'elapsed_seconds'
+    """
+    start = time.perf_counter()
+    try:
+        record = create_raster_summary(raster_path, **(options or {}))
+    except Exception as e:
+        record = {
+            'raster_path': raster_path,
+            'error': str(e),
+            'success': False,
+            'message': f"Could not create raster summary: {e}"
+        }
+
+    record['raster_path'] = raster_path
+    record.setdefault('success', 'error' not in record)
+    record['elapsed_seconds'] = round(time.perf_counter() - start, 3)
+
+    # Round-trip through JSON so every writer sees plain Python values
+    return json.loads(json.dumps(record, default=_json_default))
+
+
+# ---------------------------------------------------------------------------
+# Output writers
+# ---------------------------------------------------------------------------
+
+def _output_format(output_path: str, output_format: Optional[str]) -> str:
+    if output_format is None:
+        output_format = 'parquet' if Path(output_path).suffix.lower() in ('.parquet', '.pq') else 'jsonl'
+    if output_format not in ('jsonl', 'parquet'):
+        raise ValueError(f"output_format must be 'jsonl' or 'parquet', got {output_format!r}")
+    return output_format
+
+
+def import_pyarrow():
+    """
+    Import the optional pyarrow package (with pyarrow.parquet) when it is needed.
+
+    Also used by stream_sampling.py for Arrow batches and Parquet files.
+
+    Returns:
+        module: The pyarrow module
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Arrow and Parquet data need the pyarrow package: pip install pyarrow") from None
+    return pyarrow
+
+
+def _parquet_schema(pa):
+    return pa.schema([
+        ('raster_path', pa.string()),
+        ('success', pa.bool_()),
+        ('error', pa.string()),
+        ('width', pa.int64()),
+        ('height', pa.int64()),
+        ('band_count', pa.int64()),
+        ('crs', pa.string()),
+        ('driver', pa.string()),
+        ('min', pa.float64()),
+        ('max', pa.float64()),
+        ('mean', pa.float64()),
+        ('std', pa.float64()),
+        ('nodata_count', pa.int64()),
+        ('mean_ndvi', pa.float64()),
+        ('vegetation_percentage', pa.float64()),
+        ('data_quality', pa.string()),
+        ('elapsed_seconds', pa.float64()),
+        ('summary_json', pa.string()),  # the complete record, for print_raster_summary_report()
+    ])
+
+
+def flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pick the most useful values of a record as flat table columns.
+
+    Returns:
+        Dict[str, Any]: One table row (the full record is kept in 'summary_json')
+    """
+    file_info = record.get('file_info', {})
+    statistics = record.get('statistics', {})
+    ndvi = record.get('ndvi_analysis', {})
+    return {
+        'raster_path': record['raster_path'],
+        'success': bool(record.get('success')),
+        'error': record.get('error'),
+        'width': file_info.get('width'),
+        'height': file_info.get('height'),
+        'band_count': file_info.get('count'),
+        'crs': file_info.get('crs'),
+        'driver': file_info.get('driver'),
+        'min': statistics.get('min'),
+        'max': statistics.get('max'),
+        'mean': statistics.get('mean'),
+        'std': statistics.get('std'),
+        'nodata_count': statistics.get('nodata_count'),
+        'mean_ndvi': ndvi.get('mean_ndvi'),
+        'vegetation_percentage': ndvi.get('vegetation_percentage'),
+        'data_quality': record.get('summary', {}).get('data_quality'),
+        'elapsed_seconds': record.get('elapsed_seconds'),
+        'summary_json': json.dumps(record)
+    }
+
+
+class JsonLinesWriter:
+    """Append one JSON record per line, flushed right away."""
+
+    def __init__(self, output_path: str):
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(output_path, 'a', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetPartWriter:
+    """
+    Write records to a folder of Parquet part files.
+
+    A Parquet file is only readable once it is closed, so records are
+    written in small parts (part-00000.parquet, part-00001.parquet, ...).
+    The folder can be read with pandas.read_parquet(output_path).
+    """
+
+    def __init__(self, output_path: str, batch_size: int = DEFAULT_PARQUET_BATCH_SIZE):
+        self._pa = import_pyarrow()
+        self.output_dir = Path(output_path)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self._schema = _parquet_schema(self._pa)
+        self._rows: List[Dict[str, Any]] = []
+        self._next_part = len(list(self.output_dir.glob('part-*.parquet')))
+
+    def write(self, record: Dict[str, Any]):
+        self._rows.append(flatten_record(record))
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pylist(self._rows, schema=self._schema)
+        part_path = self.output_dir / f"part-{self._next_part:05d}.parquet"
+        temp_path = part_path.with_suffix('.tmp')
+        self._pa.parquet.write_table(table, temp_path)
+        os.replace(temp_path, part_path)  # never leave a half-written part behind
+        self._next_part += 1
+        self._rows = []
+
+    def close(self):
+        self._flush()
+
+
+def read_inventory(output_path: str, output_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Read back the records of an inventory written by run_raster_inventory().
+
+    Lines that cannot be parsed (for example a line cut short by a crash)
+    are skipped.
+
+    Yields:
+        Dict[str, Any]: One summary record per file, in the order written
+    """
+    output_format = _output_format(output_path, output_format)
+    if not os.path.exists(output_path):
+        return
+
+    if output_format == 'jsonl':
+        with open(output_path, encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    else:
+        pa = import_pyarrow()
+        for part_path in sorted(Path(output_path).glob('part-*.parquet')):
+            table = pa.parquet.read_table(part_path, columns=['summary_json'])
+            for summary_json in table.column('summary_json').to_pylist():
+                yield json.loads(summary_json)
+
+
+def _completed_paths(output_path: str, output_format: str) -> Set[str]:
+    """Paths that already have a successful record in the output."""
+    return {record['raster_path'] for record in read_inventory(output_path, output_format)
+            if record.get('success')}
+
+
+# ---------------------------------------------------------------------------
+# Running a batch
+# ---------------------------------------------------------------------------
+
+def run_raster_inventory(inputs: Iterable[str], output_path: str, max_workers: Optional[int] = None,
+                         resume: bool = True, output_format: Optional[str] = None,
+                         use_cache: bool = False, approximate: bool = False,
+                         max_pixels: Optional[int] = None, report: bool = False) -> Dict[str, Any]:
+    """
+    Summarize many rasters in parallel and stream the results to a file.
+
+    Args:
+        inputs (Iterable[str]): Files, directories, glob patterns, URLs or
+            '@list.txt' files (see find_rasters())
+        output_path (str): A .jsonl file, or a .parquet folder
+        max_workers (int, optional): Number of processes (None = one per CPU core)
+        resume (bool): Skip files that already have a successful record in
+            the output (failed files are tried again)
+        output_format (str, optional): 'jsonl' or 'parquet' (default: from
+            the output_path extension)
+        use_cache, approximate, max_pixels: Passed to create_raster_summary()
+        report (bool): Print print_raster_summary_report() for every file in
+            the output at the end
+
+    Returns:
+        Dict[str, Any]: What happened during the run
+
+    Example return format:
+        {
+            'output_path': 'inventory.jsonl',
+            'total_files': 1200,
+            'skipped': 800,      # already in the output from an earlier run
+            'processed': 400,
+            'succeeded': 397,
+            'failed': 3,
+            'elapsed_seconds': 95.2
+        }
+    """
+    start = time.perf_counter()
+    output_format = _output_format(output_path, output_format)
+    raster_paths = find_rasters(inputs)
+
+    if not resume and os.path.exists(output_path):
+        raise FileExistsError(f"{output_path} already exists; remove it or use resume=True")
+
+    done = _completed_paths(output_path, output_format) if resume else set()
+    todo = [path for path in raster_paths if path not in done]
+
+    options = {'use_cache': use_cache, 'approximate': approximate, 'max_pixels': max_pixels}
+    writer = ParquetPartWriter(output_path) if output_format == 'parquet' else JsonLinesWriter(output_path)
+    succeeded = failed = 0
+
+    try:
+        if todo:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(summarize_raster_record, path, options): path for path in todo}
+                # Write each summary as soon as it is ready, in completion order
+                for future in as_completed(futures):
+                    try:
+                        record = future.result()
+                    except Exception as e:  # the worker process itself died
+                        record = {'raster_path': futures[future], 'error': str(e), 'success': False,
+                                  'message': f"Worker failed while summarizing: {e}"}
+                    writer.write(record)
+                    if record['success']:
+                        succeeded += 1
+                    else:
+                        failed += 1
+    finally:
+        writer.close()
+
+    result = {
+        'output_path': output_path,
+        'total_files': len(raster_paths),
+        'skipped': len(raster_paths) - len(todo),
+        'processed': succeeded + failed,
+        'succeeded': succeeded,
+        'failed': failed,
+        'elapsed_seconds': round(time.perf_counter() - start, 2)
+    }
+
+    if report:
+        print_inventory_report(output_path, output_format)
+        print(f"Processed {result['processed']} files ({result['succeeded']} succeeded, "
+              f"{result['failed']} failed), skipped {result['skipped']} already done")
+    return result
+
+
+def print_inventory_report(output_path: str, output_format: Optional[str] = None):
+    """Print the usual summary report for every file in an inventory."""
+    # A file that failed and was retried has several records: keep the newest
+    latest = {}
+    for record in read_inventory(output_path, output_format):
+        latest[record['raster_path']] = record
+
+    for record in latest.values():
+        if record.get('success'):
+            print_raster_summary_report(record)
+        else:
+            print(f"\nFAILED: {record['raster_path']}")
+            print(f"  Error: {record.get('error')}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point (see the module docstring for an example)."""
+    parser = argparse.ArgumentParser(
+        description="Summarize many rasters with create_raster_summary() in parallel."
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help="Raster files, directories, glob patterns, URLs or @file_list.txt")
+    parser.add_argument('-o', '--output', required=True,
+                        help="Output .jsonl file or .parquet folder")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default=None,
+                        help="Output format (default: from the output extension)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU core)")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Do not skip files already in the output")
+    parser.add_argument('--use-cache', action='store_true',
+                        help="Reuse statistics stored on disk by earlier runs")
+    parser.add_argument('--approximate', action='store_true',
+                        help="Estimate statistics from overviews (faster)")
+    parser.add_argument('--max-pixels', type=int, default=None,
+                        help="Pixel budget for approximate mode")
+    parser.add_argument('--report', action='store_true',
+                        help="Print a report for every file at the end")
+    args = parser.parse_args(argv)
+
+    result = run_raster_inventory(
+        args.inputs, args.output, max_workers=args.workers, resume=not args.no_resume,
+        output_format=args.format, use_cache=args.use_cache, approximate=args.approximate,
+        max_pixels=args.max_pixels, report=args.report
+    )
+    print(json.dumps(result, indent=2))
+    return 1 if result['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Block Statistics - Streaming statistics for rasters larger than memory
+
+The functions in raster_basics.py read a whole band with src.read() before
+calculating statistics. That is the easiest way to learn rasterio, but it
+fails on rasters that are bigger than the computer's memory (like large DEM
+mosaics).
+
+This module walks a raster one internal block at a time (src.block_windows())
+and combines the statistics of each block using the Welford/Chan merging
+formulas. Only one block is ever held in memory, and the results match the
+in-memory calculation to within floating point tolerance.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from .dataset_cache import open_raster
+from .io_stats import report_io
+from .quantile_sketch import QuantileSketch
+
+
+class RunningStats:
+    """
+    Mergeable accumulator for count, min, max, mean and variance.
+
+    Each block adds its own count, mean and sum of squared differences (M2).
+    Two accumulators can be merged with Chan's parallel formula, so blocks
+    can be processed in any order (or by different workers) and combined
+    at the end.
+
+    Example:
+        >>> stats = RunningStats()
+        >>> stats.add_values(np.array([1.0, 2.0, 3.0]))
+        >>> stats.add_values(np.array([4.0, 5.0]))
+        >>> stats.mean, stats.std
+        (3.0, 1.4142135623730951)
+    """
+
+    def __init__(self):
+        self.count = 0            # Number of valid pixels seen so far
+        self.nodata_count = 0     # Number of nodata pixels seen so far
+        self.mean = 0.0           # Running mean of valid pixels
+        self.m2 = 0.0             # Sum of squared differences from the mean
+        self.min = None
+        self.max = None
+
+    @classmethod
+    def from_moments(cls, count: int, mean: float, m2: float, min_value: float,
+                     max_value: float, nodata_count: int = 0) -> "RunningStats":
+        """Build an accumulator from already-calculated block statistics."""
+        stats = cls()
+        stats.nodata_count = int(nodata_count)
+        if count > 0:
+            stats.count, stats.mean, stats.m2 = int(count), float(mean), float(m2)
+            stats.min, stats.max = float(min_value), float(max_value)
+        return stats
+
+    def add_values(self, values: np.ndarray, nodata_count: int = 0):
+        """Add a 1D array of valid pixel values (plus any nodata pixels skipped)."""
+        self.nodata_count += int(nodata_count)
+        if values.size == 0:
+            return
+
+        # Statistics for this block alone (float64 avoids float32 round-off)
+        block = RunningStats()
+        block.count = int(values.size)
+        block.mean = float(np.mean(values, dtype=np.float64))
+        block.m2 = float(np.sum(np.square(values - block.mean, dtype=np.float64)))
+        block.min = float(np.min(values))
+        block.max = float(np.max(values))
+
+        self.merge(block)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Combine another accumulator into this one (Chan et al.)."""
+        self.nodata_count += other.nodata_count
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance (same as np.var with ddof=0)."""
+        return self.m2 / self.count if self.count > 0 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        """Population standard deviation (same as np.std with ddof=0)."""
+        return float(np.sqrt(self.variance)) if self.count > 0 else None
+
+    def to_dict(self, scale: float = 1.0, offset: float = 0.0) -> Dict[str, Any]:
+        """
+        Return the statistics in the same format as get_raster_stats().
+
+        Pass the band's scale and offset (see band_scaling()) to report
+        stored integers like NDVI x 10000 in real units.
+        """
+        has_data = self.count > 0
+        return apply_scaling({
+            'min': self.min if has_data else None,
+            'max': self.max if has_data else None,
+            'mean': self.mean if has_data else None,
+            'std': self.std,
+            'nodata_count': self.nodata_count
+        }, scale, offset)
+
+
+def band_scaling(src, band_number: int = 1) -> Tuple[float, float]:
+    """
+    The (scale, offset) that turn a band's stored values into real units.
+
+    GDAL keeps these in the file's metadata: real value = stored value *
+    scale + offset. Bands without them get (1.0, 0.0).
+    """
+    scale = src.scales[band_number - 1]
+    offset = src.offsets[band_number - 1]
+    return (1.0 if scale is None else float(scale)), (0.0 if offset is None else float(offset))
+
+
+def apply_scaling(stats: Dict[str, Any], scale: float = 1.0, offset: float = 0.0) -> Dict[str, Any]:
+    """
+    Convert min, max, mean and std from stored values to real units (in place).
+
+    Only the four numbers change, so the band itself never has to be
+    converted: mean and std scale linearly, and a negative scale swaps
+    min and max.
+    """
+    if (scale, offset) == (1.0, 0.0) or stats.get('mean') is None:
+        return stats
+    low = stats['min'] * scale + offset
+    high = stats['max'] * scale + offset
+    stats['min'], stats['max'] = min(low, high), max(low, high)
+    stats['mean'] = stats['mean'] * scale + offset
+    stats['std'] = stats['std'] * abs(scale)
+    return stats
+
+
+def valid_block_values(block: np.ndarray, nodata_value: Optional[float]) -> Tuple[np.ndarray, int]:
+    """
+    Split a block into its valid values and the number of nodata pixels.
+
+    Uses the same rule as get_raster_stats(): a pixel is nodata when it is
+    equal to the raster's nodata value.
+    """
+    if nodata_value is None:
+        return block.ravel(), 0
+
+    valid_mask = block != nodata_value
+    valid_values = block[valid_mask]
+    return valid_values, int(block.size - valid_values.size)
+
+
+def iter_band_blocks(src, band_number: int = 1) -> Iterator[Tuple[Window, np.ndarray]]:
+    """
+    Yield (window, data) for each internal block of one band.
+
+    Reading along the file's own block layout means every read decodes
+    exactly one tile (or strip) and nothing more.
+    """
+    for _, window in src.block_windows(band_number):
+        yield window, src.read(band_number, window=window)
+
+
+def accumulate_band_stats(src, band_number: int = 1,
+                          sketch: Optional[QuantileSketch] = None) -> RunningStats:
+    """
+    Calculate streaming statistics for one band of an open dataset.
+
+    Args:
+        src: An open rasterio dataset
+        band_number (int): Which band to analyze (1-based indexing)
+        sketch (QuantileSketch, optional): If given, every block's valid
+            values are also added to this sketch for approximate percentiles
+
+    Returns:
+        RunningStats: Accumulator holding the merged statistics of every block
+    """
+    if not 1 <= band_number <= src.count:
+        raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+
+    stats = RunningStats()
+    for _, block in iter_band_blocks(src, band_number):
+        values, nodata_count = valid_block_values(block, src.nodata)
+        stats.add_values(values, nodata_count)
+        if sketch is not None:
+            sketch.add_values(values)
+    return stats
+
+
+@report_io
+def stream_band_stats(raster_path: str, band_number: int = 1) -> Dict[str, Any]:
+    """
+    Calculate band statistics one block at a time.
+
+    Gives the same result as get_raster_stats() but never holds more than one
+    internal block of the raster in memory.
+
+    Args:
+        raster_path (str): Path to the raster file
+        band_number (int): Which band to analyze (1-based indexing)
+
+    Returns:
+        Dict[str, Any]: Dictionary containing statistics
+
+    Example return format:
+        {
+            'min': 0.0,
+            'max': 255.0,
+            'mean': 127.5,
+            'std': 73.9,
+            'nodata_count': 42
+        }
+    """
+    with open_raster(raster_path) as src:
+        return accumulate_band_stats(src, band_number).to_dict(*band_scaling(src, band_number))
+
+
+def multiband_block_moments(block: np.ndarray, nodata_values: Sequence[Optional[float]]) -> List[RunningStats]:
+    """
+    Calculate statistics for every band of a (bands, rows, cols) block at once.
+
+    All of the work is done with numpy along the band axis, so a 6-band
+    block costs a handful of array operations instead of six separate passes.
+    """
+    values = block.astype(np.float64)
+    valid = np.ones(values.shape, dtype=bool)
+    for band_index, nodata_value in enumerate(nodata_values):
+        if nodata_value is not None:
+            valid[band_index] = block[band_index] != nodata_value
+
+    pixel_axes = (1, 2)
+    counts = valid.sum(axis=pixel_axes)
+    sums = np.where(valid, values, 0.0).sum(axis=pixel_axes)
+    means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    m2s = np.where(valid, np.square(values - means[:, None, None]), 0.0).sum(axis=pixel_axes)
+    mins = np.where(valid, values, np.inf).min(axis=pixel_axes)
+    maxs = np.where(valid, values, -np.inf).max(axis=pixel_axes)
+    nodata_counts = valid[0].size - counts
+
+    return [
+        RunningStats.from_moments(counts[i], means[i], m2s[i], mins[i], maxs[i], nodata_counts[i])
+        for i in range(values.shape[0])
+    ]
+
+
+def accumulate_multiband_stats(src, bands: Optional[Sequence[int]] = None) -> Dict[int, RunningStats]:
+    """
+    Calculate streaming statistics for several bands in a single pass.
+
+    Each block window is read once for all requested bands with
+    src.read(bands, window=window), instead of once per band.
+
+    Args:
+        src: An open rasterio dataset
+        bands (Sequence[int], optional): Band numbers to analyze (None = all bands)
+
+    Returns:
+        Dict[int, RunningStats]: One accumulator per band number
+    """
+    bands = list(bands) if bands is not None else list(src.indexes)
+    for band_number in bands:
+        if not 1 <= band_number <= src.count:
+            raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+
+    nodata_values = [src.nodatavals[band_number - 1] for band_number in bands]
+    results = {band_number: RunningStats() for band_number in bands}
+
+    for _, window in src.block_windows(bands[0]):
+        block = src.read(bands, window=window)
+        for band_number, block_stats in zip(bands, multiband_block_moments(block, nodata_values), strict=True):
+            results[band_number].merge(block_stats)
+
+    return results
+
+
+def stream_multiband_stats(raster_path: str, bands: Optional[Sequence[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Calculate statistics for all (or selected) bands of a raster in one pass.
+
+    Opening and decoding a 6-band Landsat stack once is much faster than
+    calling get_raster_stats() six times.
+
+    Args:
+        raster_path (str): Path to the raster file
+        bands (Sequence[int], optional): Band numbers to analyze (None = all bands)
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Statistics for each band, keyed by band number
+
+    Example return format:
+        {
+            1: {'min': 0.0, 'max': 255.0, 'mean': 127.5, 'std': 73.9, 'nodata_count': 42},
+            2: {'min': 3.0, 'max': 250.0, 'mean': 101.2, 'std': 64.0, 'nodata_count': 42},
+            ...
+        }
+    """
+    with open_raster(raster_path) as src:
+        return {band_number: stats.to_dict(*band_scaling(src, band_number))
+                for band_number, stats in accumulate_multiband_stats(src, bands).items()}
@@ -0,0 +1,258 @@
+"""
+Classification - Sort pixel values into classes in a single pass
+
+analyze_vegetation() used to build five separate conditions like
+(ndvi >= 0.2) & (ndvi < 0.4), each creating temporary boolean arrays, and
+then count every class again with np.sum().
+
+A class scheme is really just a sorted list of class breaks. np.digitize()
+finds the class of every pixel in one go, and np.bincount() counts all
+classes at once. This module does both a strip of rows (or one raster
+block) at a time, so it also works for rasters that do not fit in memory.
+
+Scaled integer indices (like NDVI stored as int16 x 10000, see
+scaled_index.py) are classified without converting them: the class breaks
+are converted to stored values instead, and the nodata value gets class -1.
+Valid pixels are tracked with a PackedMask (1 bit per pixel, see
+packed_mask.py), and nodata pixels are counted from it with a popcount.
+
+Two schemes are built in:
+- VEGETATION_CLASSES: the 5 classes used by analyze_vegetation()
+- VEGETATION_INDEX_CLASSES: the 6 classes described for
+  analyze_vegetation_indices() in the rasterio-analysis assignment
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from contextlib import ExitStack
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from rasterio.enums import Resampling
+
+from .band_expressions import (
+    BandExpression,
+    Source,
+    iter_expression_windows,
+    open_aligned_output,
+    resolve_sources,
+)
+from .io_stats import report_io
+from .packed_mask import PackedMask
+from .scaled_index import stored_breaks
+
+# Class code for pixels that are nodata (or NaN)
+NODATA_CLASS = -1
+
+# Number of rows classified at once by classify_array()
+DEFAULT_STRIP_ROWS = 256
+
+
+class ClassScheme:
+    """
+    Named classes separated by sorted break values.
+
+    A value belongs to class i when breaks[i - 1] <= value < breaks[i], so
+    there is always one more class than there are breaks.
+
+    Args:
+        names (Sequence[str]): Class names, from lowest to highest values
+        breaks (Sequence[float]): Sorted class boundaries (len(names) - 1 of them)
+
+    Example:
+        >>> scheme = ClassScheme(['low', 'medium', 'high'], [0.0, 0.5])
+        >>> scheme.classify(np.array([-1.0, 0.2, 0.5, np.nan]))
+        array([ 0,  1,  2, -1], dtype=int8)
+    """
+
+    def __init__(self, names: Sequence[str], breaks: Sequence[float]):
+        if len(names) != len(breaks) + 1:
+            raise ValueError(f"A scheme with {len(breaks)} breaks needs {len(breaks) + 1} "
+                             f"class names, got {len(names)}")
+        if len(names) > 127:
+            raise ValueError("A scheme can have at most 127 classes")
+        if any(low >= high for low, high in zip(breaks, breaks[1:], strict=False)):
+            raise ValueError(f"Class breaks must be in increasing order, got {list(breaks)}")
+
+        self.names = list(names)
+        self.breaks = np.asarray(breaks, dtype=np.float64)
+
+    def classify(self, values: np.ndarray, out: Optional[np.ndarray] = None,
+                 scale: float = 1.0, offset: float = 0.0,
+                 nodata: Optional[float] = None,
+                 valid: Optional[PackedMask] = None) -> np.ndarray:
+        """
+        Class codes (0, 1, 2, ...) for one block of values; NODATA_CLASS for NaN.
+
+        For stored values (real value = value * scale + offset) the breaks
+        are converted instead of the values. Pixels equal to `nodata` also
+        get NODATA_CLASS. Pass `valid` (see valid_mask()) if you already
+        have the block's mask.
+        """
+        values = np.asarray(values)
+        if out is None:
+            out = np.empty(values.shape, dtype=np.int8)
+        breaks = self.breaks
+        if (scale, offset) != (1.0, 0.0):
+            breaks = stored_breaks(breaks, scale, offset)
+        if np.issubdtype(values.dtype, np.floating):
+            # Compare at the data's own precision, so a float32 0.7 counts as >= 0.7
+            breaks = breaks.astype(values.dtype)
+        np.copyto(out, np.digitize(values, breaks), casting='unsafe')
+        if valid is None:
+            valid = self.valid_mask(values, nodata)
+        # The mask is 2D, so 0D and 1D blocks are filled as a single row
+        valid.fill_invalid(out if out.ndim == 2 else out.reshape(valid.shape), NODATA_CLASS)
+        return out
+
+    @staticmethod
+    def valid_mask(values: np.ndarray, nodata: Optional[float] = None) -> PackedMask:
+        """Pixels of a block that are not NaN and not equal to `nodata`."""
+        return PackedMask.from_nodata(np.asarray(values), nodata)
+
+    def count(self, classification: np.ndarray) -> np.ndarray:
+        """Number of pixels in each class (nodata pixels are not counted)."""
+        # Shift by one so the nodata code (-1) lands in bin 0, then drop it
+        counts = np.bincount(classification.ravel().astype(np.intp) + 1,
+                             minlength=len(self.names) + 1)
+        return counts[1:]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"ClassScheme({self.names}, {self.breaks.tolist()})"
+
+
+# The 5 vegetation health classes used by analyze_vegetation()
+VEGETATION_CLASSES = ClassScheme(
+    ['water_clouds', 'non_vegetation', 'sparse_vegetation', 'moderate_vegetation', 'dense_vegetation'],
+    [0.0, 0.2, 0.4, 0.7]
+)
+
+# The 6 NDVI classes of analyze_vegetation_indices() (rasterio-analysis assignment)
+VEGETATION_INDEX_CLASSES = ClassScheme(
+    ['water', 'bare_soil', 'sparse_vegetation', 'moderate_vegetation', 'dense_vegetation',
+     'very_dense_vegetation'],
+    [0.0, 0.2, 0.4, 0.6, 0.8]
+)
+
+
+def _strips(shape: Tuple[int, ...], strip_rows: int) -> Iterator[Union[slice, Tuple]]:
+    """Row slices that cover an array (a 0D or 1D array is one strip)."""
+    if len(shape) < 2:
+        yield Ellipsis
+        return
+    for start in range(0, shape[0], strip_rows):
+        yield slice(start, start + strip_rows)
+
+
+def classify_array(values: np.ndarray, scheme: ClassScheme = VEGETATION_CLASSES,
+                   strip_rows: int = DEFAULT_STRIP_ROWS, scale: float = 1.0, offset: float = 0.0,
+                   nodata: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Classify an in-memory array and count the pixels in each class.
+
+    Both happen in the same pass, a strip of rows at a time, so the only
+    full-size array created is the int8 classification itself.
+
+    Args:
+        values (np.ndarray): Values to classify (NaN = nodata)
+        scheme (ClassScheme): Class names and breaks
+        strip_rows (int): Number of rows per strip
+        scale, offset, nodata: Describe stored values, like an int16 NDVI
+            array scaled by 10000 (scale=0.0001, nodata=-32768)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (int8 classification array with
+            NODATA_CLASS for NaN and nodata, pixel count per class)
+    """
+    values = np.asarray(values)
+    classification = np.empty(values.shape, dtype=np.int8)
+    counts = np.zeros(len(scheme), dtype=np.int64)
+
+    for rows in _strips(values.shape, strip_rows):
+        strip = scheme.classify(values[rows], out=classification[rows],
+                                scale=scale, offset=offset, nodata=nodata)
+        counts += scheme.count(strip)
+    return classification, counts
+
+
+def class_summary(counts: Sequence[int], scheme: ClassScheme) -> Dict[str, Any]:
+    """
+    Turn class counts into the dictionary format used by analyze_vegetation().
+
+    Example return format:
+        {
+            'water_clouds': {'pixels': 1200, 'percent': 6.0},
+            ...
+            'total_valid_pixels': 20000
+        }
+    """
+    counts = [int(count) for count in counts]
+    total_valid = sum(counts)
+
+    summary = {}
+    for name, count in zip(scheme.names, counts, strict=True):
+        percent = (count / total_valid) * 100 if total_valid > 0 else 0
+        summary[name] = {'pixels': count, 'percent': round(percent, 2)}
+    summary['total_valid_pixels'] = total_valid
+    return summary
+
+
+@report_io
+def classify_raster(raster_path: Union[str, Dict[str, Source]], scheme: ClassScheme = VEGETATION_CLASSES,
+                    band_number: int = 1, expression: Optional[Union[str, BandExpression]] = None,
+                    output_path: Optional[str] = None, block_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Classify a raster block by block, without loading it into memory.
+
+    Args:
+        raster_path (str or dict): Raster to classify, or the sources of an
+            expression (scaled bands such as int16 NDVI are classified in real units)
+        scheme (ClassScheme): Class names and breaks
+        band_number (int): Band to classify when no expression is given
+        expression (str or BandExpression, optional): Classify the result of a
+            formula instead of a band, e.g. "(b4 - b3) / (b4 + b3)" for NDVI
+        output_path (str, optional): Write the class codes to an int8
+            Cloud-Optimized GeoTIFF (nodata = -1, overviews keep the most
+            common class)
+        block_size (int, optional): Use square windows of this size instead
+            of the raster's own blocks
+
+    Returns:
+        Dict[str, Any]: Same format as class_summary(), plus 'nodata_pixels'
+            and 'output_path'
+    """
+    if expression is None:
+        expression = f"b{band_number}"
+    if not isinstance(expression, BandExpression):
+        expression = BandExpression(expression)
+
+    counts = np.zeros(len(scheme), dtype=np.int64)
+    nodata_pixels = 0
+    with ExitStack() as stack:
+        dst = None
+        if output_path is not None:
+            reference_path, _ = next(iter(resolve_sources(expression, raster_path).values()))
+            dst = stack.enter_context(open_aligned_output(output_path, reference_path,
+                                                          dtype='int8', nodata=NODATA_CLASS,
+                                                          overview_resampling=Resampling.mode))
+
+        for window, values, _ in iter_expression_windows(expression, raster_path, block_size):
+            # NaN marks nodata input and pixels the formula could not calculate
+            valid = scheme.valid_mask(values)
+            classification = scheme.classify(values, valid=valid)
+            counts += scheme.count(classification)
+            nodata_pixels += valid.count_false()          # popcount of the packed mask
+            if dst is not None:
+                dst.write(classification, 1, window=window)
+
+    summary = class_summary(counts, scheme)
+    summary['nodata_pixels'] = nodata_pixels
+    summary['output_path'] = output_path
+    return summary
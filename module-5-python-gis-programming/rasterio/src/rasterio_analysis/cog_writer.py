@@ -0,0 +1,319 @@
+"""
+COG Writer - Write results as Cloud-Optimized GeoTIFFs
+
+A plain GeoTIFF written with rasterio.open(path, 'w', compress='lzw') is
+stored in strips (whole rows) and has no overviews. Reading a 512 x 512
+window from it has to decompress every full-width strip the window
+crosses, and a zoomed-out map has to read every pixel of the file.
+
+A Cloud-Optimized GeoTIFF (COG) is still an ordinary GeoTIFF, but:
+- the pixels are stored in 512 x 512 tiles, so a window only decompresses
+  the tiles it touches
+- a predictor is applied before compressing (differences between
+  neighbouring pixels for integers, a byte reordering for floats), which
+  makes DEFLATE or ZSTD compress smooth data much better
+- it contains internal overviews (see overviews.py), stored before the
+  full-resolution pixels, with all headers at the start of the file
+
+This module writes COGs in two steps, so the full array never has to be
+in memory:
+1. The producer writes its windows one at a time into a tiled staging
+   GeoTIFF next to the output file (CogWriter behaves like the dataset
+   returned by rasterio.open(path, 'w')).
+2. When the writer is closed, GDAL's COG driver copies the staging file
+   into the final layout and builds the overviews, both block by block.
+   validate_cog() then checks the result.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.shutil import copy as copy_dataset
+from rasterio.windows import Window
+
+from .io_stats import io_phase, record_written, report_io
+
+# Tile size used by most COG producers (and what GDAL's COG driver uses by default)
+COG_BLOCK_SIZE = 512
+
+# Compression methods for COG outputs (ZSTD is faster, DEFLATE is readable everywhere)
+COG_COMPRESSIONS = ('deflate', 'zstd')
+
+# Profile keys that describe the file layout - CogWriter chooses these itself
+LAYOUT_KEYS = ('driver', 'tiled', 'blockxsize', 'blockysize', 'compress', 'predictor',
+               'interleave', 'zlevel', 'zstd_level', 'bigtiff', 'sparse_ok', 'photometric')
+
+
+def predictor_for_dtype(dtype: str) -> int:
+    """
+    TIFF predictor for a data type.
+
+    Returns:
+        int: 3 (floating point) for floats, 2 (horizontal differencing) for
+            integers, 1 (none) for anything else
+    """
+    kind = np.dtype(dtype).kind
+    if kind == 'f':
+        return 3
+    if kind in 'iu':
+        return 2
+    return 1
+
+
+def cog_creation_options(dtype: str, compress: str = 'deflate', block_size: int = COG_BLOCK_SIZE,
+                         overview_resampling: Resampling = Resampling.average,
+                         overviews: bool = True) -> Dict[str, Any]:
+    """
+    Creation options for GDAL's COG driver.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for rasterio.shutil.copy(..., driver='COG')
+    """
+    compress = compress.lower()
+    if compress not in COG_COMPRESSIONS:
+        raise ValueError(f"compress must be one of {COG_COMPRESSIONS}, got '{compress}'")
+
+    predictor = {1: 'NO', 2: 'STANDARD', 3: 'FLOATING_POINT'}[predictor_for_dtype(dtype)]
+    return {
+        'compress': compress.upper(),
+        'predictor': predictor,
+        'blocksize': block_size,
+        'overviews': 'AUTO' if overviews else 'NONE',
+        'overview_resampling': Resampling(overview_resampling).name.upper(),
+        'bigtiff': 'IF_SAFER'
+    }
+
+
+class CogWriter:
+    """
+    Write a Cloud-Optimized GeoTIFF window by window.
+
+    Use it like the dataset from rasterio.open(path, 'w', **profile):
+    write(), update_tags(), dtypes, scales = ..., descriptions = ... all
+    work, because everything is passed on to the staging dataset. The COG
+    is created when the `with` block ends without an error.
+
+    Example:
+        with CogWriter('slope.tif', profile) as dst:
+            for window in windows:
+                dst.write(calculate(window), 1, window=window)
+        print(dst.validation['is_cog'])
+    """
+
+    def __init__(self, output_path: str, profile: Dict[str, Any], compress: str = 'deflate',
+                 overview_resampling: Resampling = Resampling.average, overviews: bool = True,
+                 block_size: int = COG_BLOCK_SIZE):
+        """
+        Args:
+            output_path (str): Path of the COG to create
+            profile (Dict[str, Any]): Size, band count, dtype, crs, transform
+                and nodata (layout keys such as compress are replaced)
+            compress (str): 'deflate' or 'zstd'
+            overview_resampling (Resampling): How overviews are built (use
+                nearest or mode for classes, average for continuous values)
+            overviews (bool): Build internal overviews
+            block_size (int): Tile width and height
+        """
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        profile = {key: value for key, value in profile.items() if key not in LAYOUT_KEYS}
+        dtype = profile.get('dtype', 'float32')
+
+        self._output_path = str(output_path)
+        self._staging_path = f"{output_path}.staging.tif"
+        self._options = cog_creation_options(dtype, compress, block_size, overview_resampling, overviews)
+        self._validation = None
+        # The staging file only has to be quick to write: fast compression,
+        # and tiles that are never written are not stored at all
+        self._dataset = rasterio.open(
+            self._staging_path, 'w', driver='GTiff', tiled=True, blockxsize=block_size,
+            blockysize=block_size, compress='deflate', zlevel=1,
+            predictor=predictor_for_dtype(dtype), bigtiff='IF_SAFER', sparse_ok=True, **profile
+        )
+
+    @property
+    def output_path(self) -> str:
+        return self._output_path
+
+    @property
+    def validation(self) -> Optional[Dict[str, Any]]:
+        """validate_cog() report of the finished file (None until it is written)."""
+        return self._validation
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._dataset, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._dataset, name, value)
+
+    def write(self, *args, **kwargs):
+        """Write an array (or window) to the staging file, like dataset.write()."""
+        with io_phase('write'):
+            self._dataset.write(*args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def close(self) -> Dict[str, Any]:
+        """Finish the staging file, convert it into the COG and validate it."""
+        if self._validation is not None:
+            return self._validation
+        temp_path = f"{self._output_path}.tmp"
+        try:
+            with io_phase('write'):
+                self._dataset.close()
+                copy_dataset(self._staging_path, temp_path, driver='COG', **self._options)
+                os.replace(temp_path, self._output_path)
+            record_written(os.path.getsize(self._output_path))
+        finally:
+            self._discard()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._validation = validate_cog(self._output_path)
+        return self._validation
+
+    def _discard(self):
+        if not self._dataset.closed:
+            self._dataset.close()
+        if os.path.exists(self._staging_path):
+            os.remove(self._staging_path)
+
+
+@report_io
+def write_cog(output_path: str, blocks: Union[np.ndarray, Iterable[Tuple[Window, np.ndarray]]],
+              profile: Dict[str, Any], compress: str = 'deflate',
+              overview_resampling: Resampling = Resampling.average, overviews: bool = True,
+              block_size: int = COG_BLOCK_SIZE) -> Dict[str, Any]:
+    """
+    Write a Cloud-Optimized GeoTIFF from a stream of windows.
+
+    Args:
+        output_path (str): Path of the COG to create
+        blocks: Either a whole array ((rows, cols) or (bands, rows, cols)),
+            or an iterable of (window, array) pairs - for example a generator
+            that calculates one window at a time. Windows that are never
+            written are nodata.
+        profile (Dict[str, Any]): Size, band count, dtype, crs, transform
+            and nodata of the output (like src.profile)
+        compress (str): 'deflate' or 'zstd'
+        overview_resampling (Resampling): How overviews are built
+        overviews (bool): Build internal overviews
+        block_size (int): Tile width and height
+
+    Returns:
+        Dict[str, Any]: Summary with the validate_cog() report
+
+    Example return format:
+        {
+            'output_path': 'slope.tif',
+            'windows': 36,
+            'is_cog': True,
+            'validation': {...},        # see validate_cog()
+            'file_size_mb': 12.4
+        }
+    """
+    if isinstance(blocks, np.ndarray):
+        blocks = [(Window(0, 0, blocks.shape[-1], blocks.shape[-2]), blocks)]
+
+    window_count = 0
+    with CogWriter(output_path, profile, compress, overview_resampling, overviews, block_size) as dst:
+        for window, data in blocks:
+            if data.ndim == 2:
+                dst.write(data, 1, window=window)
+            else:
+                dst.write(data, window=window)
+            window_count += 1
+
+    return {
+        'output_path': str(output_path),
+        'windows': window_count,
+        'is_cog': dst.validation['is_cog'],
+        'validation': dst.validation,
+        'file_size_mb': round(os.path.getsize(output_path) / (1024 * 1024), 3)
+    }
+
+
+def validate_cog(raster_path: str) -> Dict[str, Any]:
+    """
+    Check that a GeoTIFF has the Cloud-Optimized layout.
+
+    Follows the checks of GDAL's validate_cloud_optimized_geotiff.py: the
+    file is tiled, larger files have overviews, the full-resolution header
+    comes first, and the overview pixels are stored before the
+    full-resolution pixels (smallest overview first).
+
+    Returns:
+        Dict[str, Any]: Report with 'is_cog', 'errors' and 'warnings'
+
+    Example return format:
+        {
+            'is_cog': True,
+            'errors': [],
+            'warnings': [],
+            'block_size': (512, 512),
+            'overviews': [2, 4, 8],
+            'compression': 'DEFLATE',
+            'predictor': '3'
+        }
+    """
+    errors, warnings = [], []
+    # Always the file on disk (a dataset cache could hold an older file with this name)
+    with rasterio.open(raster_path) as src:
+        structure = src.tags(ns='IMAGE_STRUCTURE')
+        block_height, block_width = src.block_shapes[0]
+        factors = src.overviews(1)
+        report = {
+            'block_size': (block_width, block_height),
+            'overviews': factors,
+            'compression': structure.get('COMPRESSION'),
+            'predictor': structure.get('PREDICTOR')
+        }
+        if src.driver != 'GTiff':
+            errors.append(f"Not a GeoTIFF (driver {src.driver})")
+        else:
+            if not src.profile.get('tiled') and max(src.width, src.height) > COG_BLOCK_SIZE:
+                errors.append("The file is larger than 512 pixels but is not tiled")
+            if not factors and max(src.width, src.height) > max(block_width, block_height):
+                warnings.append("The file is larger than one tile but has no overviews")
+            if structure.get('LAYOUT') != 'COG':
+                warnings.append("The file was not written by GDAL's COG driver (no LAYOUT=COG header)")
+            main_ifd = src.get_tag_item('IFD_OFFSET', 'TIFF', bidx=1)
+            main_data = src.get_tag_item('BLOCK_OFFSET_0_0', 'TIFF', bidx=1)
+
+    if errors or not factors:
+        return dict(report, is_cog=not errors, errors=errors, warnings=warnings)
+
+    # Headers from the start of the file, then the data from the smallest overview up
+    ifd_offsets, data_offsets = [main_ifd], [main_data]
+    for level in range(len(factors)):
+        with rasterio.open(raster_path, overview_level=level) as overview:
+            ifd_offsets.append(overview.get_tag_item('IFD_OFFSET', 'TIFF', bidx=1))
+            data_offsets.append(overview.get_tag_item('BLOCK_OFFSET_0_0', 'TIFF', bidx=1))
+    ifd_offsets = [int(offset) for offset in ifd_offsets if offset]
+    data_offsets = [int(offset) for offset in data_offsets if offset]
+
+    if ifd_offsets != sorted(ifd_offsets):
+        errors.append("The overview headers (IFDs) are not after the full-resolution header")
+    if data_offsets != sorted(data_offsets, reverse=True):
+        errors.append("The overview pixels are not stored before the full-resolution pixels")
+    return dict(report, is_cog=not errors, errors=errors, warnings=warnings)
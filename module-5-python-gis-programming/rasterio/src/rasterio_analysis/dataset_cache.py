@@ -0,0 +1,264 @@
+"""
+Dataset Cache - Reuse open rasterio datasets instead of reopening them
+
+create_raster_summary() calls read_raster_info(), get_raster_extent(),
+calculate_ndvi() and more, and each of those used to call rasterio.open()
+on the same file again. For a remote Cloud-Optimized GeoTIFF every open
+means new HTTP requests for the file header.
+
+Functions in this package open rasters with open_raster() instead of
+rasterio.open(). Normally that behaves exactly like rasterio.open(). Inside
+a `with use_dataset_cache():` block, open datasets are kept in a small
+least-recently-used (LRU) cache and handed back to the next caller, so a
+whole summary opens each file once.
+
+Each thread gets its own dataset handle (GDAL datasets must not be shared
+between threads), and local files are reopened automatically if their
+modification time changes. The active cache is stored in a ContextVar, so
+a cache block in one thread never changes what another thread uses; code
+that hands work to other threads should run it in a copy of its context
+with contextvars.copy_context().
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import os
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import rasterio
+
+from .io_stats import (
+    TrackedDataset,
+    io_phase,
+    opener_range_cache,
+    record_open,
+    tracking_io,
+)
+
+
+def _file_fingerprint(raster_path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime, size) for a local file, or None for URLs and virtual paths."""
+    try:
+        stat = os.stat(raster_path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _freeze(value: Any) -> Any:
+    """Turn dicts, lists and sets (in open options) into hashable tuples."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+class DatasetCache:
+    """
+    Thread-safe LRU cache of open rasterio datasets.
+
+    Datasets are keyed by (path, open options, thread). When the cache is
+    full, the least recently used dataset that nobody is currently using
+    is closed.
+
+    Args:
+        max_size (int): Maximum number of datasets to keep open
+    """
+
+    def __init__(self, max_size: int = 16):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._orphans: Dict[int, Dict[str, Any]] = {}  # dropped while still in use
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(raster_path: str, options: Dict[str, Any]) -> Optional[tuple]:
+        """Cache key, or None if an option value can't be used in a key."""
+        key = (str(raster_path), _freeze(options), threading.get_ident())
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def acquire(self, raster_path: str, **options):
+        """Get an open dataset for this thread, opening it if needed."""
+        key = self._make_key(raster_path, options)
+        fingerprint = _file_fingerprint(str(raster_path))
+
+        with self._lock:
+            if key is None:
+                # Not cacheable: open it anyway, release() closes it again
+                self.misses += 1
+                dataset = rasterio.open(raster_path, **options)
+                self._orphans[id(dataset)] = {'dataset': dataset, 'in_use': 1}
+                return dataset
+
+            entry = self._entries.get(key)
+            if entry is not None and entry['fingerprint'] != fingerprint:
+                # The file changed on disk since we opened it
+                self._close_entry(key)
+                entry = None
+
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self.misses += 1
+                entry = {
+                    'dataset': rasterio.open(raster_path, **options),
+                    'fingerprint': fingerprint,
+                    'in_use': 0
+                }
+                self._entries[key] = entry
+                self._evict()
+
+            entry['in_use'] += 1
+            return entry['dataset']
+
+    def release(self, dataset):
+        """Tell the cache that a caller has finished with a dataset."""
+        with self._lock:
+            orphan = self._orphans.get(id(dataset))
+            if orphan is not None:
+                # Evicted or invalidated while it was being used: close it now
+                orphan['in_use'] -= 1
+                if orphan['in_use'] <= 0:
+                    del self._orphans[id(dataset)]
+                    dataset.close()
+                return
+
+            for entry in self._entries.values():
+                if entry['dataset'] is dataset:
+                    entry['in_use'] = max(entry['in_use'] - 1, 0)
+                    break
+            self._evict()
+
+    def _evict(self):
+        """Close least recently used datasets until the cache fits in max_size."""
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_size:
+                break
+            if self._entries[key]['in_use'] == 0:
+                self._close_entry(key)
+
+    def _close_entry(self, key: tuple):
+        entry = self._entries.pop(key)
+        if entry['in_use'] == 0:
+            entry['dataset'].close()
+        else:
+            # Still being used - release() closes it when the caller is done
+            self._orphans[id(entry['dataset'])] = entry
+
+    def invalidate(self, raster_path: Optional[str] = None):
+        """Close cached datasets for one path (or every path if None)."""
+        with self._lock:
+            for key in list(self._entries):
+                if raster_path is None or key[0] == str(raster_path):
+                    self._close_entry(key)
+
+    def clear(self):
+        """Close every cached dataset."""
+        self.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# The cache currently in use (None means "no caching, behave like rasterio.open")
+_active_cache: ContextVar[Optional[DatasetCache]] = ContextVar('active_dataset_cache', default=None)
+
+
+@contextmanager
+def use_dataset_cache(cache: Optional[DatasetCache] = None, max_size: int = 16) -> Iterator[DatasetCache]:
+    """
+    Reuse open datasets for every open_raster() call inside the `with` block.
+
+    If a cache is already active it is reused, so nested blocks share one
+    cache. A cache created by this block is cleared (all datasets closed)
+    at the end; a cache you pass in is left open for you to reuse. The
+    block only affects the current thread (and contexts copied from it).
+
+    Example:
+        >>> with use_dataset_cache() as cache:
+        ...     info = read_raster_info('landsat.tif')
+        ...     stats = get_raster_stats('landsat.tif')   # no second open
+        >>> cache.misses
+        1
+    """
+    previous = _active_cache.get()
+    created = cache is None and previous is None
+    if cache is None:
+        cache = previous if previous is not None else DatasetCache(max_size)
+    token = _active_cache.set(cache)
+
+    try:
+        yield cache
+    finally:
+        _active_cache.reset(token)
+        if created:
+            cache.clear()
+
+
+@contextmanager
+def open_raster(raster_path: str, **options):
+    """
+    Open a raster like rasterio.open(), reusing a cached dataset when possible.
+
+    Use it exactly like rasterio.open() in a `with` statement:
+
+        with open_raster(raster_path) as src:
+            data = src.read(1)
+
+    Inside a track_io() block (see io_stats.py) the reads are counted, and
+    the dataset comes wrapped in an io_stats.TrackedDataset.
+
+    Args:
+        raster_path (str): Path or URL of the raster
+        **options: Extra keyword arguments passed to rasterio.open()
+    """
+    if not tracking_io():
+        with _open_dataset(raster_path, **options) as src:
+            yield src
+        return
+
+    range_cache = opener_range_cache(options)
+    cache = _active_cache.get()
+    hits = cache.hits if cache is not None else 0
+    with ExitStack() as stack:
+        with io_phase('open', range_cache):
+            src = stack.enter_context(_open_dataset(raster_path, **options))
+        record_open(cache_hit=cache is not None and cache.hits > hits)
+        yield TrackedDataset(src, raster_path, options)
+
+
+@contextmanager
+def _open_dataset(raster_path: str, **options):
+    """open_raster() without I/O tracking."""
+    cache = _active_cache.get()
+    if cache is None:
+        with rasterio.open(raster_path, **options) as src:
+            yield src
+        return
+
+    dataset = cache.acquire(raster_path, **options)
+    try:
+        yield dataset
+    finally:
+        cache.release(dataset)
@@ -0,0 +1,164 @@
+"""
+Interpolation - Nearest, bilinear and cubic sampling for many points at once
+
+A point rarely falls exactly on a pixel centre. 'nearest' simply takes the
+pixel the point is in. 'bilinear' blends the 2 x 2 pixels around the point
+and 'cubic' blends the 4 x 4 pixels around it, which gives smoother values
+for continuous data like elevation or temperature.
+
+Doing that arithmetic point by point in Python is slow. The kernel in this
+module takes arrays of fractional row and column positions, gathers the
+2 x 2 or 4 x 4 neighbourhoods of all points with one fancy-indexing step,
+and blends them with numpy. Every band is handled in the same step by
+broadcasting along the band axis.
+
+Pixel positions are continuous: pixel (row, col) covers row ... row + 1
+and its centre is at row + 0.5. This is what the inverse geotransform
+gives before rounding down (see points_to_pixels() in point_sampling.py).
+
+Edges and nodata:
+- Neighbours outside the array are replaced by the nearest edge pixel
+- Bilinear: nodata (or NaN) neighbours are left out and the remaining
+  weights are rescaled; a point whose neighbours are all nodata gets NaN
+- Cubic: a point with any nodata neighbour falls back to bilinear
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Supported methods and how many extra pixels each needs around a point's pixel
+INTERPOLATION_METHODS = ('nearest', 'bilinear', 'cubic')
+KERNEL_MARGIN = {'nearest': 0, 'bilinear': 1, 'cubic': 2}
+
+# Points handled at once (a cubic chunk of 65536 points is 8 MB per band)
+DEFAULT_CHUNK_POINTS = 65536
+
+NodataValues = Optional[Union[float, Sequence[Optional[float]]]]
+
+
+def check_method(method: str) -> str:
+    """Make sure an interpolation method is one of INTERPOLATION_METHODS."""
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation '{method}' (use one of {', '.join(INTERPOLATION_METHODS)})")
+    return method
+
+
+def _cubic_weights(t: np.ndarray) -> np.ndarray:
+    """Catmull-Rom weights of the 4 neighbours at offsets -1, 0, 1, 2 (they sum to 1)."""
+    t2, t3 = t * t, t * t * t
+    return 0.5 * np.stack([
+        -t3 + 2 * t2 - t,
+        3 * t3 - 5 * t2 + 2,
+        -3 * t3 + 4 * t2 + t,
+        t3 - t2
+    ], axis=-1)
+
+
+def _neighbours(positions: np.ndarray, size: int, taps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices of the neighbouring pixels along one axis, and the fraction
+    of the way from the first centre to the second.
+    """
+    centred = positions - 0.5                     # 0.0 = centre of pixel 0
+    first = np.floor(centred)
+    fraction = centred - first
+    offsets = np.arange(taps) - (taps // 2 - 1)   # [0, 1] or [-1, 0, 1, 2]
+    indices = first.astype(np.int64)[:, None] + offsets
+    return np.clip(indices, 0, size - 1), fraction
+
+
+def _valid_values(values: np.ndarray, nodata: Sequence[Optional[float]]) -> np.ndarray:
+    """True where a gathered (bands, points, ...) value is not nodata or NaN."""
+    valid = ~np.isnan(values)
+    for band_index, nodata_value in enumerate(nodata):
+        if nodata_value is not None and not np.isnan(nodata_value):
+            valid[band_index] &= values[band_index] != nodata_value
+    return valid
+
+
+def _blend(values: np.ndarray, weights: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Weighted sum over the neighbourhood axes, leaving out invalid neighbours."""
+    weights = np.where(valid, weights, 0.0)
+    total = weights.sum(axis=(-2, -1))
+    blended = np.where(valid, values, 0.0) * weights
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, blended.sum(axis=(-2, -1)) / total, np.nan)
+
+
+def _interpolate_chunk(data: np.ndarray, rows: np.ndarray, cols: np.ndarray, method: str,
+                       nodata: Sequence[Optional[float]]) -> np.ndarray:
+    """Interpolate one chunk of points; returns a (bands, points) array."""
+    height, width = data.shape[1:]
+
+    if method == 'nearest':
+        row_index = np.clip(np.floor(rows).astype(np.int64), 0, height - 1)
+        col_index = np.clip(np.floor(cols).astype(np.int64), 0, width - 1)
+        values = data[:, row_index, col_index].astype(np.float64)
+        return np.where(_valid_values(values, nodata), values, np.nan)
+
+    # Bilinear: 2 x 2 neighbourhood of every point, gathered in one step
+    row_index, row_fraction = _neighbours(rows, height, 2)
+    col_index, col_fraction = _neighbours(cols, width, 2)
+    row_weights = np.stack([1 - row_fraction, row_fraction], axis=-1)
+    col_weights = np.stack([1 - col_fraction, col_fraction], axis=-1)
+    values = data[:, row_index[:, :, None], col_index[:, None, :]].astype(np.float64)
+    weights = row_weights[:, :, None] * col_weights[:, None, :]      # (points, 2, 2)
+    result = _blend(values, weights, _valid_values(values, nodata))
+    if method == 'bilinear':
+        return result
+
+    # Cubic: 4 x 4 neighbourhood; points with a nodata neighbour keep the bilinear value
+    row_index, row_fraction = _neighbours(rows, height, 4)
+    col_index, col_fraction = _neighbours(cols, width, 4)
+    values = data[:, row_index[:, :, None], col_index[:, None, :]].astype(np.float64)
+    weights = _cubic_weights(row_fraction)[:, :, None] * _cubic_weights(col_fraction)[:, None, :]
+    valid = _valid_values(values, nodata)
+    complete = valid.all(axis=(-2, -1))
+    cubic = (np.where(valid, values, 0.0) * weights).sum(axis=(-2, -1))
+    return np.where(complete, cubic, result)
+
+
+def interpolate(data: np.ndarray, rows: np.ndarray, cols: np.ndarray, method: str = 'bilinear',
+                nodata: NodataValues = None, chunk_points: int = DEFAULT_CHUNK_POINTS) -> np.ndarray:
+    """
+    Interpolate an array at many fractional pixel positions at once.
+
+    Args:
+        data (np.ndarray): (rows, cols) array, or (bands, rows, cols) for several bands
+        rows, cols (np.ndarray): Continuous pixel positions (pixel centres at .5)
+        method (str): 'nearest', 'bilinear' or 'cubic'
+        nodata: Nodata value, or one per band (NaN is always nodata)
+        chunk_points (int): Points handled at once, to keep memory bounded
+
+    Returns:
+        np.ndarray: float64 values, shape (points,) for a 2D array or
+            (points, bands) for a 3D array; NaN where nothing could be calculated
+
+    Example:
+        >>> data = np.array([[0.0, 10.0], [20.0, 30.0]])
+        >>> interpolate(data, np.array([1.0]), np.array([1.0]))   # between all four centres
+        array([15.])
+    """
+    check_method(method)
+    single_band = data.ndim == 2
+    data = data[np.newaxis] if single_band else data
+    if nodata is None or np.isscalar(nodata):
+        nodata = [nodata] * data.shape[0]
+    if len(nodata) != data.shape[0]:
+        raise ValueError(f"Got {len(nodata)} nodata values for {data.shape[0]} bands")
+
+    rows = np.asarray(rows, dtype=np.float64).ravel()
+    cols = np.asarray(cols, dtype=np.float64).ravel()
+    result = np.empty((rows.size, data.shape[0]), dtype=np.float64)
+    for start in range(0, rows.size, chunk_points):
+        chunk = slice(start, start + chunk_points)
+        result[chunk] = _interpolate_chunk(data, rows[chunk], cols[chunk], method, nodata).T
+
+    return result[:, 0] if single_band else result
@@ -0,0 +1,410 @@
+"""
+I/O Statistics - See where the time and the bytes of a raster job go
+
+"Reading that COG took 40 seconds" does not say whether the time went into
+opening the file (header requests), downloading tiles, decompressing them,
+numpy, or writing the output. This module measures it.
+
+Inside a `with track_io() as io:` block, every raster opened by this
+package (through open_raster()) is counted:
+- bytes_read: bytes of the raster downloaded (remote), or the stored size
+  of every block read from a local file
+- requests: HTTP requests for remote rasters read through a RangeCache,
+  block reads for local files
+- blocks_decoded: different blocks (tiles or strips) each opened dataset
+  read - GDAL decompresses each one once while it stays in its cache.
+  A read with out_shape counts the blocks of the overview GDAL takes it
+  from (see overviews.py)
+- cache_hits: datasets handed back by the dataset cache, and byte ranges
+  that did not have to be downloaded again (range cache)
+- seconds per phase: 'open', 'read', 'write' (COG outputs), and
+  'compute' for everything else
+
+The requests and downloaded bytes of a remote raster are counted when it
+is opened through a RangeCache (opener=..., see range_cache.py), like
+read_remote_raster(range_cache=...) does. Tracking never changes how a
+file is read, so a URL opened without one is read by GDAL as usual: only
+its blocks and their stored size are counted, not its requests. Local
+files are counted by the dataset wrapper itself: every block a read
+touches for the first time adds its size in the file (GDAL reports it for
+GeoTIFFs; other formats count the uncompressed block). Header reads while
+opening a file are not counted, and neither is anything else the thread
+reads (the statistics cache, imports, ...).
+
+The result dictionaries of the package's functions (read_raster_info(),
+calculate_ndvi(), read_remote_raster(), ...) also get an 'io_stats' entry
+for their own call when they run inside a track_io() block.
+
+A track_io() block only counts work done in its own thread (the active
+trackers are kept in a ContextVar). Worker threads are counted when they
+run in a copy of the caller's context, like tile_scheduler.py's tasks.
+
+Example:
+    >>> with track_io() as io:
+    ...     summary = create_raster_summary('landsat.tif')
+    >>> io.to_dict()['bytes_read']
+    1843200
+    >>> summary['io_stats']['phases']['read']['blocks_decoded']
+    16
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+from .range_cache import RangeCache, _is_url
+
+# The phases time is split into ('compute' is whatever is left over)
+PHASES = ('open', 'read', 'compute', 'write')
+
+# Counters kept for every phase
+COUNTERS = ('bytes_read', 'requests', 'blocks_decoded', 'cache_hits')
+
+
+class IOStats:
+    """
+    Counters and timers for one track_io() block.
+
+    Counts from several threads (like tile_scheduler.py's workers) are
+    added together, so the phase seconds can add up to more than the wall
+    time; 'compute' is then 0.
+    """
+
+    def __init__(self, label: Optional[str] = None):
+        self.label = label
+        self.opens = 0
+        self.bytes_written = 0
+        self.phases = {phase: dict.fromkeys(('seconds',) + COUNTERS, 0) for phase in PHASES}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._stop = None
+
+    def add(self, phase: str, **counts):
+        """Add seconds or counts (bytes_read=..., requests=..., ...) to a phase."""
+        with self._lock:
+            for key, value in counts.items():
+                self.phases[phase][key] += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Totals and per-phase numbers.
+
+        Example return format:
+            {
+                'label': 'read_remote_raster',
+                'wall_seconds': 1.52,
+                'opens': 1,
+                'bytes_read': 2490368, 'requests': 5,
+                'blocks_decoded': 9, 'cache_hits': 12,
+                'bytes_written': 0,
+                'phases': {
+                    'open': {'seconds': 0.31, 'bytes_read': 65536, 'requests': 1, ...},
+                    'read': {'seconds': 1.12, 'bytes_read': 2424832, 'requests': 4, ...},
+                    'compute': {'seconds': 0.09, ...},
+                    'write': {'seconds': 0.0, ...}
+                }
+            }
+        """
+        with self._lock:
+            wall = (self._stop if self._stop is not None else time.perf_counter()) - self._start
+            phases = {phase: dict(values) for phase, values in self.phases.items()}
+        measured = sum(phases[phase]['seconds'] for phase in PHASES if phase != 'compute')
+        phases['compute']['seconds'] += max(wall - measured, 0.0)
+        for values in phases.values():
+            values['seconds'] = round(values['seconds'], 4)
+
+        result = {'label': self.label, 'wall_seconds': round(wall, 4), 'opens': self.opens}
+        for key in COUNTERS:
+            result[key] = sum(values[key] for values in phases.values())
+        result['bytes_written'] = self.bytes_written
+        result['phases'] = phases
+        return result
+
+
+# Every track_io() block open in this context (nested blocks all count)
+_active_stats: ContextVar[Tuple[IOStats, ...]] = ContextVar('active_io_stats', default=())
+
+# True while a report_io function runs, so the functions it calls don't report
+_reporting: ContextVar[bool] = ContextVar('reporting_io', default=False)
+
+
+def tracking_io() -> bool:
+    """True inside a track_io() block."""
+    return bool(_active_stats.get())
+
+
+@contextmanager
+def track_io(label: Optional[str] = None) -> Iterator[IOStats]:
+    """
+    Count the I/O of every raster opened by this package inside the block.
+
+    Blocks can be nested; every open block gets the counts. Only this
+    thread (and contexts copied from it) is counted.
+
+    Args:
+        label (str, optional): Name shown in the statistics
+
+    Returns:
+        IOStats: Use .to_dict() (during or after the block) for the numbers
+    """
+    stats = IOStats(label)
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+        stats._stop = time.perf_counter()
+
+
+def _record(phase: str, **counts):
+    """Add counts to every active IOStats."""
+    for stats in _active_stats.get():
+        stats.add(phase, **counts)
+
+
+def _range_counters(range_cache: Optional[RangeCache]) -> Tuple[int, int, int]:
+    if range_cache is None:
+        return 0, 0, 0
+    return range_cache.requests, range_cache.bytes_downloaded, range_cache.hits
+
+
+@contextmanager
+def io_phase(phase: str, range_cache: Optional[RangeCache] = None):
+    """
+    Time a block of code as one phase ('open', 'read' or 'write').
+
+    For a remote file, pass its RangeCache: its requests, downloaded bytes
+    and cache hits during the block are counted. Local reads are counted
+    by TrackedDataset instead.
+    """
+    if not tracking_io():
+        yield
+        return
+
+    requests, downloaded, hits = _range_counters(range_cache)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        after = _range_counters(range_cache)
+        _record(phase, seconds=seconds, bytes_read=after[1] - downloaded,
+                requests=after[0] - requests, cache_hits=after[2] - hits)
+
+
+def opener_range_cache(options: Dict[str, Any]) -> Optional[RangeCache]:
+    """
+    The RangeCache a raster is opened through (the opener= option), if any.
+
+    A RangeCache counts its own requests and downloaded bytes; other
+    openers, and remote URLs opened without one, cannot be counted.
+    """
+    opener = options.get('opener')
+    return opener if isinstance(opener, RangeCache) else None
+
+
+class TrackedDataset:
+    """
+    An open dataset whose reads are timed and counted.
+
+    Everything else (profile, transform, block_windows(), ...) is passed on
+    to the real dataset, which is available as .dataset.
+
+    A read with out_shape that GDAL serves from an overview is counted as
+    the blocks of that overview, not of the full-resolution image.
+
+    Args:
+        dataset: The open rasterio dataset
+        raster_path (str): Path or URL it was opened from
+        options (Dict[str, Any], optional): The options it was opened with
+            (a RangeCache opener counts the requests of a remote raster)
+    """
+
+    def __init__(self, dataset, raster_path: str, options: Optional[Dict[str, Any]] = None):
+        self.dataset = dataset
+        self._raster_path = raster_path
+        self._options = dict(options or {})
+        self._remote = _is_url(raster_path)
+        self._range_cache = opener_range_cache(self._options)
+        self._blocks = set()
+        self._overview_block_shapes = {}
+
+    def __getattr__(self, name):
+        return getattr(self.dataset, name)
+
+    def _overview_level(self, band_number: int, window: Window, out_shape,
+                        resampling) -> Optional[int]:
+        """
+        The overview GDAL reads a window resampled to out_shape from (None: full resolution).
+
+        Like GDAL, this takes the most reduced overview that is not more
+        reduced than the read (by up to 1.2 times for nearest neighbour).
+        """
+        src = self.dataset
+        out_height, out_width = out_shape[-2:]
+        if 'overview_level' in self._options or (out_width >= window.width and out_height >= window.height):
+            return None
+        # GDAL goes by the less reduced of the two axes
+        x_factor, y_factor = window.width / out_width, window.height / out_height
+        wanted = x_factor if x_factor < y_factor or out_height == 1 else y_factor
+        threshold = 1.2 if resampling in (None, Resampling.nearest) else 1.01
+
+        best_level, best_factor = None, 0.0
+        for level, factor in enumerate(src.overviews(band_number)):
+            width, height = math.ceil(src.width / factor), math.ceil(src.height / factor)
+            factor = min(src.width / width, src.height / height)
+            if factor >= wanted * threshold + 0.1 or factor <= best_factor:
+                continue
+            best_level, best_factor = level, factor
+            if abs(wanted - factor) < 0.1:
+                break
+        return best_level
+
+    def _level_shape(self, band_number: int, level: Optional[int]) -> Tuple[int, int, int, int]:
+        """(height, width, block height, block width) of the full image or an overview."""
+        src = self.dataset
+        if level is None:
+            return (src.height, src.width) + tuple(src.block_shapes[band_number - 1])
+        if level not in self._overview_block_shapes:
+            # Overviews can be tiled differently (like the 128 x 128 tiles of a striped file)
+            with rasterio.open(self._raster_path, overview_level=level, **self._options) as overview:
+                self._overview_block_shapes[level] = (overview.height, overview.width, overview.block_shapes)
+        height, width, block_shapes = self._overview_block_shapes[level]
+        return (height, width) + tuple(block_shapes[band_number - 1])
+
+    def _stored_block_size(self, band_number: int, level: Optional[int], block_row: int,
+                           block_col: int) -> int:
+        """Bytes a block takes up in the file (uncompressed size if GDAL can't tell)."""
+        src = self.dataset
+        size = src.get_tag_item(f'BLOCK_SIZE_{block_col}_{block_row}', 'TIFF', bidx=band_number, ovr=level)
+        if size is not None:
+            return int(size)
+        _, _, block_height, block_width = self._level_shape(band_number, level)
+        bands = src.count if src.interleaving is not None and src.interleaving.name == 'PIXEL' else 1
+        return block_height * block_width * bands * np.dtype(src.dtypes[band_number - 1]).itemsize
+
+    def _count_blocks(self, indexes, window, out_shape=None, resampling=None) -> Tuple[int, int]:
+        """(number, stored bytes) of the blocks a read touches that this dataset has not read before."""
+        src = self.dataset
+        if indexes is None:
+            indexes = src.indexes
+        elif isinstance(indexes, int):
+            indexes = [indexes]
+        if window is None:
+            window = Window(0, 0, src.width, src.height)
+        elif not isinstance(window, Window):
+            window = Window.from_slices(*window, height=src.height, width=src.width)
+        # With pixel interleaving one block holds every band
+        if src.interleaving is not None and src.interleaving.name == 'PIXEL':
+            indexes = indexes[:1]
+
+        new_blocks = new_bytes = 0
+        for band_number in indexes:
+            level = self._overview_level(band_number, window, out_shape, resampling) if out_shape else None
+            height, width, block_height, block_width = self._level_shape(band_number, level)
+            # The same area in the pixels of the level that is read
+            level_window = Window(window.col_off * width / src.width, window.row_off * height / src.height,
+                                  window.width * width / src.width, window.height * height / src.height)
+            level_window = level_window.round_offsets().round_lengths()
+            row_start, col_start = max(int(level_window.row_off), 0), max(int(level_window.col_off), 0)
+            row_stop = min(int(level_window.row_off + level_window.height), height)
+            col_stop = min(int(level_window.col_off + level_window.width), width)
+            if row_stop <= row_start or col_stop <= col_start:
+                continue
+            for block_row in range(row_start // block_height, (row_stop - 1) // block_height + 1):
+                for block_col in range(col_start // block_width, (col_stop - 1) // block_width + 1):
+                    key = (level, band_number, block_row, block_col)
+                    if key not in self._blocks:
+                        self._blocks.add(key)
+                        new_blocks += 1
+                        if self._range_cache is None:
+                            new_bytes += self._stored_block_size(band_number, level, block_row, block_col)
+        return new_blocks, new_bytes
+
+    def _tracked(self, method: Callable, indexes, window, *args, **kwargs):
+        with io_phase('read', self._range_cache):
+            result = method(indexes, *args, window=window, **kwargs)
+        out = kwargs.get('out')
+        out_shape = kwargs.get('out_shape', out.shape if out is not None else None)
+        new_blocks, new_bytes = self._count_blocks(indexes, window, out_shape, kwargs.get('resampling'))
+        if self._range_cache is not None:
+            # The range cache counted the requests and downloaded bytes
+            _record('read', blocks_decoded=new_blocks)
+        elif self._remote:
+            # GDAL's own HTTP requests cannot be counted, only the blocks
+            _record('read', blocks_decoded=new_blocks, bytes_read=new_bytes)
+        else:
+            # A local file: every new block is one read of its stored bytes
+            _record('read', blocks_decoded=new_blocks, bytes_read=new_bytes, requests=new_blocks)
+        return result
+
+    def read(self, indexes=None, *args, window=None, **kwargs):
+        return self._tracked(self.dataset.read, indexes, window, *args, **kwargs)
+
+    def read_masks(self, indexes=None, *args, window=None, **kwargs):
+        return self._tracked(self.dataset.read_masks, indexes, window, *args, **kwargs)
+
+
+def record_open(cache_hit: bool = False):
+    """Count one dataset handed out by open_raster()."""
+    for stats in _active_stats.get():
+        with stats._lock:
+            stats.opens += 1
+    if cache_hit:
+        _record('open', cache_hits=1)
+
+
+def record_written(byte_count: int):
+    """Count the size of a finished output file."""
+    for stats in _active_stats.get():
+        with stats._lock:
+            stats.bytes_written += byte_count
+
+
+def report_io(func: Callable) -> Callable:
+    """
+    Add an 'io_stats' entry to a function's result when it runs inside track_io().
+
+    Only the outermost reporting call gets one: create_raster_summary()
+    reports the I/O of the read_raster_info() and get_raster_stats()
+    calls it makes, instead of every one of them reporting its own.
+    Functions that return (data, info) get the entry in info, and
+    GeoDataFrame results (zonal_stats()) get it in result.attrs.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not tracking_io() or _reporting.get():
+            return func(*args, **kwargs)
+
+        token = _reporting.set(True)
+        try:
+            with track_io(func.__name__) as stats:
+                result = func(*args, **kwargs)
+        finally:
+            _reporting.reset(token)
+
+        # Copies, so results kept in a cache are never changed
+        if isinstance(result, tuple) and result and isinstance(result[-1], dict):
+            return result[:-1] + (dict(result[-1], io_stats=stats.to_dict()),)
+        if isinstance(result, dict):
+            return dict(result, io_stats=stats.to_dict())
+        if isinstance(getattr(result, 'attrs', None), dict):
+            result.attrs['io_stats'] = stats.to_dict()
+        return result
+
+    return wrapper
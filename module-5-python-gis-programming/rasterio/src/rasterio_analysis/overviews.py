@@ -0,0 +1,341 @@
+"""
+Overviews - Fast approximate reads using a raster's pyramid levels
+
+Cloud-Optimized GeoTIFFs and pyramided GeoTIFFs store smaller copies of the
+image called overviews (each one 2x, 4x, 8x... coarser than the full image).
+For a quick look at a multi-GB file - like an interactive dashboard - reading
+an overview is much faster than reading every full-resolution pixel, and the
+statistics are usually very close.
+
+This module picks the most detailed overview that stays within a pixel
+budget (max_pixels). If the file has no suitable overview, it asks GDAL for
+a decimated read instead (reading every Nth pixel with out_shape).
+
+It can also read at a target resolution (like "100 m pixels" for a map of
+a whole state from a 10 m DEM). Reading the full-resolution window and
+then calling reproject() decodes 100 times more pixels than needed.
+read_at_resolution() instead works out the resolution of every overview,
+picks the finest one that is no finer than the target, opens exactly that
+level (OVERVIEW_LEVEL) and resamples it to the target size with out_shape.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from affine import Affine
+from rasterio.enums import Resampling
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import bounds as window_bounds
+
+from .block_stats import RunningStats, band_scaling, multiband_block_moments
+from .dataset_cache import open_raster
+from .io_stats import report_io
+
+# About one megapixel is plenty for a dashboard-quality estimate
+DEFAULT_MAX_PIXELS = 1_000_000
+
+
+def choose_decimation(src, max_pixels: int = DEFAULT_MAX_PIXELS, band_number: int = 1) -> Dict[str, Any]:
+    """
+    Decide how coarsely to read a raster so it fits in a pixel budget.
+
+    Args:
+        src: An open rasterio dataset
+        max_pixels (int): Maximum number of pixels per band to read
+        band_number (int): Band whose overviews should be used
+
+    Returns:
+        Dict[str, Any]: Reading plan
+
+    Example return format:
+        {
+            'method': 'overview',      # 'full', 'overview' or 'decimated'
+            'overview_level': 1,       # index into src.overviews() (None if not used)
+            'decimation_factor': 4,    # each value stands for 4 x 4 full pixels
+            'out_shape': (2500, 2500)  # (rows, cols) that will be read
+        }
+    """
+    if max_pixels < 1:
+        raise ValueError(f"max_pixels must be at least 1, got {max_pixels}")
+
+    full_pixels = src.width * src.height
+    if full_pixels <= max_pixels:
+        return {'method': 'full', 'overview_level': None, 'decimation_factor': 1,
+                'out_shape': (src.height, src.width)}
+
+    # Overview factors go from finest to coarsest, e.g. [2, 4, 8, 16]
+    for level, factor in enumerate(src.overviews(band_number)):
+        out_shape = (math.ceil(src.height / factor), math.ceil(src.width / factor))
+        if out_shape[0] * out_shape[1] <= max_pixels:
+            return {'method': 'overview', 'overview_level': level,
+                    'decimation_factor': factor, 'out_shape': out_shape}
+
+    # No overview is small enough: let GDAL skip pixels for us
+    factor = math.ceil(math.sqrt(full_pixels / max_pixels))
+    while math.ceil(src.height / factor) * math.ceil(src.width / factor) > max_pixels:
+        factor += 1
+    return {'method': 'decimated', 'overview_level': None, 'decimation_factor': factor,
+            'out_shape': (math.ceil(src.height / factor), math.ceil(src.width / factor))}
+
+
+def read_decimated(src, bands: Sequence[int], max_pixels: int = DEFAULT_MAX_PIXELS) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Read several bands at reduced resolution, within a pixel budget.
+
+    GDAL automatically serves an out_shape read from the matching overview
+    when one exists, so no full-resolution pixels are decoded.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, Any]]: (bands, rows, cols) array and the
+            reading plan from choose_decimation()
+    """
+    bands = list(bands)
+    plan = choose_decimation(src, max_pixels, bands[0])
+    if plan['method'] == 'full':
+        return src.read(bands), plan
+
+    data = src.read(bands, out_shape=(len(bands),) + tuple(plan['out_shape']),
+                    resampling=Resampling.nearest)
+    return data, plan
+
+
+def _approximate_result(stats: RunningStats, plan: Dict[str, Any], full_pixels: int,
+                        scaling: Tuple[float, float] = (1.0, 0.0)) -> Dict[str, Any]:
+    """Scale sampled statistics back to the full raster and describe the error."""
+    sampled_pixels = stats.count + stats.nodata_count
+    result = stats.to_dict(*scaling)
+
+    # Nodata pixels are counted at the coarse level, so estimate the full count
+    if plan['method'] != 'full' and sampled_pixels > 0:
+        result['nodata_count'] = int(round(stats.nodata_count / sampled_pixels * full_pixels))
+
+    # Standard error of the mean: how far the estimated mean is likely to be off
+    standard_error = (result['std'] / math.sqrt(stats.count)
+                      if plan['method'] != 'full' and stats.count > 0 else 0.0)
+
+    result['approximation'] = {
+        'method': plan['method'],
+        'overview_level': plan['overview_level'],
+        'decimation_factor': plan['decimation_factor'],
+        'sampled_pixels': sampled_pixels,
+        'sample_fraction': round(sampled_pixels / full_pixels, 6) if full_pixels else 0.0,
+        'mean_standard_error': standard_error
+    }
+    return result
+
+
+def approximate_multiband_stats(raster_path: str, bands: Optional[Sequence[int]] = None,
+                                max_pixels: int = DEFAULT_MAX_PIXELS) -> Dict[int, Dict[str, Any]]:
+    """
+    Estimate band statistics from an overview (or decimated read).
+
+    Args:
+        raster_path (str): Path or URL of the raster
+        bands (Sequence[int], optional): Band numbers to analyze (None = all bands)
+        max_pixels (int): Maximum number of pixels per band to read
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Statistics for each band (same keys as
+            get_raster_stats()) plus an 'approximation' entry
+
+    Example return format:
+        {
+            1: {
+                'min': 0.0, 'max': 255.0, 'mean': 127.4, 'std': 73.8,
+                'nodata_count': 40,   # estimated for the full-resolution raster
+                'approximation': {
+                    'method': 'overview',
+                    'overview_level': 2,
+                    'decimation_factor': 8,
+                    'sampled_pixels': 976562,
+                    'sample_fraction': 0.015625,
+                    'mean_standard_error': 0.07
+                }
+            }
+        }
+    """
+    with open_raster(raster_path) as src:
+        bands = list(bands) if bands is not None else list(src.indexes)
+        for band_number in bands:
+            if not 1 <= band_number <= src.count:
+                raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+
+        data, plan = read_decimated(src, bands, max_pixels)
+        nodata_values = [src.nodatavals[band_number - 1] for band_number in bands]
+        full_pixels = src.width * src.height
+        scalings = [band_scaling(src, band_number) for band_number in bands]
+
+    band_stats = multiband_block_moments(data, nodata_values)
+    return {band_number: _approximate_result(stats, plan, full_pixels, scaling)
+            for band_number, stats, scaling in zip(bands, band_stats, scalings, strict=True)}
+
+
+@report_io
+def approximate_band_stats(raster_path: str, band_number: int = 1,
+                           max_pixels: int = DEFAULT_MAX_PIXELS) -> Dict[str, Any]:
+    """Estimate statistics for one band (see approximate_multiband_stats())."""
+    return approximate_multiband_stats(raster_path, [band_number], max_pixels)[band_number]
+
+
+def list_overview_levels(src, band_number: int = 1) -> List[Dict[str, Any]]:
+    """
+    Describe every overview level of a dataset.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per level with its factor, size and
+            effective pixel size (x_resolution, y_resolution) in map units
+    """
+    res_x, res_y = src.res
+    levels = []
+    for level, factor in enumerate(src.overviews(band_number)):
+        width, height = math.ceil(src.width / factor), math.ceil(src.height / factor)
+        levels.append({
+            'level': level,
+            'decimation_factor': factor,
+            'width': width,
+            'height': height,
+            # The overview covers the same area with fewer (rounded up) pixels
+            'x_resolution': res_x * src.width / width,
+            'y_resolution': res_y * src.height / height
+        })
+    return levels
+
+
+def choose_overview_for_resolution(src, target_resolution: Union[float, Tuple[float, float]],
+                                   band_number: int = 1) -> Dict[str, Any]:
+    """
+    Pick the finest overview whose pixels are no finer than a target.
+
+    With 30 m, 60 m and 120 m levels and a 50 m target this is the 60 m
+    level: every finer level would decode pixels that are thrown away when
+    resampling. (GDAL itself would pick the 30 m level for out_shape reads,
+    trading speed for detail.) Full resolution is used when it is already
+    no finer than the target, and the coarsest level when none is coarse
+    enough.
+
+    Args:
+        src: An open rasterio dataset
+        target_resolution (float or Tuple[float, float]): Wanted pixel size
+            in map units (one value, or (x, y))
+        band_number (int): Band whose overviews should be used
+
+    Returns:
+        Dict[str, Any]: Reading plan (same keys as choose_decimation(), plus
+            the resolution of the chosen level)
+
+    Example return format:
+        {
+            'method': 'overview',           # 'full' or 'overview'
+            'overview_level': 2,
+            'decimation_factor': 8,
+            'resolution': (80.0, 80.0)
+        }
+    """
+    target_x, target_y = _resolution_pair(target_resolution)
+    plan = {'method': 'full', 'overview_level': None, 'decimation_factor': 1, 'resolution': src.res}
+
+    def no_finer(x_resolution: float, y_resolution: float) -> bool:
+        # (a tiny tolerance absorbs rounding)
+        return x_resolution >= target_x * (1 - 1e-9) and y_resolution >= target_y * (1 - 1e-9)
+
+    if no_finer(*src.res):
+        return plan
+
+    # Levels go from finest to coarsest: stop at the first one that is coarse enough
+    for level in list_overview_levels(src, band_number):
+        plan = {'method': 'overview', 'overview_level': level['level'],
+                'decimation_factor': level['decimation_factor'],
+                'resolution': (level['x_resolution'], level['y_resolution'])}
+        if no_finer(level['x_resolution'], level['y_resolution']):
+            break
+    return plan
+
+
+def _resolution_pair(target_resolution: Union[float, Tuple[float, float]]) -> Tuple[float, float]:
+    if isinstance(target_resolution, (int, float)):
+        target_resolution = (target_resolution, target_resolution)
+    target_x, target_y = (abs(float(value)) for value in target_resolution)
+    if target_x == 0 or target_y == 0:
+        raise ValueError(f"target_resolution must not be zero, got {target_resolution}")
+    return target_x, target_y
+
+
+@report_io
+def read_at_resolution(raster_path: str, target_resolution: Union[float, Tuple[float, float]],
+                       bbox: Optional[Tuple[float, float, float, float]] = None,
+                       bands: Optional[Sequence[int]] = None,
+                       resampling: Resampling = Resampling.nearest) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Read a raster (or a bbox of it) at a target resolution, from the best overview.
+
+    Args:
+        raster_path (str): Path or URL of the raster
+        target_resolution (float or Tuple[float, float]): Wanted pixel size
+            in map units (one value, or (x, y))
+        bbox (Tuple[float, float, float, float], optional): (left, bottom,
+            right, top) in the raster's CRS (default: the whole raster)
+        bands (Sequence[int], optional): Band numbers to read (None = all bands)
+        resampling (Resampling): How to resample the chosen level to the
+            target size (use Resampling.average for continuous data)
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, Any]]: ((bands, rows, cols) array, info)
+            where info holds the reading plan, the output transform and the
+            decoded bytes compared with a full-resolution read
+
+    Example return format:
+        (array([[[...]]], dtype=float32),
+         {'method': 'overview', 'overview_level': 2, 'decimation_factor': 8,
+          'resolution': (80.0, 80.0), 'out_shape': (250, 400),
+          'transform': Affine(100.0, 0.0, ...),
+          'bytes_read': 1000000, 'full_resolution_bytes': 64000000,
+          'bytes_saved': 63000000, 'saved_fraction': 0.984})
+    """
+    target_x, target_y = _resolution_pair(target_resolution)
+
+    with open_raster(raster_path) as src:
+        bands = list(bands) if bands is not None else list(src.indexes)
+        for band_number in bands:
+            if not 1 <= band_number <= src.count:
+                raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+
+        # STEP 1: The window to read, and the size it should have at the target resolution
+        window = from_bounds(*bbox, transform=src.transform) if bbox is not None else Window(0, 0, src.width, src.height)
+        window = window.intersection(Window(0, 0, src.width, src.height))
+        res_x, res_y = src.res
+        out_shape = (max(1, round(window.height * res_y / target_y)), max(1, round(window.width * res_x / target_x)))
+        transform = src.window_transform(window) * Affine.scale(window.width / out_shape[1],
+                                                               window.height / out_shape[0])
+
+        # STEP 2: Pick the overview level
+        plan = choose_overview_for_resolution(src, (target_x, target_y), bands[0])
+        area = window_bounds(window, src.transform)
+        pixel_bytes = sum(np.dtype(src.dtypes[band_number - 1]).itemsize for band_number in bands)
+        full_bytes = math.ceil(window.height) * math.ceil(window.width) * pixel_bytes
+
+    # STEP 3: Open just that level and read the same area, resampled to the target size
+    options = {'overview_level': plan['overview_level']} if plan['overview_level'] is not None else {}
+    with open_raster(raster_path, **options) as level_src:
+        level_window = from_bounds(*area, transform=level_src.transform)
+        data = level_src.read(bands, window=level_window, out_shape=(len(bands),) + out_shape,
+                              resampling=resampling)
+        read_bytes = math.ceil(level_window.height) * math.ceil(level_window.width) * pixel_bytes
+
+    # STEP 4: Compare with reading full resolution and resampling afterwards
+    info = dict(plan)
+    info.update({
+        'out_shape': out_shape,
+        'transform': transform,
+        'bytes_read': read_bytes,
+        'full_resolution_bytes': full_bytes,
+        'bytes_saved': max(full_bytes - read_bytes, 0),
+        'saved_fraction': round(max(full_bytes - read_bytes, 0) / full_bytes, 4) if full_bytes else 0.0
+    })
+    return data, info
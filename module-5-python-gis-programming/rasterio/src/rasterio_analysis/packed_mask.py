@@ -0,0 +1,188 @@
+"""
+Packed Masks - Valid/nodata masks that use 1 bit per pixel
+
+A numpy boolean array uses a whole byte for every True/False value. A
+10,000 x 10,000 band needs 100 MB for a single mask, and calculate_ndvi()
+used to keep four of them (red_valid, nir_valid, valid_mask and
+calculation_mask).
+
+PackedMask stores the same information with np.packbits(): 8 pixels per
+byte, so every mask is 8 times smaller. Masks can be combined with & | ~,
+and counting valid pixels is a "popcount" (counting the 1 bits in each
+byte) instead of summing a full boolean array.
+
+Masks are built a strip of rows at a time, so a full-size boolean array is
+never created. They can come from GDAL's own dataset masks
+(src.read_masks(), which also understands alpha bands and internal masks)
+or from comparing values with a nodata value.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from rasterio.windows import Window
+
+# Number of rows handled at once while building or applying a mask
+DEFAULT_STRIP_ROWS = 256
+
+# Number of 1 bits in every possible byte value (0-255)
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def _popcount(packed: np.ndarray) -> int:
+    """Count the 1 bits in an array of bytes."""
+    if hasattr(np, 'bitwise_count'):  # numpy 2.0 and newer
+        return int(np.bitwise_count(packed).sum(dtype=np.int64))
+    return int(_POPCOUNT_TABLE[packed].sum(dtype=np.int64))
+
+
+class PackedMask:
+    """
+    A 2D True/False mask stored with 1 bit per pixel.
+
+    Each row is packed separately (np.packbits along the columns), so a
+    strip of rows can be unpacked on its own. Unused bits at the end of a
+    row are always 0.
+
+    Example:
+        >>> mask = PackedMask.from_bool(np.array([[True, False, True]]))
+        >>> mask.count(), mask.count_false()
+        (2, 1)
+        >>> (mask & ~mask).count()
+        0
+    """
+
+    def __init__(self, bits: np.ndarray, shape: Tuple[int, int]):
+        self.bits = bits          # (rows, ceil(cols / 8)) uint8 array
+        self.shape = tuple(shape)
+
+    # ------------------------------------------------------------------
+    # Building masks
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_bool(cls, mask: np.ndarray) -> "PackedMask":
+        """Pack an existing boolean array (a 1D array becomes a single row)."""
+        mask = np.atleast_2d(np.asarray(mask, dtype=bool))
+        return cls(np.packbits(mask, axis=-1), mask.shape)
+
+    @classmethod
+    def full(cls, shape: Tuple[int, int], value: bool = True) -> "PackedMask":
+        """A mask where every pixel is True (or every pixel is False)."""
+        rows, cols = shape
+        mask = cls(np.zeros((rows, (cols + 7) // 8), dtype=np.uint8), shape)
+        return ~mask if value else mask
+
+    @classmethod
+    def from_nodata(cls, data: np.ndarray, nodata_value: Optional[float] = None) -> "PackedMask":
+        """
+        Valid pixels of a 2D array: not equal to nodata_value and not NaN.
+
+        Only one strip of rows is compared at a time, so the full-size
+        boolean array is never created. A 1D array becomes a single row.
+        """
+        data = np.atleast_2d(data)
+        rows, cols = data.shape
+        bits = np.empty((rows, (cols + 7) // 8), dtype=np.uint8)
+        check_nan = np.issubdtype(data.dtype, np.floating)
+
+        for start in range(0, rows, DEFAULT_STRIP_ROWS):
+            strip = data[start:start + DEFAULT_STRIP_ROWS]
+            valid = ~np.isnan(strip) if check_nan else np.ones(strip.shape, dtype=bool)
+            if nodata_value is not None and not np.isnan(nodata_value):
+                valid &= strip != nodata_value
+            bits[start:start + DEFAULT_STRIP_ROWS] = np.packbits(valid, axis=-1)
+        return cls(bits, data.shape)
+
+    @classmethod
+    def from_dataset(cls, src, band_number: int = 1, window: Optional[Window] = None,
+                     out_shape: Optional[Tuple[int, int]] = None) -> "PackedMask":
+        """
+        Read GDAL's valid-data mask for one band (see src.read_masks()).
+
+        GDAL works out the mask from the nodata value, an alpha band or an
+        internal mask - whichever the file has. Full-resolution masks are
+        read in strips of rows; a mask for a decimated read (out_shape) is
+        read in one go.
+        """
+        if out_shape is not None:
+            return cls.from_bool(src.read_masks(band_number, window=window, out_shape=out_shape) > 0)
+
+        if window is None:
+            window = Window(0, 0, src.width, src.height)
+        rows, cols = int(window.height), int(window.width)
+        bits = np.empty((rows, (cols + 7) // 8), dtype=np.uint8)
+
+        for start in range(0, rows, DEFAULT_STRIP_ROWS):
+            height = min(DEFAULT_STRIP_ROWS, rows - start)
+            strip_window = Window(window.col_off, window.row_off + start, cols, height)
+            bits[start:start + height] = np.packbits(src.read_masks(band_number, window=strip_window) > 0, axis=-1)
+        return cls(bits, (rows, cols))
+
+    # ------------------------------------------------------------------
+    # Combining and counting
+    # ------------------------------------------------------------------
+
+    def _check_shape(self, other: "PackedMask"):
+        if self.shape != other.shape:
+            raise ValueError(f"Mask shapes do not match: {self.shape} and {other.shape}")
+
+    def __and__(self, other: "PackedMask") -> "PackedMask":
+        self._check_shape(other)
+        return PackedMask(self.bits & other.bits, self.shape)
+
+    def __or__(self, other: "PackedMask") -> "PackedMask":
+        self._check_shape(other)
+        return PackedMask(self.bits | other.bits, self.shape)
+
+    def __invert__(self) -> "PackedMask":
+        bits = ~self.bits
+        unused = (-self.shape[1]) % 8
+        if unused and bits.size:
+            # Keep the padding bits at the end of each row switched off
+            bits[:, -1] &= np.uint8((0xFF << unused) & 0xFF)
+        return PackedMask(bits, self.shape)
+
+    def count(self) -> int:
+        """Number of True pixels."""
+        return _popcount(self.bits)
+
+    def count_false(self) -> int:
+        """Number of False pixels."""
+        return self.shape[0] * self.shape[1] - self.count()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the packed bits."""
+        return self.bits.nbytes
+
+    # ------------------------------------------------------------------
+    # Going back to numpy
+    # ------------------------------------------------------------------
+
+    def to_bool(self, rows: slice = slice(None)) -> np.ndarray:
+        """Unpack all rows (or a slice of rows) into a normal boolean array."""
+        return np.unpackbits(self.bits[rows], axis=-1, count=self.shape[1]).astype(bool)
+
+    def iter_strips(self, strip_rows: int = DEFAULT_STRIP_ROWS) -> Iterator[Tuple[slice, np.ndarray]]:
+        """Yield (row slice, boolean strip) pairs, one strip of rows at a time."""
+        for start in range(0, self.shape[0], strip_rows):
+            rows = slice(start, min(start + strip_rows, self.shape[0]))
+            yield rows, self.to_bool(rows)
+
+    def fill_invalid(self, array: np.ndarray, fill_value: float = np.nan) -> np.ndarray:
+        """Set every pixel where the mask is False to fill_value (in place)."""
+        if array.shape != self.shape:
+            raise ValueError(f"Array shape {array.shape} does not match mask shape {self.shape}")
+        for rows, valid in self.iter_strips():
+            array[rows][~valid] = fill_value
+        return array
+
+    def __repr__(self) -> str:
+        return f"PackedMask(shape={self.shape}, valid={self.count()})"
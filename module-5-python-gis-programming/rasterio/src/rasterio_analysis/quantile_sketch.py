@@ -0,0 +1,153 @@
+"""
+Quantile Sketch - Approximate medians and percentiles without sorting
+
+np.median() and np.percentile() have to partition a full copy of every
+valid pixel, which is the slowest part of calculating raster statistics.
+They also need all of the pixels in memory at once, so they can't be used
+with the block-by-block statistics in block_stats.py.
+
+This module provides a small histogram "sketch" (the DDSketch algorithm).
+Every value is dropped into a logarithmic bucket, so each bucket covers a
+range of values that differ by at most a chosen relative error (1% by
+default). Sketches are fed one block at a time, and sketches built from
+different blocks or workers can be merged by adding their bucket counts.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Values closer to zero than this are counted in a special "zero" bucket
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a guaranteed relative error.
+
+    Any quantile returned by the sketch is within `relative_accuracy`
+    (relative error) of a real value from the data at that rank.
+
+    Args:
+        relative_accuracy (float): Maximum relative error, between 0 and 1
+            (0.01 means answers are within 1% of the true value)
+
+    Example:
+        >>> sketch = QuantileSketch(relative_accuracy=0.01)
+        >>> sketch.add_values(np.arange(1, 1001))
+        >>> sketch.quantile(0.5)  # true median is 500.5
+        497.77...
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be between 0 and 1, got {relative_accuracy}")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+
+        # Bucket index -> number of values in that bucket
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}  # buckets of abs(value)
+        self.zero_count = 0
+
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add_values(self, values: np.ndarray):
+        """Add an array of values to the sketch (NaN values are ignored)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+
+        self._add_magnitudes(self.positive, values[values > MIN_INDEXABLE_VALUE])
+        self._add_magnitudes(self.negative, -values[values < -MIN_INDEXABLE_VALUE])
+        self.zero_count += int(np.sum(np.abs(values) <= MIN_INDEXABLE_VALUE))
+
+        self.count += int(values.size)
+        block_min, block_max = float(values.min()), float(values.max())
+        self.min = block_min if self.min is None else min(self.min, block_min)
+        self.max = block_max if self.max is None else max(self.max, block_max)
+
+    def _add_magnitudes(self, store: Dict[int, int], magnitudes: np.ndarray):
+        """Count positive magnitudes into their logarithmic buckets."""
+        if magnitudes.size == 0:
+            return
+
+        # Bucket i holds values in (gamma**(i-1), gamma**i]
+        indexes = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        offset = int(indexes.min())
+        counts = np.bincount(indexes - offset)
+        for position in np.flatnonzero(counts):
+            key = int(position) + offset
+            store[key] = store.get(key, 0) + int(counts[position])
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Combine another sketch into this one by adding bucket counts."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Can only merge sketches with the same relative_accuracy")
+
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+
+        if other.count > 0:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.count += other.count
+        return self
+
+    def _bucket_value(self, key: int) -> float:
+        """Representative value of a bucket (within relative_accuracy of every member)."""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        """
+        Estimate several quantiles with a single walk over the buckets.
+
+        Args:
+            qs (Sequence[float]): Quantiles between 0 and 1 (0.5 = median)
+
+        Returns:
+            List[Optional[float]]: One estimate per quantile (None if the sketch is empty)
+        """
+        if self.count == 0:
+            return [None for _ in qs]
+        for q in qs:
+            if not 0 <= q <= 1:
+                raise ValueError(f"Quantiles must be between 0 and 1, got {q}")
+
+        # Buckets in increasing value order: big negatives, zero, positives
+        buckets = [(-self._bucket_value(key), count)
+                   for key, count in sorted(self.negative.items(), reverse=True)]
+        if self.zero_count:
+            buckets.append((0.0, self.zero_count))
+        buckets += [(self._bucket_value(key), count)
+                    for key, count in sorted(self.positive.items())]
+
+        values = np.array([value for value, _ in buckets])
+        cumulative = np.cumsum([count for _, count in buckets])
+
+        results = []
+        for q in qs:
+            rank = q * (self.count - 1)
+            position = int(np.searchsorted(cumulative, rank, side='right'))
+            value = float(values[min(position, len(values) - 1)])
+            # The true answer can never lie outside the observed range
+            results.append(min(max(value, self.min), self.max))
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a single quantile between 0 and 1 (0.5 = median)."""
+        return self.quantiles([q])[0]
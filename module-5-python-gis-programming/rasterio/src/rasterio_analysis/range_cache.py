@@ -0,0 +1,490 @@
+"""
+Range Cache - Keep the downloaded pieces of remote rasters on disk
+
+A Cloud-Optimized GeoTIFF (COG) on a web server is read with HTTP "range"
+requests: GDAL asks for bytes 0-16383 (the header), then for the bytes of
+each tile it needs. Nothing is remembered between runs, so running the
+same notebook cell twice downloads the same header and the same tiles
+twice.
+
+This module keeps those pieces in a small SQLite database on disk:
+- Remote files are cut into fixed-size chunks (64 KB by default). Every
+  read is turned into the chunks it covers; chunks already in the cache
+  are used as they are, and missing chunks next to each other are fetched
+  with a single range request.
+- Each chunk is keyed by the URL, the file's ETag (a version tag the web
+  server sends) and its byte range, so a changed file never mixes old and
+  new bytes.
+- The file's size and ETag are remembered too, so a fully cached read
+  makes no network requests at all. They are checked again once they are
+  older than max_age (one day by default).
+- The cache has a size limit. When it is full, the chunks that were used
+  least recently are deleted first (LRU).
+
+Use it by passing the cache to rasterio.open() (or open_raster()) as the
+opener:
+
+    >>> cache = RangeCache()
+    >>> with rasterio.open('https://example.com/dem_cog.tif', opener=cache) as src:
+    ...     data = src.read(1, window=window)
+    >>> cache.stats()['requests']
+    0          # on the second run
+
+By default the database lives in ~/.cache/rasterio_analysis/ranges.sqlite.
+Set the RASTERIO_RANGE_CACHE environment variable to use a different file.
+Python openers need rasterio 1.4 or newer.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import io
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from rasterio.abc import FileContainer
+except ImportError:  # rasterio < 1.4 cannot use Python openers
+    FileContainer = None
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "rasterio_analysis" / "ranges.sqlite"
+
+# Size of the pieces remote files are cut into (and the smallest download)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Largest size of all cached chunks together
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Seconds before a remote file's size and ETag are checked again
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+# Largest single download when neighbouring chunks are merged
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+# Requests made at the same time by prefetch()
+DEFAULT_FETCH_WORKERS = 8
+
+# Chunks also kept in memory, so GDAL's many small header reads do not
+# each become a database query
+MEMORY_CHUNKS = 32
+
+# Side files GDAL looks for next to a raster (name.aux.xml, name.ovr, ...).
+# Remote COGs never have them, so they are reported as missing without
+# asking the server.
+SIDECAR_SUFFIXES = ('.aux', '.xml', '.msk', '.ovr')
+
+
+def _is_url(path: str) -> bool:
+    return str(path).lower().startswith(('http://', 'https://'))
+
+
+class CachedRangeFile(io.RawIOBase):
+    """Read-only file object for a remote file, read through a RangeCache."""
+
+    def __init__(self, cache: "RangeCache", url: str, size: int):
+        super().__init__()
+        self.cache = cache
+        self.url = url
+        self.size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self.size}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        data = self.cache.read_range(self.url, self._position, len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class RangeCache(FileContainer or object):
+    """
+    Persistent, size-limited LRU cache of byte ranges of remote files.
+
+    Pass it as the opener to rasterio.open() or open_raster(). Counts
+    chunk hits and misses, HTTP requests and downloaded bytes.
+
+    Args:
+        db_path (str, optional): SQLite file to use (default: RASTERIO_RANGE_CACHE
+            environment variable, or ~/.cache/rasterio_analysis/ranges.sqlite)
+        max_bytes (int): Size limit of all cached chunks together
+        chunk_size (int): Size of the pieces remote files are cut into
+        max_age (float): Seconds before a file's size and ETag are checked
+            again (0 = check once per RangeCache object)
+        timeout (float): Seconds to wait for the web server
+
+    Example:
+        >>> cache = RangeCache('ranges.sqlite', max_bytes=100_000_000)
+        >>> with open_raster(cog_url, opener=cache) as src:
+        ...     data = src.read(1, window=window)
+        >>> cache.stats()
+        {'hits': 3, 'misses': 2, 'requests': 2, 'bytes_downloaded': 131072, ...}
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_age: float = DEFAULT_MAX_AGE,
+                 timeout: float = 30):
+        if FileContainer is None:
+            raise ImportError("The range cache needs rasterio 1.4 or newer: pip install -U rasterio")
+        if chunk_size < 1 or max_bytes < 0:
+            raise ValueError(f"chunk_size must be positive and max_bytes not negative, "
+                             f"got {chunk_size} and {max_bytes}")
+        if db_path is None:
+            db_path = os.environ.get("RASTERIO_RANGE_CACHE", DEFAULT_CACHE_PATH)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.max_age = max_age
+        self.timeout = timeout
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
+        self._checked: Dict[str, float] = {}  # URLs whose metadata was checked by this object
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+        self.bytes_downloaded = 0
+
+        # A generous timeout lets several processes share one cache file
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS resources ("
+                " url TEXT PRIMARY KEY, etag TEXT, size INTEGER NOT NULL, checked REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " url TEXT NOT NULL, etag TEXT NOT NULL, start INTEGER NOT NULL, length INTEGER NOT NULL,"
+                " data BLOB NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (url, etag, start, length))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_last_used ON chunks (last_used)")
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _get(self, url: str, first: int, last: int) -> Tuple[int, Dict[str, str], bytes]:
+        """One range request for bytes first ... last: (status, headers, body)."""
+        request = urllib.request.Request(url, headers={'Range': f'bytes={first}-{last}'})
+        with self._lock:
+            self.requests += 1
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                headers = {key.lower(): value for key, value in response.headers.items()}
+                if response.status == 200 and int(headers.get('content-length', 0)) > last - first + 1:
+                    raise OSError(f"{url}: the web server does not support range requests")
+                body = response.read()
+        except urllib.error.HTTPError as error:
+            if error.code == 416:  # range past the end: an empty file
+                return 416, {key.lower(): value for key, value in error.headers.items()}, b''
+            raise
+        with self._lock:
+            self.bytes_downloaded += len(body)
+        return response.status, headers, body
+
+    @staticmethod
+    def _version(headers: Dict[str, str]) -> str:
+        """The ETag (or, without one, the Last-Modified date) of a response."""
+        return headers.get('etag') or headers.get('last-modified') or ''
+
+    # ------------------------------------------------------------------
+    # File size and version
+    # ------------------------------------------------------------------
+
+    def resource(self, url: str) -> Tuple[Optional[str], int]:
+        """
+        (etag, size) of a remote file, from the cache while it is fresh.
+
+        A missing file has size -1 (and is remembered as missing too).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT etag, size, checked FROM resources WHERE url = ?",
+                                     (url,)).fetchone()
+        if row is not None and (time.time() - row[2] < self.max_age or
+                                self._checked.get(url, 0) >= row[2]):
+            return row[0], row[1]
+
+        # Ask for the first chunk: the reply tells us the size and ETag, and
+        # GDAL is about to read the header from that chunk anyway
+        try:
+            status, headers, body = self._get(url, 0, self.chunk_size - 1)
+        except urllib.error.HTTPError as error:
+            if error.code not in (403, 404, 410):
+                raise
+            etag, size, body = None, -1, b''
+        else:
+            etag = self._version(headers)
+            if status == 206:
+                size = int(headers['content-range'].rsplit('/', 1)[1])
+            else:
+                size = len(body)
+
+        checked = time.time()
+        with self._lock, self._conn:
+            if row is not None and row[0] != etag:
+                # The file changed: its old chunks are never used again
+                self._conn.execute("DELETE FROM chunks WHERE url = ? AND etag IS NOT ?", (url, etag))
+                self._memory.clear()
+            self._conn.execute("INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?)",
+                               (url, etag, size, checked))
+            self._checked[url] = checked
+        if size > 0:
+            self._store(url, etag, size, 0, body)
+        return etag, size
+
+    # ------------------------------------------------------------------
+    # Chunks
+    # ------------------------------------------------------------------
+
+    def _store(self, url: str, etag: str, size: int, start: int, body: bytes):
+        """Cut downloaded bytes (starting at a chunk boundary) into chunks and save them."""
+        now = time.time()
+        rows = []
+        for offset in range(0, len(body), self.chunk_size):
+            chunk_start = start + offset
+            chunk = body[offset:offset + min(self.chunk_size, size - chunk_start)]
+            rows.append((url, etag, chunk_start, len(chunk), sqlite3.Binary(chunk), now))
+            self._remember((url, etag, chunk_start), chunk)
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self.evict()
+
+    def _remember(self, key: Tuple[str, str, int], chunk: bytes):
+        with self._lock:
+            self._memory[key] = chunk
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_CHUNKS:
+                self._memory.popitem(last=False)
+
+    def _cached_chunks(self, url: str, etag: str, size: int, starts: List[int]) -> Dict[int, bytes]:
+        """The chunks (by start offset) that are already in memory or in the database."""
+        found = {}
+        with self._lock:
+            for start in starts:
+                chunk = self._memory.get((url, etag, start))
+                if chunk is not None:
+                    found[start] = chunk
+            wanted = [start for start in starts if start not in found]
+            if wanted:
+                placeholders = ','.join('?' * len(wanted))
+                rows = self._conn.execute(
+                    f"SELECT start, length, data FROM chunks WHERE url = ? AND etag = ? "
+                    f"AND start IN ({placeholders})", [url, etag, *wanted]
+                ).fetchall()
+                used = []
+                for start, length, data in rows:
+                    if length == min(self.chunk_size, size - start):  # (same chunk size as this cache)
+                        found[start] = bytes(data)
+                        self._remember((url, etag, start), found[start])
+                        used.append((start,))
+                if used:
+                    with self._conn:
+                        self._conn.executemany(
+                            "UPDATE chunks SET last_used = ? WHERE url = ? AND etag = ? AND start = ?",
+                            [(time.time(), url, etag, start) for (start,) in used]
+                        )
+        return found
+
+    def read_range(self, url: str, start: int, length: int) -> bytes:
+        """
+        Read length bytes of a remote file from start, downloading only
+        the chunks that are not cached yet.
+        """
+        etag, size = self.resource(url)
+        if size < 0:
+            raise FileNotFoundError(url)
+        end = min(start + length, size)
+        if start >= end:
+            return b''
+
+        starts = list(range(start - start % self.chunk_size, end, self.chunk_size))
+        chunks = self._cached_chunks(url, etag, size, starts)
+        missing = [chunk_start for chunk_start in starts if chunk_start not in chunks]
+        with self._lock:
+            self.hits += len(starts) - len(missing)
+            self.misses += len(missing)
+
+        chunks.update(self._download(url, etag, size, missing))
+        data = b''.join(chunks[chunk_start] for chunk_start in starts)
+        offset = start - starts[0]
+        return data[offset:offset + end - start]
+
+    def _download(self, url: str, etag: str, size: int, missing: List[int],
+                  max_workers: int = 1) -> Dict[int, bytes]:
+        """
+        Download missing chunks (by start offset) and save them.
+
+        Chunks next to each other are downloaded with one request (of at
+        most MAX_REQUEST_BYTES); with max_workers > 1 the requests run at
+        the same time in a thread pool.
+        """
+        runs = []
+        for chunk_start in sorted(missing):
+            if runs and runs[-1][1] == chunk_start and chunk_start - runs[-1][0] < MAX_REQUEST_BYTES:
+                runs[-1][1] = chunk_start + self.chunk_size
+            else:
+                runs.append([chunk_start, chunk_start + self.chunk_size])
+
+        def fetch(run):
+            run_start, run_end = run
+            status, headers, body = self._get(url, run_start, min(run_end, size) - 1)
+            if self._version(headers) != etag:
+                # Changed on the server since we checked: start over next time
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM resources WHERE url = ?", (url,))
+                raise OSError(f"{url} changed on the server while it was being read")
+            self._store(url, etag, size, run_start, body)
+            return {run_start + offset: body[offset:offset + self.chunk_size]
+                    for offset in range(0, len(body), self.chunk_size)}
+
+        downloaded = {}
+        if max_workers > 1 and len(runs) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(runs))) as pool:
+                for part in pool.map(fetch, runs):
+                    downloaded.update(part)
+        else:
+            for run in runs:
+                downloaded.update(fetch(run))
+        return downloaded
+
+    def prefetch(self, url: str, ranges: Sequence[Tuple[int, int]],
+                 max_workers: int = DEFAULT_FETCH_WORKERS) -> Dict[str, Any]:
+        """
+        Download many byte ranges of a remote file at the same time.
+
+        Later reads of these ranges (by GDAL, through open()) come straight
+        from the cache. The cache's max_bytes must be big enough to hold
+        them all, or the first ones are evicted again.
+
+        Args:
+            url (str): URL of the remote file
+            ranges (Sequence[Tuple[int, int]]): (offset, length) of every range
+            max_workers (int): Largest number of requests at the same time
+
+        Returns:
+            Dict[str, Any]: Number of chunks wanted, already cached and
+                downloaded, and the number of requests made
+        """
+        etag, size = self.resource(url)
+        if size < 0:
+            raise FileNotFoundError(url)
+        starts = set()
+        for offset, length in ranges:
+            end = min(offset + length, size)
+            starts.update(range(offset - offset % self.chunk_size, end, self.chunk_size))
+        starts = sorted(starts)
+
+        cached = self._cached_chunks(url, etag, size, starts)
+        missing = [chunk_start for chunk_start in starts if chunk_start not in cached]
+        with self._lock:
+            self.hits += len(starts) - len(missing)
+            self.misses += len(missing)
+            requests_before = self.requests
+        self._download(url, etag, size, missing, max_workers)
+        return {
+            'chunks': len(starts),
+            'cached_chunks': len(starts) - len(missing),
+            'downloaded_chunks': len(missing),
+            'requests': self.requests - requests_before
+        }
+
+    def evict(self, max_bytes: Optional[int] = None):
+        """Delete least recently used chunks until the cache fits in max_bytes."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock, self._conn:
+            total = self._conn.execute("SELECT COALESCE(SUM(length), 0) FROM chunks").fetchone()[0]
+            if total <= max_bytes:
+                return
+            doomed = []
+            for rowid, length in self._conn.execute("SELECT rowid, length FROM chunks ORDER BY last_used"):
+                if total <= max_bytes:
+                    break
+                doomed.append((rowid,))
+                total -= length
+            self._conn.executemany("DELETE FROM chunks WHERE rowid = ?", doomed)
+            self._memory.clear()
+
+    def clear(self):
+        """Delete everything in the cache."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM resources")
+            self._memory.clear()
+            self._checked.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, requests and downloaded bytes so far, and the cache's size."""
+        with self._lock:
+            cached_chunks, cached_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'requests': self.requests,
+                'bytes_downloaded': self.bytes_downloaded,
+                'cached_chunks': cached_chunks,
+                'cached_bytes': cached_bytes
+            }
+
+    # ------------------------------------------------------------------
+    # rasterio opener interface (rasterio.abc.FileContainer)
+    # ------------------------------------------------------------------
+
+    def _exists(self, path: str) -> bool:
+        if not _is_url(path) or str(path).lower().endswith(SIDECAR_SUFFIXES):
+            return False
+        return self.resource(path)[1] >= 0
+
+    def open(self, path: str, mode: str = 'rb', **kwargs) -> CachedRangeFile:
+        if 'r' not in mode or '+' in mode or 'w' in mode:
+            raise OSError(f"Remote files can only be read, not opened with mode {mode!r}")
+        if not self._exists(path):
+            raise FileNotFoundError(path)
+        return CachedRangeFile(self, path, self.resource(path)[1])
+
+    def isfile(self, path: str) -> bool:
+        return self._exists(path)
+
+    def isdir(self, path: str) -> bool:
+        return False
+
+    def ls(self, path: str) -> List[str]:
+        return []
+
+    def mtime(self, path: str) -> int:
+        return 0
+
+    def size(self, path: str) -> int:
+        return self.resource(path)[1] if self._exists(path) else 0
+
+    def rm(self, path: str):
+        raise OSError(f"Remote files cannot be removed: {path}")
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
@@ -16,7 +16,14 @@ import numpy as np
 from pathlib import Path
 from typing import Dict, List, Union, Any
 
+from .block_stats import apply_scaling, band_scaling, stream_band_stats
+from .dataset_cache import open_raster
+from .io_stats import report_io
+from .overviews import DEFAULT_MAX_PIXELS, approximate_band_stats
+from .tile_scheduler import parallel_band_stats
 
+
+@report_io
 def read_raster_info(raster_path: str) -> Dict[str, Any]:
     """
     Read basic information about a raster file.
@@ -41,7 +48,9 @@ def read_raster_info(raster_path: str) -> Dict[str, Any]:
     """
     # STEP 1: Open the raster file using rasterio
     # HINT: Use 'with rasterio.open(raster_path) as src:' to safely open the file
-    with rasterio.open(raster_path) as src:
+    # (open_raster() works exactly the same way, but can reuse a file that
+    # create_raster_summary() already opened - see dataset_cache.py)
+    with open_raster(raster_path) as src:
 
         # STEP 2: Extract the basic properties
         # HINT: Available properties include src.width, src.height, src.count, src.crs, src.driver
@@ -62,7 +71,10 @@ def read_raster_info(raster_path: str) -> Dict[str, Any]:
     # NOTE: The 'with' statement automatically closes the file when done!
 
 
-def get_raster_stats(raster_path: str, band_number: int = 1) -> Dict[str, float]:
+@report_io
+def get_raster_stats(raster_path: str, band_number: int = 1,
+                     streaming: bool = False, approximate: bool = False,
+                     max_pixels: int = None, max_workers: int = None) -> Dict[str, float]:
     """
     Calculate basic statistics for a raster band.
 
@@ -72,6 +84,14 @@ def get_raster_stats(raster_path: str, band_number: int = 1) -> Dict[str, float]
     Args:
         raster_path (str): Path to the raster file
         band_number (int): Which band to analyze (1-based indexing)
+        streaming (bool): Read the band one block at a time instead of all at
+            once. Use this for rasters that are too big to fit in memory.
+        approximate (bool): Estimate the statistics from an overview (or a
+            decimated read) instead of every full-resolution pixel
+        max_pixels (int, optional): Pixel budget for the approximate read
+            (setting it turns on approximate mode; default about 1 million)
+        max_workers (int, optional): Stream the band with this many threads
+            (setting it turns on streaming mode; see tile_scheduler.py)
 
     Returns:
         Dict[str, float]: Dictionary containing statistics
@@ -84,9 +104,23 @@ def get_raster_stats(raster_path: str, band_number: int = 1) -> Dict[str, float]
             'std': 73.9,
             'nodata_count': 42
         }
+
+        In approximate mode the dictionary also has an 'approximation' entry
+        saying which overview level was used and the expected error.
     """
+    # Quick estimates: let overviews.py read a smaller version of the raster
+    if approximate or max_pixels is not None:
+        return approximate_band_stats(raster_path, band_number, max_pixels or DEFAULT_MAX_PIXELS)
+
+    # Big rasters: let block_stats.py walk the file block by block,
+    # optionally spreading the blocks over several threads
+    if max_workers is not None:
+        return parallel_band_stats(raster_path, band_number, max_workers=max_workers)
+    if streaming:
+        return stream_band_stats(raster_path, band_number)
+
     # STEP 1: Open the raster file
-    with rasterio.open(raster_path) as src:
+    with open_raster(raster_path) as src:
 
         # STEP 2: Read the specified band as a numpy array
         # HINT: Use src.read(band_number) to read a specific band
@@ -120,7 +154,13 @@ def get_raster_stats(raster_path: str, band_number: int = 1) -> Dict[str, float]
             'nodata_count': int(nodata_count)
         }
 
-        # STEP 6: Return the statistics dictionary
+        # STEP 6: Report the statistics in real units
+        # Some rasters store scaled integers, like NDVI saved as int16 x 10000
+        # with a scale of 0.0001. Converting the four statistics is much
+        # cheaper than converting every pixel (see band_scaling() in block_stats.py)
+        stats = apply_scaling(stats, *band_scaling(src, band_number))
+
+        # STEP 7: Return the statistics dictionary
         return stats
 
 
@@ -148,7 +188,7 @@ def get_raster_extent(raster_path: str) -> Dict[str, float]:
         }
     """
     # STEP 1: Open the raster file
-    with rasterio.open(raster_path) as src:
+    with open_raster(raster_path) as src:
 
         # STEP 2: Get the bounds
         # HINT: Use src.bounds which returns a BoundingBox object
@@ -0,0 +1,119 @@
+"""
+Scaled Index - Store NDVI, EVI and other indices as scaled integers
+
+Index values like NDVI only need about four decimal places, but a float32
+raster spends 4 bytes on every pixel. Satellite products (MODIS, Landsat,
+Sentinel-2) usually store them as 16-bit integers instead:
+
+    stored value = round(index / 0.0001)     e.g. NDVI 0.4237 -> 4237
+
+which halves the file size and the memory needed, and compresses much
+better. GDAL keeps the scale (0.0001) and offset (0) in the file's
+metadata, so other programs can convert the values back:
+
+    real value = stored value * scale + offset
+
+One stored value (-32768) is kept for nodata, so it can never be produced
+by a real index value.
+
+The block-reading functions (band_expressions.py, classification.py,
+block_stats.py) read the scale and offset from the file and work in real
+units automatically.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from typing import Optional
+
+import numpy as np
+
+# int16 with 4 decimal places: -3.2767 to 3.2767, enough for every common index
+INDEX_DTYPE = 'int16'
+INDEX_SCALE = 0.0001
+INDEX_OFFSET = 0.0
+
+# Reserved nodata value; real values are clipped to -32767 ... 32767
+INDEX_NODATA = -32768
+_STORED_MIN = np.iinfo(np.int16).min + 1
+_STORED_MAX = np.iinfo(np.int16).max
+
+# The output types that index functions can write
+OUTPUT_DTYPES = ('float32', INDEX_DTYPE)
+
+
+def check_output_dtype(output_dtype: str) -> str:
+    """Make sure an output type is one of OUTPUT_DTYPES."""
+    if output_dtype not in OUTPUT_DTYPES:
+        raise ValueError(f"Unknown output type '{output_dtype}' (use one of {', '.join(OUTPUT_DTYPES)})")
+    return output_dtype
+
+
+def encode_index(values: np.ndarray, out: Optional[np.ndarray] = None,
+                 scale: float = INDEX_SCALE, offset: float = INDEX_OFFSET,
+                 nodata: int = INDEX_NODATA) -> np.ndarray:
+    """
+    Convert real index values (NaN = nodata) to scaled int16 values.
+
+    Values are rounded to the nearest step and clipped to the int16 range,
+    so a value outside the range is stored as the closest possible value
+    rather than wrapping around.
+
+    Args:
+        values (np.ndarray): Index values, usually one block
+        out (np.ndarray, optional): int16 array (or view) to write into
+        scale, offset (float): real value = stored value * scale + offset
+        nodata (int): Stored value for NaN pixels
+
+    Returns:
+        np.ndarray: The int16 values
+
+    Example:
+        >>> encode_index(np.array([0.4237, -1.0, np.nan], dtype=np.float32))
+        array([  4237, -10000, -32768], dtype=int16)
+    """
+    if out is None:
+        out = np.empty(np.shape(values), dtype=np.int16)
+
+    # One float32 scratch array for the whole conversion
+    scratch = np.subtract(values, offset, dtype=np.float32)
+    scratch /= scale
+    np.rint(scratch, out=scratch)
+    np.clip(scratch, _STORED_MIN, _STORED_MAX, out=scratch)   # NaN stays NaN
+    scratch[np.isnan(scratch)] = nodata
+    np.copyto(out, scratch, casting='unsafe')
+    return out
+
+
+def decode_index(values: np.ndarray, scale: float = INDEX_SCALE, offset: float = INDEX_OFFSET,
+                 nodata: Optional[int] = INDEX_NODATA) -> np.ndarray:
+    """
+    Convert stored int16 values back to float32 real values (nodata = NaN).
+
+    Use this for a block or a small array. Statistics and classification
+    do not need it: they work on the stored values directly.
+    """
+    real = np.asarray(values, dtype=np.float32) * np.float32(scale)
+    if offset != 0.0:
+        real += np.float32(offset)
+    if nodata is not None:
+        real[np.asarray(values) == nodata] = np.nan
+    return real
+
+
+def stored_breaks(breaks: np.ndarray, scale: float = INDEX_SCALE,
+                  offset: float = INDEX_OFFSET) -> np.ndarray:
+    """
+    Convert class breaks from real units to stored values.
+
+    Comparing stored integers with converted breaks gives the same classes
+    as comparing real values with the original breaks, without converting
+    any pixels. Rounding to 6 decimals removes floating point noise such as
+    0.4 / 0.0001 = 4000.0000000000005.
+    """
+    if scale <= 0:
+        raise ValueError(f"Scale must be positive to classify stored values, got {scale}")
+    return np.round((np.asarray(breaks, dtype=np.float64) - offset) / scale, 6)
@@ -0,0 +1,189 @@
+"""
+Spectral Indices - Calculate NDVI, EVI, SAVI, NDWI and NBR in one pass
+
+Calculating NDVI, then EVI, then NBR one after another reads the red and
+near-infrared bands from disk again for every index. This module reads each
+band that any of the requested indices needs exactly once per window, and
+then calculates all of the indices from those same arrays.
+
+Band numbers depend on the sensor, so you describe the bands by role (blue,
+green, red, nir, swir1, swir2) and pick a preset:
+- 'landsat_tm': Landsat 4-7 style stacks (blue=1, green=2, red=3, nir=4) -
+  the same defaults as calculate_ndvi()
+- 'landsat8': Landsat 8/9 OLI (blue=2, green=3, red=4, nir=5, swir1=6, swir2=7)
+- 'sentinel2': Sentinel-2 L2A 12-band stack in the order B01-B08, B8A,
+  B09, B11, B12 (blue=B02=2, green=B03=3, red=B04=4, nir=B08=8,
+  swir1=B11=11, swir2=B12=12)
+
+EVI and SAVI have constants that assume surface reflectance between 0 and
+1. For integer products, pass reflectance_scale and reflectance_offset
+(e.g. 0.0001 and 0 for Sentinel-2 L2A, 0.0000275 and -0.2 for Landsat
+Collection 2 Level-2). Bands that already carry a scale and offset in
+their metadata are converted automatically, so leave these at 1 and 0.
+
+The output can be float32 or int16 scaled by 10000 (output_dtype='int16',
+see scaled_index.py), which is half the size.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from contextlib import ExitStack
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from .band_expressions import (
+    BandExpression,
+    Source,
+    iter_band_windows,
+    open_index_output,
+    write_index_block,
+)
+from .block_stats import RunningStats
+from .io_stats import report_io
+
+# The indices this module knows, written with band roles
+SPECTRAL_INDICES = {
+    'ndvi': BandExpression.normalized_difference('nir', 'red'),
+    'ndwi': BandExpression.normalized_difference('green', 'nir'),    # McFeeters water index
+    'nbr': BandExpression.normalized_difference('nir', 'swir2'),     # burn ratio
+    'evi': BandExpression("2.5 * (nir - red) / (nir + 6 * red - 7.5 * blue + 1)"),
+    'savi': BandExpression("1.5 * (nir - red) / (nir + red + 0.5)"),  # soil-adjusted, L = 0.5
+}
+
+# Band number of every role, for common sensors
+BAND_PRESETS = {
+    'landsat_tm': {'blue': 1, 'green': 2, 'red': 3, 'nir': 4, 'swir1': 5, 'swir2': 6},
+    'landsat8': {'blue': 2, 'green': 3, 'red': 4, 'nir': 5, 'swir1': 6, 'swir2': 7},
+    # B01-B08, B8A, B09, B11, B12 (B10 is not in L2A products)
+    'sentinel2': {'blue': 2, 'green': 3, 'red': 4, 'nir': 8, 'swir1': 11, 'swir2': 12},
+}
+
+
+def _index_expressions(indices: Sequence[str]) -> Dict[str, BandExpression]:
+    expressions = {}
+    for name in indices:
+        if name not in SPECTRAL_INDICES:
+            raise ValueError(f"Unknown index '{name}' (available: {', '.join(sorted(SPECTRAL_INDICES))})")
+        expressions[name] = SPECTRAL_INDICES[name]
+    return expressions
+
+
+def resolve_band_roles(raster_path: str, bands: Union[str, Dict[str, Union[int, Source]]],
+                       roles: Sequence[str]) -> Dict[str, tuple]:
+    """
+    Work out the (raster path, band number) of every band role that is needed.
+
+    Args:
+        raster_path (str): Raster used for roles given as a plain band number
+        bands: A preset name ('landsat8', ...) or a dictionary of roles, where
+            each value is a band number in raster_path, another raster's path
+            (band 1) or (path, band number)
+        roles (Sequence[str]): Roles that the requested indices use
+
+    Returns:
+        Dict[str, tuple]: (raster path, band number) for each role
+    """
+    if isinstance(bands, str):
+        if bands not in BAND_PRESETS:
+            raise ValueError(f"Unknown band preset '{bands}' (available: {', '.join(sorted(BAND_PRESETS))})")
+        bands = BAND_PRESETS[bands]
+
+    bindings = {}
+    for role in roles:
+        if role not in bands:
+            raise ValueError(f"The band mapping has no '{role}' band")
+        source = bands[role]
+        if isinstance(source, (int, np.integer)):
+            bindings[role] = (str(raster_path), int(source))
+        elif isinstance(source, str):
+            bindings[role] = (source, 1)
+        else:
+            bindings[role] = (str(source[0]), int(source[1]))
+    return bindings
+
+
+@report_io
+def calculate_spectral_indices(raster_path: str, indices: Sequence[str] = ('ndvi', 'evi', 'savi', 'ndwi', 'nbr'),
+                               bands: Union[str, Dict[str, Union[int, Source]]] = 'landsat_tm',
+                               output_path: Optional[str] = None, block_size: Optional[int] = None,
+                               reflectance_scale: float = 1.0,
+                               reflectance_offset: float = 0.0,
+                               output_dtype: str = 'float32') -> Dict[str, Any]:
+    """
+    Calculate several spectral indices while reading every band only once.
+
+    Args:
+        raster_path (str): Multispectral raster
+        indices (Sequence[str]): Indices to calculate (see SPECTRAL_INDICES)
+        bands: Band preset name or dictionary of roles (see resolve_band_roles())
+        output_path (str, optional): Write one band per index to this tiled
+            GeoTIFF (band descriptions are the index names)
+        block_size (int, optional): Use square windows of this size instead
+            of the raster's own blocks
+        reflectance_scale, reflectance_offset (float): Convert stored values
+            to reflectance (value * scale + offset) before calculating
+        output_dtype (str): 'float32' (nodata = NaN) or 'int16' (scaled by
+            10000, nodata = -32768)
+
+    Returns:
+        Dict[str, Any]: Statistics for every index and how many band reads
+            were needed
+
+    Example return format:
+        {
+            'indices': {
+                'ndvi': {'min': -0.2, 'max': 0.9, 'mean': 0.41, 'std': 0.2,
+                         'nodata_count': 120},
+                'evi': {...}
+            },
+            'bands_read': ['blue', 'nir', 'red'],
+            'band_reads': 108,               # one per band per window
+            'band_reads_one_at_a_time': 216, # reading the bands again for each index
+            'windows': 36,
+            'output_path': 'indices.tif'
+        }
+    """
+    expressions = _index_expressions(indices)
+    roles = sorted({role for expression in expressions.values() for role in expression.variables})
+    bindings = resolve_band_roles(raster_path, bands, roles)
+
+    stats = {name: RunningStats() for name in expressions}
+    window_count = 0
+
+    with ExitStack() as stack:
+        dst = None
+        if output_path is not None:
+            dst = stack.enter_context(open_index_output(output_path, bindings[roles[0]][0],
+                                                        count=len(expressions), output_dtype=output_dtype))
+            dst.descriptions = tuple(expressions)
+
+        for window, arrays, valid in iter_band_windows(bindings, block_size):
+            # Convert every band to float32 (and reflectance) once, not per index
+            for role, values in arrays.items():
+                values = values.astype(np.float32)
+                if reflectance_scale != 1.0 or reflectance_offset != 0.0:
+                    values *= reflectance_scale
+                    values += reflectance_offset
+                arrays[role] = values
+
+            for band_index, (name, expression) in enumerate(expressions.items(), start=1):
+                result = expression.evaluate(arrays, valid)
+                calculated = result[~np.isnan(result)]
+                stats[name].add_values(calculated, nodata_count=result.size - calculated.size)
+                if dst is not None:
+                    write_index_block(dst, result, band_index, window)
+            window_count += 1
+
+    return {
+        'indices': {name: accumulator.to_dict() for name, accumulator in stats.items()},
+        'bands_read': roles,
+        'band_reads': len(roles) * window_count,
+        'band_reads_one_at_a_time': sum(len(e.variables) for e in expressions.values()) * window_count,
+        'windows': window_count,
+        'output_path': output_path
+    }
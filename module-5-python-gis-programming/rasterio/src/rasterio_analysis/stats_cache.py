@@ -0,0 +1,184 @@
+"""
+Statistics Cache - Remember raster statistics between runs
+
+Calculating statistics means reading every pixel of a raster. When the same
+archive of unchanged GeoTIFFs is summarized again and again, that work is
+repeated for nothing.
+
+This module stores results in a small SQLite database on disk. Each entry
+is keyed by the file's path, the band number and the kind of result, and
+remembers the file's size and modification time. If the file changes, the
+old entry no longer matches and the statistics are recalculated.
+
+By default the database lives in ~/.cache/rasterio_analysis/stats.sqlite.
+Set the RASTERIO_STATS_CACHE environment variable to use a different file.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from .block_stats import stream_multiband_stats
+from .dataset_cache import open_raster
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "rasterio_analysis" / "stats.sqlite"
+
+
+class StatsCache:
+    """
+    On-disk cache of raster statistics keyed by file fingerprint.
+
+    Args:
+        db_path (str, optional): SQLite file to use (default: RASTERIO_STATS_CACHE
+            environment variable, or ~/.cache/rasterio_analysis/stats.sqlite)
+
+    Example:
+        >>> cache = StatsCache('stats.sqlite')
+        >>> cache.put('dem.tif', 'band_stats', {'min': 0.0, 'max': 10.0}, band=1)
+        >>> cache.get('dem.tif', 'band_stats', band=1)
+        {'min': 0.0, 'max': 10.0}
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        if db_path is None:
+            db_path = os.environ.get("RASTERIO_STATS_CACHE", DEFAULT_CACHE_PATH)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                " path TEXT NOT NULL, kind TEXT NOT NULL, band INTEGER NOT NULL,"
+                " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, result TEXT NOT NULL,"
+                " PRIMARY KEY (path, kind, band))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A generous timeout lets several processes share one cache file
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def fingerprint(raster_path: str):
+        """Return (absolute path, size, mtime) or None if the file is not local."""
+        try:
+            stat = os.stat(raster_path)
+        except (OSError, TypeError, ValueError):
+            return None
+        return str(Path(raster_path).resolve()), stat.st_size, stat.st_mtime_ns
+
+    def get(self, raster_path: str, kind: str, band: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Look up a stored result.
+
+        Returns None if nothing is stored, the file is not a local file, or
+        the file has changed since the result was stored.
+        """
+        fingerprint = self.fingerprint(raster_path)
+        if fingerprint is None:
+            self.misses += 1
+            return None
+        path, size, mtime_ns = fingerprint
+
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT size, mtime_ns, result FROM stats WHERE path = ? AND kind = ? AND band = ?",
+                (path, kind, band)
+            ).fetchone()
+
+        if row is None or (row[0], row[1]) != (size, mtime_ns):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[2])
+
+    def put(self, raster_path: str, kind: str, result: Dict[str, Any], band: int = 0,
+            fingerprint: Optional[tuple] = None):
+        """
+        Store a JSON-serializable result for a file (ignored for remote files).
+
+        Pass the file's fingerprint() from before the result was calculated:
+        if the file is replaced while the statistics are being calculated,
+        they are then stored under the old file's size and time and never
+        served for the new file. By default the file's current fingerprint
+        is used.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(raster_path)
+        if fingerprint is None:
+            return
+        path, size, mtime_ns = fingerprint
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stats (path, kind, band, size, mtime_ns, result)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (path, kind, band, size, mtime_ns, json.dumps(result))
+            )
+
+    def invalidate(self, raster_path: str):
+        """Forget every stored result for one file."""
+        path = str(Path(raster_path).resolve())
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM stats WHERE path = ?", (path,))
+
+    def clear(self):
+        """Forget every stored result."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM stats")
+
+
+def cached_multiband_stats(raster_path: str, bands: Optional[Sequence[int]] = None,
+                           cache: Optional[StatsCache] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Same as stream_multiband_stats(), but reuses statistics stored on disk.
+
+    Only the bands that are missing from the cache (or whose file changed)
+    are read from the raster.
+
+    Args:
+        raster_path (str): Path to the raster file
+        bands (Sequence[int], optional): Band numbers to analyze (None = all bands)
+        cache (StatsCache, optional): Cache to use (default: StatsCache())
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Statistics for each band, keyed by band number
+    """
+    cache = cache if cache is not None else StatsCache()
+    # Fingerprint the file before reading it (see StatsCache.put())
+    fingerprint = cache.fingerprint(raster_path)
+
+    if bands is None:
+        stored = cache.get(raster_path, 'band_count')
+        if stored is None:
+            with open_raster(raster_path) as src:
+                stored = {'count': src.count}
+            cache.put(raster_path, 'band_count', stored, fingerprint=fingerprint)
+        bands = range(1, stored['count'] + 1)
+
+    results = {}
+    missing = []
+    for band_number in bands:
+        stored = cache.get(raster_path, 'band_stats', band=band_number)
+        if stored is None:
+            missing.append(band_number)
+        else:
+            results[band_number] = stored
+
+    if missing:
+        for band_number, band_stats in stream_multiband_stats(raster_path, missing).items():
+            cache.put(raster_path, 'band_stats', band_stats, band=band_number, fingerprint=fingerprint)
+            results[band_number] = band_stats
+
+    return {band_number: results[band_number] for band_number in bands}
@@ -0,0 +1,265 @@
+"""
+Streaming Point Sampling - Sample any number of points in constant memory
+
+sample_raster_at_points() takes a Python list of (x, y) tuples and returns
+a dictionary of Python lists. Every coordinate and every value becomes a
+separate Python object (about 30 bytes each, instead of 8 in a numpy
+array), and all of them have to fit in memory at the same time. For a few
+thousand weather stations that does not matter; for 50 million GPS points
+it does.
+
+This module streams the points instead:
+1. The points are taken in fixed-size chunks (100,000 by default) from a
+   numpy array, a pyarrow Table/RecordBatch, or any iterable of (x, y)
+   tuples - even a generator that reads a huge CSV line by line.
+2. Each chunk is sampled with point_sampling.sample_points(). One block
+   reader (and its block cache) is shared by all chunks, so blocks that
+   the next chunk needs again are often still in memory.
+3. Each chunk comes out as a numpy record array or a pyarrow RecordBatch
+   with the columns point_id, x, y, band_1, band_2, ... - or is written
+   straight to a Parquet or CSV file.
+
+Only one chunk is held in memory at any time, however many points there
+are. point_id is the position of the point in the input (0, 1, 2, ...),
+so the results can be joined back to the original points.
+
+Arrow output and Parquet files need the optional pyarrow package
+(pip install pyarrow). CSV output does not.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .batch_inventory import import_pyarrow
+from .dataset_cache import open_raster
+from .interpolation import KERNEL_MARGIN, check_method
+from .io_stats import report_io
+from .point_sampling import DEFAULT_CACHE_BLOCKS, BlockReader, sample_points
+
+# Number of points sampled (and held in memory) at a time
+DEFAULT_CHUNK_POINTS = 100_000
+
+# Formats of the yielded batches, and of the output files
+BATCH_FORMATS = ('numpy', 'arrow')
+OUTPUT_FORMATS = ('parquet', 'csv')
+
+
+def iter_point_chunks(points: Any, chunk_points: int = DEFAULT_CHUNK_POINTS, x_column: str = 'x',
+                      y_column: str = 'y') -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Split points into chunks of float64 x and y coordinate arrays.
+
+    Args:
+        points: An (n, 2) numpy array, a pyarrow Table or RecordBatch with
+            x and y columns, a pyarrow StructArray with x and y fields, or
+            any iterable of (x, y) pairs
+        chunk_points (int): Largest number of points per chunk
+        x_column, y_column (str): Column (or field) names for Arrow input
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: (xs, ys) of the next chunk
+    """
+    if chunk_points < 1:
+        raise ValueError(f"chunk_points must be at least 1, got {chunk_points}")
+
+    # numpy arrays: slices are views, so nothing is copied up front
+    if isinstance(points, np.ndarray):
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError(f"A numpy array of points must have shape (n, 2), got {points.shape}")
+        for start in range(0, len(points), chunk_points):
+            chunk = points[start:start + chunk_points]
+            yield chunk[:, 0].astype(np.float64), chunk[:, 1].astype(np.float64)
+        return
+
+    # pyarrow Tables, RecordBatches (.column) and StructArrays (.field)
+    if (hasattr(points, 'column') or hasattr(points, 'field')) and hasattr(points, 'slice'):
+        for start in range(0, len(points), chunk_points):
+            chunk = points.slice(start, chunk_points)
+            get_column = getattr(chunk, 'column', None) or chunk.field
+            yield (np.asarray(get_column(x_column), dtype=np.float64),
+                   np.asarray(get_column(y_column), dtype=np.float64))
+        return
+
+    # Anything else is read as an iterable of (x, y) pairs, one chunk at a time
+    iterator = iter(points)
+    pair = np.dtype((np.float64, 2))
+    while True:
+        chunk = np.fromiter(islice(iterator, chunk_points), dtype=pair)
+        if chunk.size == 0:
+            return
+        yield chunk[:, 0], chunk[:, 1]
+
+
+def _sample_chunks(raster_path: str, points: Any, bands: Optional[Sequence[int]], chunk_points: int,
+                   interpolation: str, order: Optional[str], cache_blocks: int, x_column: str,
+                   y_column: str) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]]:
+    """Yield (first point_id, xs, ys, values, info) for every chunk, sharing one block reader."""
+    check_method(interpolation)
+    bands = list(bands) if bands is not None else [1]
+    first_id = 0
+    with open_raster(raster_path) as src:
+        for band_number in bands:
+            if not 1 <= band_number <= src.count:
+                raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+        reader = BlockReader(src, bands, cache_blocks, margin=KERNEL_MARGIN[interpolation])
+        for xs, ys in iter_point_chunks(points, chunk_points, x_column, y_column):
+            values, info = sample_points(src, xs, ys, bands, order, cache_blocks, interpolation, reader)
+            yield first_id, xs, ys, values, info
+            first_id += xs.size
+
+
+def _column_names(bands: Optional[Sequence[int]]) -> List[str]:
+    return ['point_id', 'x', 'y'] + [f'band_{band_number}' for band_number in (bands or [1])]
+
+
+def _to_batch(first_id: int, xs: np.ndarray, ys: np.ndarray, values: np.ndarray,
+              names: List[str], batch_format: str):
+    """One chunk as a numpy record array or a pyarrow RecordBatch."""
+    columns = [np.arange(first_id, first_id + xs.size, dtype=np.int64), xs, ys] + list(values.T)
+    if batch_format == 'arrow':
+        pa = import_pyarrow()
+        return pa.RecordBatch.from_arrays([pa.array(column) for column in columns], names=names)
+    batch = np.empty(xs.size, dtype=[('point_id', np.int64)] + [(name, np.float64) for name in names[1:]])
+    for name, column in zip(names, columns, strict=True):
+        batch[name] = column
+    return batch
+
+
+def iter_sample_batches(raster_path: str, points: Any, bands: Optional[Sequence[int]] = None,
+                        chunk_points: int = DEFAULT_CHUNK_POINTS, batch_format: str = 'numpy',
+                        interpolation: str = 'nearest', order: Optional[str] = None,
+                        cache_blocks: int = DEFAULT_CACHE_BLOCKS, x_column: str = 'x',
+                        y_column: str = 'y') -> Iterator[Any]:
+    """
+    Sample a raster at any number of points, one chunk of points at a time.
+
+    Args:
+        raster_path (str): Path to the raster file
+        points: Point coordinates in the raster's CRS (see iter_point_chunks())
+        bands (Sequence[int], optional): Band numbers to sample (default: band 1)
+        chunk_points (int): Number of points sampled at a time
+        batch_format (str): 'numpy' (record arrays) or 'arrow' (pyarrow RecordBatches)
+        interpolation (str): 'nearest', 'bilinear' or 'cubic'
+        order (str, optional): Block order within each chunk (see sample_points())
+        cache_blocks (int): Number of blocks kept in the shared block cache
+        x_column, y_column (str): Column names for Arrow input
+
+    Yields:
+        One batch per chunk with the columns point_id, x, y, band_1, ...
+        (NaN for points outside the raster or on nodata pixels)
+
+    Example:
+        >>> for batch in iter_sample_batches('dem.tif', gps_points, chunk_points=50000):
+        ...     high = batch[batch['band_1'] > 3000]
+    """
+    if batch_format not in BATCH_FORMATS:
+        raise ValueError(f"batch_format must be one of {', '.join(BATCH_FORMATS)}, got {batch_format!r}")
+    names = _column_names(bands)
+    for first_id, xs, ys, values, _ in _sample_chunks(raster_path, points, bands, chunk_points, interpolation,
+                                                       order, cache_blocks, x_column, y_column):
+        yield _to_batch(first_id, xs, ys, values, names, batch_format)
+
+
+def _output_format(output_path: str, output_format: Optional[str]) -> str:
+    if output_format is None:
+        suffix = Path(output_path).suffix.lower()
+        output_format = 'parquet' if suffix in ('.parquet', '.pq') else 'csv' if suffix == '.csv' else suffix
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be 'parquet' or 'csv', got {output_format!r}")
+    return output_format
+
+
+@report_io
+def write_sampled_points(raster_path: str, points: Any, output_path: str, bands: Optional[Sequence[int]] = None,
+                         output_format: Optional[str] = None, chunk_points: int = DEFAULT_CHUNK_POINTS,
+                         interpolation: str = 'nearest', order: Optional[str] = None,
+                         cache_blocks: int = DEFAULT_CACHE_BLOCKS, x_column: str = 'x',
+                         y_column: str = 'y') -> Dict[str, Any]:
+    """
+    Sample a raster at any number of points and write the values to a file.
+
+    Each chunk is written as soon as it is sampled (one Parquet row group,
+    or a block of CSV lines), so memory use does not grow with the number
+    of points. The file is written under a temporary name and only renamed
+    to output_path when it is complete.
+
+    Args:
+        raster_path (str): Path to the raster file
+        points: Point coordinates in the raster's CRS (see iter_point_chunks())
+        output_path (str): File to write (.parquet/.pq or .csv)
+        bands (Sequence[int], optional): Band numbers to sample (default: band 1)
+        output_format (str, optional): 'parquet' or 'csv' (default: from the
+            file extension)
+        (the other arguments are the same as for iter_sample_batches())
+
+    Returns:
+        Dict[str, Any]: What was written, with block reading counts
+
+    Example return format:
+        {
+            'output_path': 'samples.parquet',
+            'output_format': 'parquet',
+            'points': 2000000,
+            'chunks': 20,
+            'points_inside': 1999514,
+            'points_outside': 486,
+            'blocks_read': 312,
+            'cache_hits': 1288,
+            'cache_hit_rate': 0.805,
+            'bytes_read': 40894464
+        }
+    """
+    output_format = _output_format(output_path, output_format)
+    names = _column_names(bands)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = f"{output_path}.tmp"
+
+    summary = {'output_path': output_path, 'output_format': output_format, 'points': 0, 'chunks': 0,
+               'points_inside': 0, 'points_outside': 0}
+    writer = None
+    try:
+        if output_format == 'parquet':
+            pa = import_pyarrow()
+            schema = pa.schema([('point_id', pa.int64())] + [(name, pa.float64()) for name in names[1:]])
+            writer = pa.parquet.ParquetWriter(temp_path, schema)
+        else:
+            writer = open(temp_path, 'w', encoding='utf-8')
+            writer.write(','.join(names) + '\n')
+            formats = ['%d'] + ['%.17g'] * (len(names) - 1)
+
+        chunks = _sample_chunks(raster_path, points, bands, chunk_points, interpolation, order,
+                                cache_blocks, x_column, y_column)
+        info = {}
+        for first_id, xs, ys, values, info in chunks:
+            if output_format == 'parquet':
+                writer.write_batch(_to_batch(first_id, xs, ys, values, names, 'arrow'))
+            else:
+                np.savetxt(writer, _to_batch(first_id, xs, ys, values, names, 'numpy'),
+                           fmt=formats, delimiter=',')
+            summary['points'] += xs.size
+            summary['chunks'] += 1
+            summary['points_inside'] += info['points_inside']
+            summary['points_outside'] += info['points_outside']
+        # The block reader's counts already add up over all chunks
+        for key in ('blocks_read', 'cache_hits', 'cache_hit_rate', 'bytes_read'):
+            summary[key] = info.get(key, 0)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)  # never leave a half-written file behind
+        raise
+
+    writer.close()
+    os.replace(temp_path, output_path)
+    return summary
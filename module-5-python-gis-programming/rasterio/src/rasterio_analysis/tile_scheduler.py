@@ -0,0 +1,210 @@
+"""
+Tile Scheduler - Use several CPU cores for block-by-block raster processing
+
+block_stats.py reads a raster one block at a time on a single core. Most of
+the time goes into decompressing blocks (GDAL) and reducing them (numpy),
+and both of those release Python's GIL - so several threads can really run
+at the same time.
+
+This module splits a raster's block windows into small batches and hands
+them to a ThreadPoolExecutor. Every thread gets its own open dataset (through
+the dataset cache, which the tasks see because they run in a copy of the
+caller's context), because one GDAL dataset must not be read from two
+threads at once. Partial results are merged in the original block order, so
+the answer is exactly the same no matter how many workers are used.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from rasterio.windows import Window
+
+from .band_expressions import iter_band_windows
+from .band_math import NDVI, _add_ndvi_block
+from .block_stats import (
+    RunningStats,
+    band_scaling,
+    multiband_block_moments,
+    valid_block_values,
+)
+from .dataset_cache import open_raster, use_dataset_cache
+from .io_stats import report_io
+from .scaled_index import INDEX_NODATA, INDEX_OFFSET, INDEX_SCALE, encode_index
+
+# Number of blocks each task handles. It is fixed (not based on max_workers)
+# so that the merge order - and therefore the result - never changes.
+DEFAULT_BLOCKS_PER_TASK = 16
+
+
+def run_block_tasks(raster_path: str, task: Callable[[Any, List[Window]], Any],
+                    band_number: int = 1, max_workers: Optional[int] = None,
+                    blocks_per_task: int = DEFAULT_BLOCKS_PER_TASK) -> List[Any]:
+    """
+    Run `task(src, windows)` on batches of block windows using a thread pool.
+
+    Args:
+        raster_path (str): Path or URL of the raster
+        task (Callable): Function called with an open dataset (private to the
+            worker thread) and a list of windows; returns a partial result
+        band_number (int): Band whose block layout should be used
+        max_workers (int, optional): Number of threads (None = Python's default)
+        blocks_per_task (int): Number of block windows per task
+
+    Returns:
+        List[Any]: One partial result per batch, in block order
+    """
+    if blocks_per_task < 1:
+        raise ValueError(f"blocks_per_task must be at least 1, got {blocks_per_task}")
+
+    with use_dataset_cache():
+        with open_raster(raster_path) as src:
+            windows = [window for _, window in src.block_windows(band_number)]
+
+        batches = [windows[i:i + blocks_per_task] for i in range(0, len(windows), blocks_per_task)]
+
+        def run_batch(batch: List[Window]) -> Any:
+            # open_raster() hands every worker thread its own dataset
+            with open_raster(raster_path) as worker_src:
+                return task(worker_src, batch)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Each task runs in its own copy of this context, so the workers
+            # use this dataset cache and are counted by an active track_io()
+            # block. Results come back in batch order.
+            futures = [pool.submit(contextvars.copy_context().run, run_batch, batch) for batch in batches]
+            return [future.result() for future in futures]
+
+
+@report_io
+def parallel_band_stats(raster_path: str, band_number: int = 1, max_workers: Optional[int] = None,
+                        blocks_per_task: int = DEFAULT_BLOCKS_PER_TASK) -> Dict[str, Any]:
+    """
+    Same result as stream_band_stats(), calculated with several threads.
+
+    Args:
+        raster_path (str): Path to the raster file
+        band_number (int): Which band to analyze (1-based indexing)
+        max_workers (int, optional): Number of threads (None = Python's default)
+        blocks_per_task (int): Number of block windows per task
+
+    Returns:
+        Dict[str, Any]: Same keys as get_raster_stats()
+    """
+    with open_raster(raster_path) as src:
+        if not 1 <= band_number <= src.count:
+            raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+        scaling = band_scaling(src, band_number)
+
+    def task(src, windows):
+        stats = RunningStats()
+        for window in windows:
+            values, nodata_count = valid_block_values(src.read(band_number, window=window), src.nodata)
+            stats.add_values(values, nodata_count)
+        return stats
+
+    total = RunningStats()
+    for partial in run_block_tasks(raster_path, task, band_number, max_workers, blocks_per_task):
+        total.merge(partial)
+    return total.to_dict(*scaling)
+
+
+def parallel_multiband_stats(raster_path: str, bands: Optional[Sequence[int]] = None,
+                             max_workers: Optional[int] = None,
+                             blocks_per_task: int = DEFAULT_BLOCKS_PER_TASK) -> Dict[int, Dict[str, Any]]:
+    """
+    Same result as stream_multiband_stats(), calculated with several threads.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: Statistics for each band, keyed by band number
+    """
+    with open_raster(raster_path) as src:
+        bands = list(bands) if bands is not None else list(src.indexes)
+        for band_number in bands:
+            if not 1 <= band_number <= src.count:
+                raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+        nodata_values = [src.nodatavals[band_number - 1] for band_number in bands]
+        scalings = [band_scaling(src, band_number) for band_number in bands]
+
+    def task(src, windows):
+        partial = [RunningStats() for _ in bands]
+        for window in windows:
+            block_stats = multiband_block_moments(src.read(bands, window=window), nodata_values)
+            for accumulator, block in zip(partial, block_stats, strict=True):
+                accumulator.merge(block)
+        return partial
+
+    totals = [RunningStats() for _ in bands]
+    for partial in run_block_tasks(raster_path, task, bands[0], max_workers, blocks_per_task):
+        for accumulator, block in zip(totals, partial, strict=True):
+            accumulator.merge(block)
+    return {band_number: stats.to_dict(*scaling)
+            for band_number, stats, scaling in zip(bands, totals, scalings, strict=True)}
+
+
+@report_io
+def parallel_ndvi(raster_path: str, red_band: int = 3, nir_band: int = 4,
+                  max_workers: Optional[int] = None,
+                  blocks_per_task: int = DEFAULT_BLOCKS_PER_TASK,
+                  scaled: bool = False) -> Dict[str, Any]:
+    """
+    Same result as calculate_ndvi(), calculated with several threads.
+
+    Every batch of blocks is read with iter_band_windows() and calculated
+    with the NDVI expression, exactly like calculate_ndvi() does, so GDAL's
+    valid-data masks and band scale/offset are used the same way. Every
+    worker writes its blocks straight into one shared output array (the
+    blocks never overlap, so no locking is needed) and returns the
+    statistics of the blocks it handled.
+
+    Args:
+        scaled (bool): Return the NDVI array as int16 x 10000 (see calculate_ndvi())
+
+    Returns:
+        Dict[str, Any]: Same keys as calculate_ndvi()
+    """
+    with open_raster(raster_path) as src:
+        if src.count < max(red_band, nir_band):
+            raise ValueError(f"Raster only has {src.count} bands, but you requested bands {red_band} and {nir_band}")
+        ndvi = np.empty((src.height, src.width), dtype=np.int16 if scaled else np.float32)
+    bindings = {'red': (str(raster_path), red_band), 'nir': (str(raster_path), nir_band)}
+
+    def task(src, windows):
+        stats = RunningStats()
+        vegetation_pixels = valid_pixels = 0
+        for window, arrays, valid in iter_band_windows(bindings, windows=windows):
+            # Float NDVI goes straight into this block's part of `ndvi`
+            block_ndvi = NDVI.evaluate(arrays, valid, out=None if scaled else ndvi[window.toslices()])
+            valid_pixels += valid.count()   # both bands valid (popcount)
+            vegetation_pixels += _add_ndvi_block(stats, block_ndvi)
+            if scaled:
+                encode_index(block_ndvi, out=ndvi[window.toslices()])
+        return stats, vegetation_pixels, valid_pixels
+
+    total = RunningStats()
+    vegetation_pixels = total_pixels = 0
+    for stats, vegetation, valid in run_block_tasks(raster_path, task, red_band, max_workers, blocks_per_task):
+        total.merge(stats)
+        vegetation_pixels += vegetation
+        total_pixels += valid
+
+    result = {
+        'ndvi_array': ndvi,
+        'min_ndvi': total.min,
+        'max_ndvi': total.max,
+        'mean_ndvi': total.mean if total.count else None,
+        'vegetation_pixels': vegetation_pixels,
+        'total_pixels': total_pixels,
+        'nodata_pixels': ndvi.size - total_pixels
+    }
+    if scaled:
+        result.update({'scale_factor': INDEX_SCALE, 'offset': INDEX_OFFSET,
+                       'nodata_value': INDEX_NODATA})
+    return result
@@ -0,0 +1,213 @@
+"""
+Zonal Statistics - Raster statistics for every polygon of a GeoDataFrame
+
+"What is the mean elevation of each census tract?" or "What is the mean
+NDVI of each watershed?" The simple way loops over the polygons, masks the
+raster with each one (rasterio.mask.mask) and calls np.mean(). With
+thousands of polygons that reads the same pixels again and again.
+
+This module does it in a single pass over the raster:
+1. Every polygon gets a zone ID (1, 2, 3, ...; 0 means "no polygon").
+2. The raster is read one window at a time. For each window, only the
+   polygons that touch it are burned into a zone-ID array with
+   rasterio.features.rasterize().
+3. np.bincount() adds up the count, sum, sum of squares, and (with
+   np.minimum.at / np.maximum.at) the minimum and maximum of every zone in
+   that window at once - no Python loop over the polygons.
+
+The running totals are tiny (a few numbers per polygon), so any raster
+size and any number of polygons fit in memory. The results come back as
+columns joined to the input GeoDataFrame.
+
+Like rasterio.features.rasterize(), a pixel belongs to a polygon when its
+centre is inside it (or when the polygon touches it at all, with
+all_touched=True). Where polygons overlap, the one that comes later in the
+GeoDataFrame gets the pixel.
+
+You don't need to modify this module!
+
+Course: GIST 604B - Open Source GIS Programming
+Assignment: Python Rasterio - Working with Raster Data
+"""
+
+# Import the libraries we need
+from typing import Any, Dict, Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+from rasterio.features import rasterize
+from rasterio.windows import Window
+from rasterio.windows import bounds as window_bounds
+from shapely.geometry import box
+
+from .block_stats import band_scaling
+from .dataset_cache import open_raster
+from .io_stats import report_io
+
+# Statistics zonal_stats() can calculate
+ZONAL_STATS = ('count', 'sum', 'mean', 'std', 'min', 'max')
+
+# Side of the square windows read (and rasterized) at a time, in pixels
+DEFAULT_ZONE_WINDOW = 1024
+
+
+class ZoneAccumulator:
+    """
+    Running count, sum, sum of squares, min and max for many zones at once.
+
+    Zone 0 is the background (pixels outside every polygon) and is kept
+    like any other zone, so no masking is needed before np.bincount().
+
+    Example:
+        >>> totals = ZoneAccumulator(2)
+        >>> totals.add(np.array([1, 1, 2, 0]), np.array([1.0, 3.0, 5.0, 9.0]))
+        >>> totals.results()['mean']
+        array([2., 5.])
+    """
+
+    def __init__(self, n_zones: int, extremes: bool = True):
+        size = n_zones + 1
+        self.count = np.zeros(size, dtype=np.int64)
+        self.sum = np.zeros(size)
+        self.sum_squares = np.zeros(size)
+        self.min = np.full(size, np.inf) if extremes else None
+        self.max = np.full(size, -np.inf) if extremes else None
+        # Values are stored relative to the first window's mean, so the
+        # squares of large numbers like elevations keep their precision
+        self.shift = None
+
+    def add(self, zones: np.ndarray, values: np.ndarray):
+        """Add 1D arrays of zone IDs and their (valid) pixel values."""
+        if zones.size == 0:
+            return
+        values = values.astype(np.float64)
+        if self.shift is None:
+            self.shift = float(values.mean())
+        values -= self.shift
+
+        size = self.count.size
+        self.count += np.bincount(zones, minlength=size)
+        self.sum += np.bincount(zones, weights=values, minlength=size)
+        self.sum_squares += np.bincount(zones, weights=values * values, minlength=size)
+        if self.min is not None:
+            np.minimum.at(self.min, zones, values)
+            np.maximum.at(self.max, zones, values)
+
+    def results(self, scale: float = 1.0, offset: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Statistics for zones 1 ... n (NaN where a zone has no valid pixels).
+
+        Pass the band's scale and offset (see block_stats.band_scaling()) to
+        report stored integers like NDVI x 10000 in real units.
+        """
+        count = self.count[1:]
+        shift = self.shift or 0.0
+        has_data = count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.sum[1:] / count
+            variance = np.maximum(self.sum_squares[1:] / count - mean * mean, 0.0)
+
+        results = {
+            'count': count,
+            'sum': np.where(has_data, (self.sum[1:] + shift * count) * scale + offset * count, np.nan),
+            'mean': np.where(has_data, (mean + shift) * scale + offset, np.nan),
+            # (a single pixel has no spread, even if rounding says otherwise)
+            'std': np.where(has_data, np.where(count > 1, np.sqrt(variance) * abs(scale), 0.0), np.nan)
+        }
+        if self.min is not None:
+            low = np.where(has_data, (self.min[1:] + shift) * scale + offset, np.nan)
+            high = np.where(has_data, (self.max[1:] + shift) * scale + offset, np.nan)
+            # A negative scale swaps the smallest and largest values
+            results['min'], results['max'] = np.fmin(low, high), np.fmax(low, high)
+        return results
+
+
+def _valid_pixels(block: np.ndarray, nodata: Optional[float]) -> np.ndarray:
+    """Same rule as the other statistics: not equal to nodata, and not NaN."""
+    valid = ~np.isnan(block) if block.dtype.kind == 'f' else np.ones(block.shape, dtype=bool)
+    if nodata is not None and not np.isnan(nodata):
+        valid &= block != nodata
+    return valid
+
+
+@report_io
+def zonal_stats(raster_path: str, zones: gpd.GeoDataFrame, band_number: int = 1,
+                stats: Sequence[str] = ZONAL_STATS, all_touched: bool = False,
+                prefix: str = '', window_size: int = DEFAULT_ZONE_WINDOW) -> gpd.GeoDataFrame:
+    """
+    Calculate raster statistics for every polygon in a single pass.
+
+    Args:
+        raster_path (str): Path to the raster file
+        zones (gpd.GeoDataFrame): Polygons (any CRS - they are reprojected
+            to the raster's CRS if needed)
+        band_number (int): Band to summarize
+        stats (Sequence[str]): Statistics to add, from 'count', 'sum',
+            'mean', 'std', 'min' and 'max'
+        all_touched (bool): Count every pixel a polygon touches, not just
+            the pixels whose centre is inside it
+        prefix (str): Put in front of every new column name (like 'elev_')
+        window_size (int): Side of the windows read at a time, in pixels
+
+    Returns:
+        gpd.GeoDataFrame: A copy of zones with one new column per statistic
+            (NaN for polygons that cover no valid pixels). Inside track_io(),
+            result.attrs['io_stats'] holds the I/O counts.
+
+    Example:
+        >>> tracts = gpd.read_file('census_tracts.gpkg')
+        >>> result = zonal_stats('elevation.tif', tracts, stats=['mean', 'max'], prefix='elev_')
+        >>> result[['GEOID', 'elev_mean', 'elev_max']].head()
+    """
+    unknown = [name for name in stats if name not in ZONAL_STATS]
+    if unknown:
+        raise ValueError(f"Unknown statistics {unknown} (use any of {', '.join(ZONAL_STATS)})")
+    if window_size < 1:
+        raise ValueError(f"window_size must be at least 1, got {window_size}")
+
+    with open_raster(raster_path) as src:
+        if not 1 <= band_number <= src.count:
+            raise ValueError(f"Raster only has {src.count} bands, but you requested band {band_number}")
+
+        # STEP 1: Put the polygons in the raster's CRS and number them 1 ... n
+        geometries = zones.geometry
+        if zones.crs is not None and src.crs is not None and zones.crs != src.crs:
+            geometries = geometries.to_crs(src.crs)
+        zone_ids = np.arange(1, len(geometries) + 1, dtype=np.int32)
+        has_shape = (geometries.notna() & ~geometries.is_empty).to_numpy()
+        spatial_index = geometries.sindex
+
+        nodata = src.nodatavals[band_number - 1]
+        totals = ZoneAccumulator(len(geometries), extremes=('min' in stats or 'max' in stats))
+
+        # STEP 2: Walk the raster one window at a time
+        for row in range(0, src.height, window_size):
+            for col in range(0, src.width, window_size):
+                window = Window(col, row, min(window_size, src.width - col), min(window_size, src.height - row))
+
+                # STEP 3: Find the polygons that touch this window (skip it if none do)
+                hits = spatial_index.query(box(*window_bounds(window, src.transform)))
+                hits = np.sort(hits[has_shape[hits]])  # keep the GeoDataFrame's drawing order
+                if hits.size == 0:
+                    continue
+
+                # STEP 4: Burn their zone IDs into an array the size of the window
+                zone_grid = rasterize(
+                    zip(geometries.iloc[hits], zone_ids[hits], strict=True),
+                    out_shape=(window.height, window.width),
+                    transform=src.window_transform(window),
+                    fill=0, all_touched=all_touched, dtype='int32'
+                )
+
+                # STEP 5: Add the valid pixels inside a polygon to the running totals
+                block = src.read(band_number, window=window)
+                keep = (zone_grid > 0) & _valid_pixels(block, nodata)
+                totals.add(zone_grid[keep], block[keep])
+
+        results = totals.results(*band_scaling(src, band_number))
+
+    # STEP 6: Join the statistics to the polygons
+    output = zones.copy()
+    for name in stats:
+        output[prefix + name] = results[name]
+    return output
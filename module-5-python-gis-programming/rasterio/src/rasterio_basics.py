@@ -12,6 +12,7 @@ Course: GIST 604B - Open Source GIS Programming
 Assignment: Python Rasterio - Simplified Raster Data Processing
 """
 
+import importlib
 import rasterio
 import numpy as np
 import matplotlib.pyplot as plt
@@ -74,7 +75,8 @@ def load_and_explore_raster(raster_path: str) -> Dict[str, Any]:
 
 
 def calculate_raster_statistics(raster_path: str, band_number: int = 1,
-                               exclude_nodata: bool = True) -> Dict[str, float]:
+                               exclude_nodata: bool = True,
+                               streaming: bool = False) -> Dict[str, float]:
     """
     Calculate comprehensive statistics for a specific band in a raster dataset.
 
@@ -85,6 +87,8 @@ def calculate_raster_statistics(raster_path: str, band_number: int = 1,
         raster_path (str): Path to the raster file
         band_number (int): Band number to analyze (1-based indexing)
         exclude_nodata (bool): Whether to exclude nodata values from calculations
+        streaming (bool): Read the band block by block for rasters that do not
+            fit in memory
 
     Returns:
         Dict[str, float]: Dictionary containing statistical measures:
@@ -112,6 +116,12 @@ def calculate_raster_statistics(raster_path: str, band_number: int = 1,
     #
     # STEP 2: Read the specified band as a numpy array
     # HINT: Use dataset.read(band_number) to get the data
+    # HINT: If streaming is True, skip the full read and return
+    #       _streaming_stats_calculation(dataset, band_number, exclude_nodata)
+    # HINT: To skip recalculating unchanged files, look the result up first with
+    #       rasterio_analysis.stats_cache.StatsCache().get(raster_path, kind, band_number)
+    # HINT: For a quick estimate on huge files, read an overview instead with
+    #       rasterio_analysis.overviews.read_decimated(dataset, [band_number], max_pixels)
     #
     # STEP 3: Handle nodata values
     # HINT: Get nodata value with dataset.nodata
@@ -178,6 +188,8 @@ def extract_raster_subset(raster_path: str, bounds: Tuple[float, float, float, f
     # STEP 5: If output_path is provided, save the clipped raster
     # HINT: Use rasterio.open() in write mode with the same profile as source
     # HINT: Update the profile with new transform, width, height
+    # HINT: To save it as a tiled, compressed Cloud-Optimized GeoTIFF instead, use
+    #       rasterio_analysis.cog_writer.write_cog(output_path, clipped_data, profile)
     #
     # STEP 6: Return comprehensive information about the operation
     # HINT: Include original bounds, subset bounds, dimensions, and file info
@@ -248,6 +260,17 @@ def visualize_raster_data(raster_path: str, band_number: int = 1,
 
 # Helper functions (students don't need to modify these)
 
+def _analysis_module(name: str):
+    """
+    Import a rasterio_analysis module next to this file.
+
+    Works both when this file is imported as src.rasterio_basics and when
+    src/ is on sys.path and it is imported as rasterio_basics.
+    """
+    package = f"{__package__}.rasterio_analysis" if __package__ else "rasterio_analysis"
+    return importlib.import_module(f"{package}.{name}")
+
+
 def _validate_raster_path(raster_path: str) -> None:
     """Validate that the raster path exists and is readable."""
     if not Path(raster_path).exists():
@@ -255,13 +278,20 @@ def _validate_raster_path(raster_path: str) -> None:
 
 
 def _safe_stats_calculation(data: np.ndarray, exclude_nodata: bool = True,
-                           nodata_value: Optional[float] = None) -> Dict[str, float]:
-    """Helper function to safely calculate statistics with nodata handling."""
+                           nodata_value: Optional[float] = None, exact: bool = True,
+                           relative_accuracy: float = 0.01) -> Dict[str, float]:
+    """
+    Helper function to safely calculate statistics with nodata handling.
+
+    With exact=False the median and percentiles come from a QuantileSketch
+    (within relative_accuracy of the true value) instead of np.median() and
+    np.percentile(), which each partition a full copy of the valid pixels.
+    """
     if exclude_nodata and nodata_value is not None:
         valid_mask = data != nodata_value
         valid_data = data[valid_mask]
     else:
-        valid_data = data.flatten()
+        valid_data = data.ravel()
 
     if len(valid_data) == 0:
         return {
@@ -269,15 +299,56 @@ def _safe_stats_calculation(data: np.ndarray, exclude_nodata: bool = True,
             'std': None, 'range': None, 'percentile_25': None, 'percentile_75': None
         }
 
+    if exact:
+        median = float(np.median(valid_data))
+        percentile_25, percentile_75 = (float(p) for p in np.percentile(valid_data, [25, 75]))
+    else:
+        sketch = _analysis_module('quantile_sketch').QuantileSketch(relative_accuracy)
+        sketch.add_values(valid_data)
+        percentile_25, median, percentile_75 = sketch.quantiles([0.25, 0.5, 0.75])
+
     return {
         'min': float(np.min(valid_data)),
         'max': float(np.max(valid_data)),
         'mean': float(np.mean(valid_data)),
-        'median': float(np.median(valid_data)),
+        'median': median,
         'std': float(np.std(valid_data)),
         'range': float(np.ptp(valid_data)),  # peak-to-peak (max - min)
-        'percentile_25': float(np.percentile(valid_data, 25)),
-        'percentile_75': float(np.percentile(valid_data, 75))
+        'percentile_25': percentile_25,
+        'percentile_75': percentile_75
+    }
+
+
+def _streaming_stats_calculation(dataset, band_number: int = 1,
+                                 exclude_nodata: bool = True) -> Dict[str, float]:
+    """
+    Helper function to calculate statistics one block at a time (for huge rasters).
+
+    The median and percentiles are approximate (within 1%) because exact
+    percentiles need every pixel in memory at once.
+    """
+    block_stats = _analysis_module('block_stats')
+
+    nodata_value = dataset.nodata if exclude_nodata else None
+    stats = block_stats.RunningStats()
+    sketch = _analysis_module('quantile_sketch').QuantileSketch()
+    for _, block in block_stats.iter_band_blocks(dataset, band_number):
+        values, nodata_count = block_stats.valid_block_values(block, nodata_value)
+        stats.add_values(values, nodata_count)
+        sketch.add_values(values)
+
+    has_data = stats.count > 0
+    percentile_25, median, percentile_75 = sketch.quantiles([0.25, 0.5, 0.75])
+    return {
+        'min': stats.min, 'max': stats.max,
+        'mean': stats.mean if has_data else None,
+        'median': median,
+        'std': stats.std,
+        'range': stats.max - stats.min if has_data else None,
+        'percentile_25': percentile_25, 'percentile_75': percentile_75,
+        'valid_pixels': stats.count,
+        'total_pixels': stats.count + stats.nodata_count,
+        'nodata_pixels': stats.nodata_count
     }
 
 
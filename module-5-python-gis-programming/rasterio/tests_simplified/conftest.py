@@ -0,0 +1,90 @@
+"""
+Shared Test Fixtures
+
+A small local web server that supports HTTP range requests, used by the
+tests of the byte-range cache, the COG reader and the I/O statistics to
+stand in for a remote Cloud-Optimized GeoTIFF.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve the files in server.files (name -> bytes) with single-range support.
+
+    Every request is recorded in server.requests as (path, Range header),
+    and server.max_in_flight records how many requests overlapped. Each
+    request waits server.delay seconds, and the ETag is server.etag, or
+    one that changes with the file contents when that is None.
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('Range')))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        body = server.files.get(self.path.lstrip('/'))
+        if body is None:
+            self.send_error(404)
+            return
+
+        status, first, last = 200, 0, len(body) - 1
+        if self.headers.get('Range'):
+            first, last = (int(value) for value in self.headers['Range'].split('=')[1].split('-'))
+            last = min(last, len(body) - 1)
+            status = 206
+        self.send_response(status)
+        self.send_header('ETag', server.etag or f'"{hash(body)}"')
+        self.send_header('Content-Length', str(last - first + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {first}-{last}/{len(body)}')
+        self.end_headers()
+        self.wfile.write(body[first:last + 1])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def range_server():
+    """
+    Start local web servers with range support; they are stopped after the test.
+
+    Call the fixture with the files to serve (name -> bytes), and optionally
+    a delay in seconds per request and a fixed ETag. It returns the server
+    (see RangeRequestHandler for what it records) and its base URL.
+
+    Example:
+        httpd, base_url = range_server({'dem.tif': body}, delay=0.05)
+        url = f"{base_url}/dem.tif"
+    """
+    servers = []
+
+    def start(files, delay=0.0, etag=None):
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+        httpd.files = dict(files)
+        httpd.delay, httpd.etag = delay, etag
+        httpd.requests = []
+        httpd.lock = threading.Lock()
+        httpd.in_flight, httpd.max_in_flight = 0, 0
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,196 @@
+"""
+Tests for the Band Expression Engine
+
+These tests check that formulas written as strings give the same answers
+as numpy, handle nodata correctly, and can be written to a GeoTIFF.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.band_expressions import (
+        NDVI_EXPRESSION,
+        BandExpression,
+        evaluate_expression,
+        iter_band_windows,
+        iter_expression_windows,
+        normalized_difference,
+    )
+    from src.rasterio_analysis.band_math import NDVI, calculate_ndvi
+    from src.rasterio_analysis.dataset_cache import (
+        _active_cache,
+        open_raster,
+        use_dataset_cache,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the band expression engine: {e}", allow_module_level=True)
+
+
+class TestBandExpressions:
+    """Tests for block-by-block band math."""
+
+    @pytest.fixture(scope="class")
+    def scene(self):
+        """Create a 4-band 70x90 scene with 32x32 tiles and a nodata stripe."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "scene.tif")
+
+        rng = np.random.default_rng(8)
+        data = rng.integers(1, 4000, size=(4, 70, 90)).astype(np.uint16)
+        data[2, 10, :] = 0      # nodata in the red band only
+        data[2:, 40, 5] = 0     # nodata in red and NIR
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 90, 70)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=70, width=90, count=4, dtype='uint16',
+            crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+            blockxsize=32, blockysize=32
+        ) as dst:
+            dst.write(data)
+
+        return temp_dir, raster_path, data
+
+    def test_parse_and_evaluate(self):
+        expression = BandExpression("sqrt(b1 * 4) + where(b2 > 1, 10, 0)")
+        assert expression.variables == ['b1', 'b2']
+
+        result = expression.evaluate({'b1': np.array([1.0, 4.0]), 'b2': np.array([0.0, 2.0])})
+        np.testing.assert_allclose(result, [2.0, 14.0])
+
+    def test_division_by_zero_is_nan(self):
+        result = BandExpression("b1 / b2").evaluate({'b1': np.array([1.0, 0.0, 2.0]),
+                                                     'b2': np.array([0.0, 0.0, 4.0])})
+        assert np.isnan(result[0]) and np.isnan(result[1])
+        assert result[2] == pytest.approx(0.5)
+
+    def test_ndvi_expression(self):
+        """calculate_ndvi()'s in-place NDVI is the NDVI_EXPRESSION formula."""
+        assert NDVI.expression == NDVI_EXPRESSION
+        assert NDVI.variables == ['nir', 'red']
+
+    def test_in_place_kernel_matches_formula(self):
+        """The hand-written normalized difference gives the same result as the formula."""
+        rng = np.random.default_rng(4)
+        arrays = {'nir': rng.integers(0, 50, size=(20, 30)).astype(np.uint16),
+                  'red': rng.integers(0, 50, size=(20, 30)).astype(np.uint16)}
+        valid = rng.random((20, 30)) > 0.1
+
+        fast = BandExpression.normalized_difference('nir', 'red')
+        generic = BandExpression(fast.expression)
+        np.testing.assert_array_equal(fast.evaluate(arrays, valid), generic.evaluate(arrays, valid))
+
+    def test_writes_into_output_slice(self):
+        """Results can be written straight into part of a bigger array."""
+        output = np.zeros((4, 4), dtype=np.float32)
+        normalized_difference(np.array([[3, 1]]), np.array([[1, 1]]), out=output[1:2, 2:4])
+
+        np.testing.assert_allclose(output[1, 2:4], [0.5, 0.0])
+        assert output.sum() == pytest.approx(0.5)
+
+    @pytest.mark.parametrize("bad", [
+        "__import__('os')",
+        "b1.real",
+        "open('x')",
+        "b1 + 'text'",
+        "1 + 2",
+        "b1 +",
+    ])
+    def test_unsafe_or_invalid_expressions(self, bad):
+        with pytest.raises(ValueError):
+            BandExpression(bad)
+
+    def test_matches_numpy_with_nodata(self, scene):
+        """Window-by-window results match a whole-array numpy calculation."""
+        _, raster_path, data = scene
+        red, nir = data[2].astype(np.float32), data[3].astype(np.float32)
+        with np.errstate(invalid='ignore'):
+            expected = (nir - red) / (nir + red)
+        expected[(data[2] == 0) | (data[3] == 0)] = np.nan
+
+        result = np.full(red.shape, -1.0, dtype=np.float32)
+        for window, values, _ in iter_expression_windows("(b4 - b3) / (b4 + b3)", raster_path, block_size=25):
+            result[window.toslices()] = values
+
+        np.testing.assert_allclose(result, expected, equal_nan=True)
+
+    def test_ndvi_is_an_expression(self, scene):
+        """calculate_ndvi() and the NDVI formula agree, including nodata counts."""
+        _, raster_path, data = scene
+        ndvi = calculate_ndvi(raster_path, red_band=3, nir_band=4)
+        stats = evaluate_expression("(b4 - b3) / (b4 + b3)", raster_path)
+
+        invalid = int(np.sum((data[2] == 0) | (data[3] == 0)))
+        assert ndvi['nodata_pixels'] == stats['nodata_count'] == invalid
+        assert ndvi['total_pixels'] == stats['valid_pixels']
+        assert stats['mean'] == pytest.approx(ndvi['mean_ndvi'], abs=1e-6)
+        assert stats['windows'] == 9  # 3 x 3 tiles of 32 x 32
+
+    def test_write_geotiff_from_several_rasters(self, scene):
+        """Variables can come from different files; the output is a tiled GeoTIFF."""
+        temp_dir, raster_path, data = scene
+        second_path = os.path.join(temp_dir, "nir_only.tif")
+        with rasterio.open(raster_path) as src:
+            profile = src.profile
+            profile.update(count=1)
+        with rasterio.open(second_path, 'w', **profile) as dst:
+            dst.write(data[3], 1)
+
+        output_path = os.path.join(temp_dir, "ratio.tif")
+        stats = evaluate_expression("nir / red", {'red': (raster_path, 3), 'nir': second_path},
+                                    output_path=output_path)
+
+        with rasterio.open(output_path) as out:
+            assert out.profile['tiled'] is True
+            assert out.transform == profile['transform']
+            written = out.read(1)
+
+        assert np.isnan(written[10]).all()
+        assert np.nanmean(written) == pytest.approx(stats['mean'], rel=1e-5)
+
+    def test_generators_leave_the_dataset_cache_alone(self, scene):
+        """Interleaved or abandoned window generators never change the active cache."""
+        _, raster_path, _ = scene
+        bindings = {'red': (raster_path, 3), 'nir': (raster_path, 4)}
+
+        first, second = iter_band_windows(bindings), iter_band_windows(bindings)
+        next(first)
+        next(second)
+        assert sum(1 for _ in first) == 8
+        assert sum(1 for _ in second) == 8
+        assert _active_cache.get() is None
+
+        with use_dataset_cache() as cache:
+            abandoned = iter_band_windows(bindings)
+            next(abandoned)
+            assert _active_cache.get() is cache
+            with open_raster(raster_path) as src:
+                assert cache.hits == 1   # the dataset the generator is reading
+            cache.invalidate()
+            assert not src.closed
+
+            # Finishing the generator in another thread closes its dataset
+            thread = threading.Thread(target=abandoned.close)
+            thread.start()
+            thread.join()
+            assert src.closed
+        assert _active_cache.get() is None
+
+    def test_missing_source(self, scene):
+        _, raster_path, _ = scene
+        with pytest.raises(ValueError):
+            evaluate_expression("nir - red", {'red': (raster_path, 3)})
+        with pytest.raises(ValueError):
+            evaluate_expression("b9 - b1", raster_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""
+Tests for the Batch Raster Inventory
+
+These tests check that many rasters can be summarized in one run, that
+results are written as they finish, that a second run skips finished
+files, and that a broken file does not stop the run.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.batch_inventory import (
+        find_rasters,
+        main,
+        read_inventory,
+        run_raster_inventory,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the batch inventory: {e}", allow_module_level=True)
+
+
+class TestBatchInventory:
+    """Tests for summarizing many rasters at once."""
+
+    @pytest.fixture
+    def raster_folder(self):
+        """Create a folder with three small 4-band rasters and one broken file."""
+        temp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(5)
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 20, 20)
+
+        for name in ("scene_a.tif", "scene_b.tif", "scene_c.tif"):
+            with rasterio.open(
+                os.path.join(temp_dir, name), 'w', driver='GTiff', height=20, width=20,
+                count=4, dtype='uint16', crs='EPSG:4326', transform=transform, nodata=0
+            ) as dst:
+                dst.write(rng.integers(1, 3000, size=(4, 20, 20)).astype(np.uint16))
+
+        with open(os.path.join(temp_dir, "broken.tif"), 'w') as broken:
+            broken.write("this is not a GeoTIFF")
+
+        return temp_dir
+
+    def test_find_rasters(self, raster_folder):
+        """Directories, glob patterns and file lists all expand to absolute paths."""
+        from_folder = find_rasters([raster_folder])
+        assert len(from_folder) == 4
+        assert all(os.path.isabs(path) for path in from_folder)
+
+        from_glob = find_rasters([os.path.join(raster_folder, "scene_*.tif")])
+        assert len(from_glob) == 3
+
+        list_path = os.path.join(raster_folder, "files.txt")
+        with open(list_path, 'w') as file_list:
+            file_list.write(from_glob[0] + "\n" + from_glob[0] + "\n")
+        assert find_rasters(["@" + list_path]) == [from_glob[0]]
+
+    def test_failures_are_recorded(self, raster_folder):
+        """A broken file is written to the output instead of stopping the run."""
+        output_path = os.path.join(raster_folder, "inventory.jsonl")
+        result = run_raster_inventory([raster_folder], output_path, max_workers=2)
+
+        assert result['total_files'] == 4
+        assert result['succeeded'] == 3
+        assert result['failed'] == 1
+
+        records = list(read_inventory(output_path))
+        assert len(records) == 4
+        failed = [record for record in records if not record['success']]
+        assert failed[0]['raster_path'].endswith("broken.tif")
+        assert 'error' in failed[0]
+
+        good = next(record for record in records if record['success'])
+        assert good['file_info']['count'] == 4
+        assert 'mean_ndvi' in good['ndvi_analysis']
+
+    def test_resume_skips_finished_files(self, raster_folder):
+        """A second run only retries the file that failed."""
+        output_path = os.path.join(raster_folder, "inventory.jsonl")
+        run_raster_inventory([raster_folder], output_path, max_workers=1)
+        again = run_raster_inventory([raster_folder], output_path, max_workers=1)
+
+        assert again['skipped'] == 3
+        assert again['processed'] == 1
+
+        with pytest.raises(FileExistsError):
+            run_raster_inventory([raster_folder], output_path, resume=False)
+
+    def test_parquet_output(self, raster_folder):
+        """Parquet output is a folder of part files with the full record kept as JSON."""
+        pytest.importorskip("pyarrow")
+        import pandas as pd
+
+        output_path = os.path.join(raster_folder, "inventory.parquet")
+        run_raster_inventory([os.path.join(raster_folder, "scene_*.tif")], output_path, max_workers=1)
+
+        table = pd.read_parquet(output_path)
+        assert len(table) == 3
+        assert table['success'].all()
+        assert (table['band_count'] == 4).all()
+        assert len(list(read_inventory(output_path))) == 3
+
+    def test_command_line_report(self, raster_folder, capsys):
+        """The command line prints the usual summary report at the end."""
+        output_path = os.path.join(raster_folder, "cli.jsonl")
+        exit_code = main([os.path.join(raster_folder, "scene_a.tif"), "-o", output_path,
+                          "--workers", "1", "--report"])
+
+        output = capsys.readouterr().out
+        assert exit_code == 0
+        assert "COMPREHENSIVE RASTER ANALYSIS REPORT" in output
+        with open(output_path) as lines:
+            assert json.loads(lines.readline())['success'] is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
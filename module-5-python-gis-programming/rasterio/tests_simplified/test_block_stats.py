@@ -0,0 +1,160 @@
+"""
+Tests for Block Statistics Helpers
+
+These tests check that the streaming (block-by-block) statistics give the
+same answers as reading the whole band into memory.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.block_stats import (
+        RunningStats,
+        stream_band_stats,
+        stream_multiband_stats,
+    )
+    from src.rasterio_analysis.raster_basics import get_raster_stats
+except ImportError as e:
+    pytest.skip(f"Could not import block statistics helpers: {e}", allow_module_level=True)
+
+
+class TestBlockStats:
+    """Tests for streaming statistics."""
+
+    @pytest.fixture(scope="class")
+    def tiled_raster_path(self):
+        """Create a tiled 100x80 raster with 16x16 blocks and some nodata."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "tiled_dem.tif")
+
+        rng = np.random.default_rng(42)
+        data = rng.normal(1500, 250, size=(80, 100)).astype(np.float32)
+        data[rng.random(data.shape) < 0.05] = -9999
+
+        transform = rasterio.transform.from_bounds(-120.0, 35.0, -119.0, 36.0, 100, 80)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=80, width=100, count=1,
+            dtype='float32', crs='EPSG:4326', transform=transform, nodata=-9999,
+            tiled=True, blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data, 1)
+
+        return raster_path
+
+    def test_running_stats_matches_numpy(self):
+        """Merging several chunks should give the same answer as numpy."""
+        rng = np.random.default_rng(0)
+        values = rng.uniform(-50, 300, size=1000)
+
+        stats = RunningStats()
+        for chunk in np.array_split(values, 7):
+            stats.add_values(chunk)
+
+        assert stats.count == 1000
+        assert stats.min == pytest.approx(values.min())
+        assert stats.max == pytest.approx(values.max())
+        assert stats.mean == pytest.approx(values.mean())
+        assert stats.std == pytest.approx(values.std())
+
+    def test_merge_is_order_independent(self):
+        """Merging accumulators in a different order should not change the result."""
+        rng = np.random.default_rng(1)
+        chunks = [rng.normal(size=n) for n in (10, 250, 3)]
+
+        forward = RunningStats()
+        for chunk in chunks:
+            part = RunningStats()
+            part.add_values(chunk)
+            forward.merge(part)
+
+        backward = RunningStats()
+        for chunk in reversed(chunks):
+            part = RunningStats()
+            part.add_values(chunk)
+            backward.merge(part)
+
+        assert forward.mean == pytest.approx(backward.mean)
+        assert forward.std == pytest.approx(backward.std)
+
+    def test_empty_stats(self):
+        """An accumulator with no valid values reports None like get_raster_stats()."""
+        stats = RunningStats()
+        stats.add_values(np.array([]), nodata_count=5)
+        result = stats.to_dict()
+
+        assert result['min'] is None
+        assert result['mean'] is None
+        assert result['std'] is None
+        assert result['nodata_count'] == 5
+
+    def test_streaming_matches_in_memory(self, tiled_raster_path):
+        """Streaming statistics should match the in-memory calculation."""
+        in_memory = get_raster_stats(tiled_raster_path, band_number=1)
+        streamed = get_raster_stats(tiled_raster_path, band_number=1, streaming=True)
+
+        assert streamed['nodata_count'] == in_memory['nodata_count']
+        assert streamed['min'] == pytest.approx(in_memory['min'])
+        assert streamed['max'] == pytest.approx(in_memory['max'])
+        assert streamed['mean'] == pytest.approx(in_memory['mean'], rel=1e-5)
+        assert streamed['std'] == pytest.approx(in_memory['std'], rel=1e-4)
+
+    @pytest.fixture(scope="class")
+    def multiband_raster_path(self):
+        """Create a 6-band tiled raster with a different value range per band."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "landsat_stack.tif")
+
+        rng = np.random.default_rng(3)
+        data = np.stack([
+            rng.integers(band * 100, band * 100 + 5000, size=(48, 64))
+            for band in range(1, 7)
+        ]).astype(np.uint16)
+        data[:, :2, :2] = 0  # nodata corner on every band
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 64, 48)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=48, width=64, count=6,
+            dtype='uint16', crs='EPSG:4326', transform=transform, nodata=0,
+            tiled=True, blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+
+        return raster_path
+
+    def test_multiband_matches_single_band(self, multiband_raster_path):
+        """One pass over all bands should match get_raster_stats() for each band."""
+        all_bands = stream_multiband_stats(multiband_raster_path)
+
+        assert sorted(all_bands.keys()) == [1, 2, 3, 4, 5, 6]
+        for band_number, band_stats in all_bands.items():
+            expected = get_raster_stats(multiband_raster_path, band_number=band_number)
+            assert band_stats['nodata_count'] == expected['nodata_count'] == 4
+            assert band_stats['min'] == expected['min']
+            assert band_stats['max'] == expected['max']
+            assert band_stats['mean'] == pytest.approx(expected['mean'])
+            assert band_stats['std'] == pytest.approx(expected['std'])
+
+    def test_multiband_selected_bands(self, multiband_raster_path):
+        """Only the requested bands should be returned."""
+        result = stream_multiband_stats(multiband_raster_path, bands=[3, 4])
+        assert list(result.keys()) == [3, 4]
+
+        with pytest.raises(ValueError):
+            stream_multiband_stats(multiband_raster_path, bands=[7])
+
+    def test_stream_band_stats_invalid_band(self, tiled_raster_path):
+        """Asking for a band that does not exist should raise an error."""
+        with pytest.raises(ValueError):
+            stream_band_stats(tiled_raster_path, band_number=2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
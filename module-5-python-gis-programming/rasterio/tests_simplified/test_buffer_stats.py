@@ -0,0 +1,119 @@
+"""
+Tests for Buffered Point Statistics
+
+These tests check the summed-area-table buffer statistics against cutting
+out every buffer and calling np.mean(), np.std(), np.min() and np.max().
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.buffer_stats import buffer_kernel, buffer_stats
+except ImportError as e:
+    pytest.skip(f"Could not import the buffer statistics functions: {e}", allow_module_level=True)
+
+
+def naive_buffer_stats(data, nodata, rows, cols, radius_pixels, shape):
+    """Cut out every buffer and summarize its pixels (the slow reference)."""
+    height, width = data.shape
+    grid_rows, grid_cols = np.mgrid[0:height, 0:width]
+    results = []
+    for row, col in zip(rows, cols, strict=True):
+        if shape == 'circle':
+            inside = (grid_rows - row) ** 2 + (grid_cols - col) ** 2 <= radius_pixels ** 2
+        else:
+            inside = (np.abs(grid_rows - row) <= radius_pixels) & (np.abs(grid_cols - col) <= radius_pixels)
+        values = data[inside & (data != nodata)].astype(np.float64)
+        if values.size:
+            results.append((values.size, values.mean(), values.std(), values.min(), values.max()))
+        else:
+            results.append((0, np.nan, np.nan, np.nan, np.nan))
+    return np.array(results)
+
+
+class TestBufferStats:
+    """Tests for buffer statistics."""
+
+    @pytest.fixture(scope="class")
+    def dem(self):
+        """A 60 x 80 DEM (1 map unit pixels, tiled 16 x 16) with a nodata patch."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "dem.tif")
+
+        rng = np.random.default_rng(18)
+        data = (2000 + rng.normal(0, 25, size=(60, 80))).astype(np.float32)
+        data[20:26, 30:41] = -9999  # nodata
+
+        transform = rasterio.transform.from_bounds(0, 0, 80, 60, 80, 60)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=60, width=80, count=1, dtype='float32',
+            crs='EPSG:32612', transform=transform, nodata=-9999, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data, 1)
+
+        return raster_path, data
+
+    @pytest.fixture(scope="class")
+    def points(self):
+        """Random pixel positions, including some near the edges."""
+        rng = np.random.default_rng(3)
+        rows = np.r_[rng.integers(0, 60, 200), 0, 59, 0, 59]
+        cols = np.r_[rng.integers(0, 80, 200), 0, 79, 79, 0]
+        return rows, cols
+
+    @pytest.mark.parametrize("shape", ['circle', 'square'])
+    @pytest.mark.parametrize("radius", [0, 1, 3.5, 12])
+    def test_matches_naive(self, dem, points, shape, radius):
+        """Count, mean, std, min and max match the cut-out-and-summarize method."""
+        raster_path, data = dem
+        rows, cols = points
+        xs, ys = cols + 0.5, 60 - (rows + 0.5)  # pixel centres in map units
+
+        result = buffer_stats(raster_path, xs, ys, radius, shape=shape, extremes=True)
+        expected = naive_buffer_stats(data, -9999, rows, cols, radius, shape)
+
+        np.testing.assert_array_equal(result['count'], expected[:, 0])
+        np.testing.assert_allclose(result['mean'], expected[:, 1], rtol=1e-9)
+        np.testing.assert_allclose(result['std'], expected[:, 2], rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(result['min'], expected[:, 3])
+        np.testing.assert_allclose(result['max'], expected[:, 4])
+
+    def test_kernel_size_grows_with_radius(self):
+        """A circle of radius r covers about pi x r x r pixels."""
+        offsets, half_widths = buffer_kernel(20.0, 1.0, 1.0)
+        assert offsets.tolist() == list(range(-20, 21))
+        assert (2 * half_widths + 1).sum() == pytest.approx(np.pi * 400, rel=0.02)
+
+    def test_outside_and_nodata_points(self, dem):
+        """Points outside the raster get NaN; a buffer of only nodata gets count 0."""
+        raster_path, _ = dem
+        result = buffer_stats(raster_path, [-5.0, 35.5], [30.0, 60 - 22.5], radius=1.0)
+
+        assert result['count'].tolist() == [0, 0]
+        assert np.isnan(result['mean']).all()
+        assert result['info']['points_outside'] == 1
+
+        only_outside = buffer_stats(raster_path, [-5.0], [30.0], radius=1.0)
+        assert only_outside['count'].tolist() == [0]
+        assert only_outside['info']['blocks_read'] == 0
+
+    def test_bad_arguments(self, dem):
+        """Unknown shapes and negative radii raise ValueError."""
+        raster_path, _ = dem
+        with pytest.raises(ValueError):
+            buffer_stats(raster_path, [10.0], [10.0], 2.0, shape='hexagon')
+        with pytest.raises(ValueError):
+            buffer_stats(raster_path, [10.0], [10.0], -1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,108 @@
+"""
+Tests for the Classification Engine
+
+These tests check that one-pass classification with np.digitize and
+np.bincount gives the same answers as the step-by-step conditions, both
+for arrays in memory and for rasters processed block by block.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.band_math import analyze_vegetation, calculate_ndvi
+    from src.rasterio_analysis.classification import (
+        VEGETATION_CLASSES,
+        VEGETATION_INDEX_CLASSES,
+        ClassScheme,
+        classify_array,
+        classify_raster,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the classification engine: {e}", allow_module_level=True)
+
+
+def reference_classes(ndvi, breaks):
+    """Classify with explicit conditions, the way analyze_vegetation() used to."""
+    classes = np.full(ndvi.shape, -1, dtype=np.int8)
+    edges = [-np.inf] + list(breaks) + [np.inf]
+    for code, (low, high) in enumerate(zip(edges, edges[1:], strict=False)):
+        classes[(ndvi >= low) & (ndvi < high)] = code
+    return classes
+
+
+class TestClassification:
+    """Tests for one-pass classification."""
+
+    @pytest.fixture
+    def ndvi(self):
+        rng = np.random.default_rng(12)
+        values = rng.uniform(-0.5, 1.0, size=(300, 41)).astype(np.float32)
+        values[rng.random(values.shape) < 0.05] = np.nan
+        values[0, :5] = [0.0, 0.2, 0.4, 0.7, 0.8]  # exactly on the breaks
+        return values
+
+    @pytest.mark.parametrize("scheme", [VEGETATION_CLASSES, VEGETATION_INDEX_CLASSES])
+    def test_matches_conditions(self, ndvi, scheme):
+        """Both built-in schemes match the explicit >= / < conditions."""
+        classes, counts = classify_array(ndvi, scheme, strip_rows=64)
+        expected = reference_classes(ndvi, scheme.breaks)
+
+        np.testing.assert_array_equal(classes, expected)
+        for code in range(len(scheme)):
+            assert counts[code] == np.sum(expected == code)
+        assert counts.sum() == np.sum(~np.isnan(ndvi))
+
+    def test_analyze_vegetation_uses_five_classes(self, ndvi):
+        result = analyze_vegetation(ndvi)
+        expected = reference_classes(ndvi, [0.0, 0.2, 0.4, 0.7])
+
+        assert result['dense_vegetation']['pixels'] == np.sum(expected == 4)
+        assert result['total_valid_pixels'] == np.sum(~np.isnan(ndvi))
+        np.testing.assert_array_equal(result['classification_array'], expected)
+
+    def test_invalid_schemes(self):
+        with pytest.raises(ValueError):
+            ClassScheme(['a', 'b'], [0.1, 0.2])
+        with pytest.raises(ValueError):
+            ClassScheme(['a', 'b', 'c'], [0.5, 0.1])
+
+    def test_classify_raster_block_by_block(self):
+        """Classifying NDVI block by block matches classifying the whole array."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "scene.tif")
+        rng = np.random.default_rng(13)
+        data = rng.integers(0, 3000, size=(4, 50, 70)).astype(np.uint16)
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 70, 50)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=50, width=70, count=4, dtype='uint16',
+            crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+
+        output_path = os.path.join(temp_dir, "classes.tif")
+        result = classify_raster(raster_path, VEGETATION_INDEX_CLASSES,
+                                 expression="(b4 - b3) / (b4 + b3)", output_path=output_path)
+
+        expected_classes, expected_counts = classify_array(
+            calculate_ndvi(raster_path)['ndvi_array'], VEGETATION_INDEX_CLASSES)
+        for name, count in zip(VEGETATION_INDEX_CLASSES.names, expected_counts, strict=True):
+            assert result[name]['pixels'] == count
+        assert result['nodata_pixels'] == expected_classes.size - expected_counts.sum()
+
+        with rasterio.open(output_path) as out:
+            assert out.nodata == -1
+            np.testing.assert_array_equal(out.read(1), expected_classes)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
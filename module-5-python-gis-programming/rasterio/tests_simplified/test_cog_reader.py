@@ -0,0 +1,105 @@
+"""
+Tests for Concurrent COG Tile Fetching
+
+These tests serve a tiled, compressed GeoTIFF from a local web server with
+a small delay per request, and check that the tile byte ranges come from
+the IFD, that the tiles are downloaded at the same time, and that the
+window read afterwards needs no further requests.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.windows import Window
+
+try:
+    from src.rasterio_analysis import cog_reader
+    from src.rasterio_analysis.applications import read_remote_raster
+    from src.rasterio_analysis.cog_reader import read_cog_window, window_tile_ranges
+    from src.rasterio_analysis.range_cache import DEFAULT_MAX_BYTES, RangeCache
+except ImportError as e:
+    pytest.skip(f"Could not import the COG reader: {e}", allow_module_level=True)
+
+
+class TestCogReader:
+    """Tests for the concurrent COG reader."""
+
+    @pytest.fixture
+    def server(self, range_server):
+        """A 1024 x 768 DEFLATE-compressed GeoTIFF with 128 x 128 tiles, served over HTTP."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "cog.tif")
+        rng = np.random.default_rng(22)
+        data = rng.normal(1500, 50, size=(768, 1024)).astype(np.float32)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=768, width=1024, count=1, dtype='float32',
+            crs='EPSG:32612', transform=rasterio.transform.from_origin(400000, 3600000, 30, 30),
+            tiled=True, blockxsize=128, blockysize=128, compress='deflate'
+        ) as dst:
+            dst.write(data, 1)
+
+        with open(raster_path, 'rb') as f:
+            httpd, base_url = range_server({'cog.tif': f.read()}, delay=0.05, etag='"cog"')
+        return httpd, f"{base_url}/cog.tif", raster_path, data
+
+    def test_tile_ranges_from_ifd(self, server):
+        """A window gets one byte range per tile it touches, inside the file."""
+        _, _, raster_path, _ = server
+        with rasterio.open(raster_path) as src:
+            ranges = window_tile_ranges(src, Window(100, 200, 300, 100))   # tile cols 0-3, rows 1-2
+            assert len(ranges) == 8
+            assert all(offset + size <= os.path.getsize(raster_path) for offset, size in ranges)
+            assert window_tile_ranges(src, Window(2000, 2000, 10, 10)) == []
+
+    def test_concurrent_read_matches(self, server):
+        """The window matches the local file, and reading it needs no extra requests."""
+        httpd, url, _, data = server
+        window = Window(70, 150, 500, 400)
+        result, info = read_cog_window(url, window=window, range_cache=RangeCache(':memory:', chunk_size=16384))
+
+        np.testing.assert_array_equal(result[0], data[150:550, 70:570])
+        assert info['tiles'] == 20
+        assert len(httpd.requests) == 1 + info['requests']    # the header, then only the prefetch
+        assert httpd.max_in_flight > 1                     # tile rows were fetched at the same time
+
+    def test_temporary_cache_fits_window(self, server, monkeypatch):
+        """Without a range cache, a temporary one sized to the window is used and closed."""
+        _, url, raster_path, data = server
+        created = []
+
+        class RecordingCache(RangeCache):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self)
+
+        monkeypatch.setattr(cog_reader, 'RangeCache', RecordingCache)
+        window = Window(70, 150, 500, 400)
+        result, info = read_cog_window(url, window=window)
+
+        np.testing.assert_array_equal(result[0], data[150:550, 70:570])
+        with rasterio.open(raster_path) as src:
+            tile_bytes = sum(size for _, size in window_tile_ranges(src, window))
+        [cache] = created
+        assert tile_bytes <= cache.max_bytes < DEFAULT_MAX_BYTES
+        with pytest.raises(sqlite3.ProgrammingError):   # closed
+            cache.stats()
+
+    def test_read_remote_raster_with_workers(self, server):
+        """read_remote_raster(max_workers=...) gives the same data as a normal read."""
+        _, url, _, data = server
+        bbox = (403000, 3585000, 412000, 3594000)   # rows 200-500, cols 100-400
+        result = read_remote_raster(url, bbox, max_workers=4)
+
+        np.testing.assert_array_equal(result['data_array'], data[200:500, 100:400])
+        assert result['prefetch']['tiles'] == 12
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,122 @@
+"""
+Tests for the COG Writer
+
+These tests write rasters window by window through the COG writer and
+check the layout of the result: 512 x 512 tiles, the right predictor,
+internal overviews, and a file that passes the COG validation.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.enums import Resampling
+
+try:
+    from src.rasterio_analysis.band_expressions import evaluate_expression
+    from src.rasterio_analysis.cog_writer import (
+        CogWriter,
+        predictor_for_dtype,
+        validate_cog,
+        write_cog,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the COG writer: {e}", allow_module_level=True)
+
+
+def dem_profile(width=1100, height=900, dtype='float32', nodata=-9999):
+    return {
+        'width': width, 'height': height, 'count': 1, 'dtype': dtype, 'nodata': nodata,
+        'crs': 'EPSG:32612', 'transform': rasterio.transform.from_origin(400000, 3600000, 30, 30),
+        'compress': 'lzw', 'tiled': False     # replaced by the COG layout
+    }
+
+
+class TestCogWriter:
+    """Tests for writing Cloud-Optimized GeoTIFFs."""
+
+    @pytest.fixture
+    def temp_dir(self):
+        return tempfile.mkdtemp()
+
+    def test_streamed_windows(self, temp_dir):
+        """Windows from a generator end up in a valid, tiled COG with overviews."""
+        rows, cols = np.mgrid[0:900, 0:1100]
+        data = (1500 + 0.5 * rows + 0.2 * cols).astype(np.float32)
+
+        def strips():
+            for row in range(0, 900, 200):
+                window = rasterio.windows.Window(0, row, 1100, min(200, 900 - row))
+                yield window, data[row:row + 200]
+
+        output_path = os.path.join(temp_dir, "out", "dem.tif")
+        summary = write_cog(output_path, strips(), dem_profile())
+
+        assert summary['windows'] == 5
+        assert summary['is_cog'] is True, summary['validation']['errors']
+        assert sorted(os.listdir(os.path.dirname(output_path))) == ["dem.tif"]
+        with rasterio.open(output_path) as src:
+            assert src.block_shapes[0] == (512, 512)
+            assert src.overviews(1) == [2, 4]
+            assert src.tags(ns='IMAGE_STRUCTURE')['PREDICTOR'] == '3'
+            assert src.nodata == -9999
+            np.testing.assert_array_equal(src.read(1), data)
+
+    def test_integer_zstd(self, temp_dir):
+        """Integer data uses horizontal differencing, and ZSTD can be chosen."""
+        data = np.arange(600 * 700, dtype=np.int16).reshape(600, 700) % 3000
+        output_path = os.path.join(temp_dir, "ints.tif")
+        summary = write_cog(output_path, data, dem_profile(700, 600, 'int16'), compress='zstd',
+                            overview_resampling=Resampling.nearest)
+
+        report = summary['validation']
+        assert report['compression'] == 'ZSTD'
+        assert report['predictor'] == '2'
+        assert report['is_cog'] and report['warnings'] == []
+        with rasterio.open(output_path) as src:
+            np.testing.assert_array_equal(src.read(1), data)
+        assert predictor_for_dtype('uint8') == 2 and predictor_for_dtype('float64') == 3
+
+    def test_error_leaves_no_files(self, temp_dir):
+        """If the producer fails, neither the output nor the staging file is left behind."""
+        output_path = os.path.join(temp_dir, "broken.tif")
+        with pytest.raises(RuntimeError):
+            with CogWriter(output_path, dem_profile()) as dst:
+                dst.write(np.zeros((100, 100), dtype=np.float32), 1,
+                          window=rasterio.windows.Window(0, 0, 100, 100))
+                raise RuntimeError("producer failed")
+        assert os.listdir(temp_dir) == []
+
+        with pytest.raises(ValueError):
+            write_cog(output_path, np.zeros((10, 10), dtype=np.float32), dem_profile(10, 10), compress='lzw')
+
+    def test_plain_geotiff_is_not_cog(self, temp_dir):
+        """A stripped GeoTIFF fails the validation."""
+        path = os.path.join(temp_dir, "strips.tif")
+        with rasterio.open(path, 'w', driver='GTiff', **dem_profile()) as dst:
+            dst.write(np.ones((1, 900, 1100), dtype=np.float32))
+
+        report = validate_cog(path)
+        assert report['is_cog'] is False
+        assert any('not tiled' in error for error in report['errors'])
+
+    def test_expression_output_is_cog(self, temp_dir):
+        """Outputs of evaluate_expression() go through the COG writer."""
+        source_path = os.path.join(temp_dir, "source.tif")
+        write_cog(source_path, np.linspace(0, 1, 600 * 600, dtype=np.float32).reshape(600, 600),
+                  dem_profile(600, 600))
+        output_path = os.path.join(temp_dir, "double.tif")
+        evaluate_expression("b1 * 2", source_path, output_path=output_path)
+
+        assert validate_cog(output_path)['is_cog']
+        with rasterio.open(source_path) as src, rasterio.open(output_path) as out:
+            np.testing.assert_allclose(out.read(1), src.read(1) * 2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,198 @@
+"""
+Tests for the Dataset Cache
+
+These tests check that open datasets are reused inside use_dataset_cache(),
+that the cache stays within its size limit, and that changed files are
+reopened.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import contextvars
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.applications import create_raster_summary
+    from src.rasterio_analysis.dataset_cache import (
+        DatasetCache,
+        _active_cache,
+        open_raster,
+        use_dataset_cache,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the dataset cache: {e}", allow_module_level=True)
+
+
+def write_raster(raster_path, count=1, fill=1.0):
+    """Write a small float raster with `count` bands."""
+    data = np.full((count, 8, 8), fill, dtype=np.float32)
+    data += np.arange(count, dtype=np.float32)[:, None, None]
+    transform = rasterio.transform.from_bounds(-120.0, 35.0, -119.0, 36.0, 8, 8)
+    with rasterio.open(
+        raster_path, 'w', driver='GTiff', height=8, width=8, count=count,
+        dtype='float32', crs='EPSG:4326', transform=transform, nodata=-9999
+    ) as dst:
+        dst.write(data)
+
+
+class TestDatasetCache:
+    """Tests for reusing open datasets."""
+
+    @pytest.fixture
+    def raster_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        for name in ('a.tif', 'b.tif', 'c.tif'):
+            write_raster(os.path.join(temp_dir, name))
+        write_raster(os.path.join(temp_dir, 'landsat.tif'), count=4)
+        return temp_dir
+
+    def test_open_raster_without_cache(self, raster_dir):
+        """Outside a cache block open_raster() closes the file like rasterio.open()."""
+        with open_raster(os.path.join(raster_dir, 'a.tif')) as src:
+            assert src.width == 8
+        assert src.closed
+
+    def test_same_dataset_reused(self, raster_dir):
+        """Opening the same path twice in a cache block gives back the same dataset."""
+        path = os.path.join(raster_dir, 'a.tif')
+        with use_dataset_cache() as cache:
+            with open_raster(path) as first:
+                pass
+            with open_raster(path) as second:
+                assert second is first
+                assert not second.closed
+            assert (cache.misses, cache.hits) == (1, 1)
+        assert first.closed  # the cache closes everything at the end
+
+    def test_summary_opens_file_once(self, raster_dir):
+        """create_raster_summary() should open a multi-band file only once."""
+        cache = DatasetCache()
+        with use_dataset_cache(cache):
+            summary = create_raster_summary(os.path.join(raster_dir, 'landsat.tif'))
+
+        assert 'error' not in summary
+        assert 'min_ndvi' in summary['ndvi_analysis']
+        assert cache.misses == 1
+        assert cache.hits >= 3
+        cache.clear()
+
+    def test_lru_eviction(self, raster_dir):
+        """The least recently used dataset is closed when the cache is full."""
+        cache = DatasetCache(max_size=2)
+        with use_dataset_cache(cache):
+            with open_raster(os.path.join(raster_dir, 'a.tif')) as a:
+                pass
+            with open_raster(os.path.join(raster_dir, 'b.tif')):
+                pass
+            with open_raster(os.path.join(raster_dir, 'c.tif')):
+                pass
+            assert len(cache) == 2
+            assert a.closed
+        cache.clear()
+
+    def test_dataset_in_use_is_not_closed(self, raster_dir):
+        """A dataset that is evicted while in use stays open until its block ends."""
+        cache = DatasetCache(max_size=1)
+        with use_dataset_cache(cache):
+            with open_raster(os.path.join(raster_dir, 'a.tif')) as a:
+                cache.invalidate()
+                assert not a.closed
+                assert a.read(1).shape == (8, 8)
+            assert a.closed
+
+    def test_changed_file_is_reopened(self, raster_dir):
+        """Rewriting a file (new modification time) invalidates the cached dataset."""
+        path = os.path.join(raster_dir, 'a.tif')
+        with use_dataset_cache() as cache:
+            with open_raster(path) as src:
+                assert src.read(1)[0, 0] == 1.0
+
+            write_raster(path, fill=5.0)
+            os.utime(path, ns=(0, 10**18))  # make sure the mtime really changes
+
+            with open_raster(path) as src:
+                assert src.read(1)[0, 0] == 5.0
+            assert cache.misses == 2
+
+    def test_threads_get_their_own_dataset(self, raster_dir):
+        """GDAL datasets can't be shared between threads, so each thread gets its own."""
+        path = os.path.join(raster_dir, 'a.tif')
+        datasets = []
+
+        def worker():
+            with open_raster(path) as src:
+                datasets.append(src)
+
+        with use_dataset_cache() as cache:
+            with open_raster(path) as main_src:
+                # The worker runs in a copy of this context, so it sees the same cache
+                thread = threading.Thread(target=contextvars.copy_context().run, args=(worker,))
+                thread.start()
+                thread.join()
+            assert datasets[0] is not main_src
+            assert cache.misses == 2
+
+    def test_overlapping_blocks_in_two_threads(self, raster_dir):
+        """Cache blocks in two threads that end in either order leave no cache active."""
+        path = os.path.join(raster_dir, 'a.tif')
+        first_entered, second_exited = threading.Event(), threading.Event()
+        caches, datasets = {}, {}
+
+        def first():
+            with use_dataset_cache() as cache:
+                caches['first'] = cache
+                with open_raster(path) as src:
+                    datasets['first'] = src
+                first_entered.set()
+                second_exited.wait(5)
+            caches['first_after'] = _active_cache.get()
+
+        def second():
+            first_entered.wait(5)
+            with use_dataset_cache() as cache:
+                caches['second'] = cache
+                with open_raster(path) as src:
+                    datasets['second'] = src
+            caches['second_after'] = _active_cache.get()
+            second_exited.set()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert caches['first'] is not caches['second']
+        assert caches['first_after'] is None and caches['second_after'] is None
+        assert _active_cache.get() is None
+        assert datasets['first'].closed and datasets['second'].closed
+
+    def test_unhashable_options(self, raster_dir):
+        """Open options that can't be part of a cache key still open the file."""
+        path = os.path.join(raster_dir, 'a.tif')
+        with use_dataset_cache() as cache:
+            with open_raster(path, sharing=False, unused_option=['a', 'b']) as first:
+                pass
+            with open_raster(path, sharing=False, unused_option=['a', 'b']) as second:
+                assert second is first      # lists are turned into tuples for the key
+            with open_raster(path, unused_option=[{'a': {1, 2}}]) as src:
+                assert src.read(1).shape == (8, 8)
+            assert cache.hits == 1
+
+        assert DatasetCache._make_key(path, {'bad': [bytearray(b'x')]}) is None
+        cache = DatasetCache()
+        src = cache.acquire(path, bad=[bytearray(b'x')])
+        assert len(cache) == 0
+        cache.release(src)
+        assert src.closed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
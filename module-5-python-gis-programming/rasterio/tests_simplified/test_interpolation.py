@@ -0,0 +1,140 @@
+"""
+Tests for Vectorized Point Interpolation
+
+These tests check the nearest, bilinear and cubic kernels against simple
+point-by-point calculations, and check how they handle edges, nodata and
+several bands.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.interpolation import interpolate
+    from src.rasterio_analysis.point_sampling import (
+        points_to_positions,
+        sample_raster_points,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the interpolation functions: {e}", allow_module_level=True)
+
+
+def bilinear_one_point(data, row, col):
+    """Point-by-point bilinear reference (edge pixels repeated)."""
+    r, c = row - 0.5, col - 0.5
+    r0, c0 = int(np.floor(r)), int(np.floor(c))
+    fr, fc = r - r0, c - c0
+    height, width = data.shape
+
+    def pixel(i, j):
+        return data[min(max(i, 0), height - 1), min(max(j, 0), width - 1)]
+
+    return ((1 - fr) * (1 - fc) * pixel(r0, c0) + (1 - fr) * fc * pixel(r0, c0 + 1)
+            + fr * (1 - fc) * pixel(r0 + 1, c0) + fr * fc * pixel(r0 + 1, c0 + 1))
+
+
+class TestInterpolation:
+    """Tests for the interpolation kernel."""
+
+    @pytest.fixture
+    def surface(self):
+        """A smooth 30 x 40 surface: a tilted plane plus a gentle bump."""
+        rows, cols = np.mgrid[0:30, 0:40] + 0.5
+        return 3.0 * rows - 2.0 * cols + 0.05 * (rows - 15) ** 2
+
+    @pytest.fixture
+    def positions(self):
+        """Random fractional positions inside the 30 x 40 surface."""
+        rng = np.random.default_rng(17)
+        return rng.uniform(0, 30, 500), rng.uniform(0, 40, 500)
+
+    def test_nearest(self, surface, positions):
+        """Nearest returns the pixel the position is in."""
+        rows, cols = positions
+        values = interpolate(surface, rows, cols, 'nearest')
+        np.testing.assert_array_equal(values, surface[rows.astype(int), cols.astype(int)])
+
+    def test_bilinear_matches_reference(self, surface, positions):
+        """Bilinear matches the point-by-point formula, edges included."""
+        rows, cols = positions
+        values = interpolate(surface, rows, cols, 'bilinear')
+        expected = [bilinear_one_point(surface, r, c) for r, c in zip(rows, cols, strict=True)]
+        np.testing.assert_allclose(values, expected)
+
+    def test_cubic_reproduces_quadratic(self, surface, positions):
+        """Cubic (Catmull-Rom) is exact for a quadratic surface away from the edges."""
+        rows, cols = positions
+        interior = (rows > 2) & (rows < 28) & (cols > 2) & (cols < 38)
+        values = interpolate(surface, rows[interior], cols[interior], 'cubic')
+        expected = 3.0 * rows[interior] - 2.0 * cols[interior] + 0.05 * (rows[interior] - 15) ** 2
+        np.testing.assert_allclose(values, expected)
+
+    def test_pixel_centres_are_exact(self, surface):
+        """At a pixel centre every method returns that pixel's value."""
+        rows, cols = np.array([0.5, 10.5, 29.5]), np.array([0.5, 20.5, 39.5])
+        for method in ('nearest', 'bilinear', 'cubic'):
+            values = interpolate(surface, rows, cols, method)
+            np.testing.assert_allclose(values, surface[[0, 10, 29], [0, 20, 39]])
+
+    def test_nodata_neighbours(self):
+        """Nodata neighbours are left out; all-nodata neighbourhoods give NaN."""
+        data = np.array([[10.0, 20.0], [-1.0, -1.0]])
+        values = interpolate(data, np.array([1.0, 1.9]), np.array([1.0, 1.0]), 'bilinear', nodata=-1.0)
+        assert values[0] == pytest.approx(15.0)
+
+        data = np.full((4, 4), -1.0)
+        assert np.isnan(interpolate(data, np.array([2.0]), np.array([2.0]), 'cubic', nodata=-1.0)[0])
+
+    def test_cubic_falls_back_to_bilinear(self, surface):
+        """A nodata pixel in the 4 x 4 neighbourhood switches that point to bilinear."""
+        data = surface.copy()
+        data[5, 5] = np.nan
+        rows, cols = np.array([7.0]), np.array([7.0])   # (5, 5) is in the 4 x 4 but not the 2 x 2
+        cubic = interpolate(data, rows, cols, 'cubic')
+        np.testing.assert_allclose(cubic, interpolate(data, rows, cols, 'bilinear'))
+
+    def test_bands_and_chunks(self, surface, positions):
+        """Several bands at once give the same result as one band at a time, in any chunk size."""
+        rows, cols = positions
+        stack = np.stack([surface, surface * 2, -surface])
+        values = interpolate(stack, rows, cols, 'cubic', nodata=[None, None, None], chunk_points=64)
+
+        assert values.shape == (500, 3)
+        for band_index in range(3):
+            np.testing.assert_allclose(values[:, band_index], interpolate(stack[band_index], rows, cols, 'cubic'))
+
+    def test_unknown_method(self, surface):
+        """Unknown methods raise ValueError."""
+        with pytest.raises(ValueError):
+            interpolate(surface, [1.0], [1.0], 'lanczos')
+
+    def test_raster_sampling_across_blocks(self, surface, positions):
+        """Block-wise raster sampling matches interpolating the whole array."""
+        raster_path = os.path.join(tempfile.mkdtemp(), "surface.tif")
+        transform = rasterio.transform.from_bounds(0, 0, 40, 30, 40, 30)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=30, width=40, count=1, dtype='float64',
+            crs='EPSG:3857', transform=transform, tiled=True, blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(surface, 1)
+
+        rows, cols = positions
+        xs, ys = cols, 30 - rows
+        with rasterio.open(raster_path) as src:
+            np.testing.assert_allclose(points_to_positions(src.transform, xs, ys), (rows, cols))
+
+        for method in ('bilinear', 'cubic'):
+            values, info = sample_raster_points(raster_path, xs, ys, interpolation=method)
+            np.testing.assert_allclose(values[:, 0], interpolate(surface, rows, cols, method))
+            assert info['interpolation'] == method
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,214 @@
+"""
+Tests for the I/O Statistics
+
+These tests run package functions inside track_io() and check the counted
+opens, blocks, bytes, requests and phases - for local files, for a remote
+file served by a local web server, and for COG outputs.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.enums import Resampling
+
+try:
+    import geopandas as gpd
+    from shapely.geometry import box
+
+    from src.rasterio_analysis import dataset_cache
+    from src.rasterio_analysis.applications import (
+        create_raster_summary,
+        read_remote_raster,
+    )
+    from src.rasterio_analysis.block_stats import stream_band_stats
+    from src.rasterio_analysis.buffer_stats import buffer_stats
+    from src.rasterio_analysis.cog_writer import write_cog
+    from src.rasterio_analysis.dataset_cache import use_dataset_cache
+    from src.rasterio_analysis.io_stats import PHASES, track_io
+    from src.rasterio_analysis.overviews import approximate_band_stats
+    from src.rasterio_analysis.range_cache import RangeCache
+    from src.rasterio_analysis.raster_basics import read_raster_info
+    from src.rasterio_analysis.tile_scheduler import parallel_band_stats
+    from src.rasterio_analysis.zonal_stats import zonal_stats
+except ImportError as e:
+    pytest.skip(f"Could not import the I/O statistics: {e}", allow_module_level=True)
+
+
+class TestIOStats:
+    """Tests for I/O accounting."""
+
+    @pytest.fixture
+    def raster_path(self):
+        """A 64 x 64 raster with 16 x 16 tiles (16 blocks)."""
+        path = os.path.join(tempfile.mkdtemp(), "dem.tif")
+        data = np.arange(64 * 64, dtype=np.float32).reshape(1, 64, 64)
+        with rasterio.open(
+            path, 'w', driver='GTiff', height=64, width=64, count=1, dtype='float32',
+            crs='EPSG:32612', transform=rasterio.transform.from_origin(400000, 3600000, 30, 30),
+            nodata=-9999, tiled=True, blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+        return path
+
+    def test_result_gets_io_stats(self, raster_path):
+        """Inside track_io() the result has an 'io_stats' entry; outside it does not."""
+        assert 'io_stats' not in stream_band_stats(raster_path)
+
+        with track_io() as io:
+            result = stream_band_stats(raster_path)
+        stats = result['io_stats']
+
+        assert stats['label'] == 'stream_band_stats'
+        assert stats['opens'] == 1
+        assert stats['blocks_decoded'] == 16
+        assert set(stats['phases']) == set(PHASES)
+        assert stats['phases']['read']['seconds'] > 0
+        assert io.to_dict()['blocks_decoded'] == 16
+        assert stats['bytes_read'] == 64 * 64 * 4   # 16 uncompressed float32 tiles
+        assert stats['requests'] == 16
+
+    def test_only_raster_blocks_are_counted(self, raster_path):
+        """Other reads in the same thread (like the statistics cache) are not raster I/O."""
+        compressed_path = os.path.join(os.path.dirname(raster_path), "compressed.tif")
+        with rasterio.open(raster_path) as src:
+            profile = dict(src.profile, compress='deflate')
+            data = src.read()
+        with rasterio.open(compressed_path, 'w', **profile) as dst:
+            dst.write(data)
+
+        with track_io() as io:
+            stream_band_stats(compressed_path)
+            with open(raster_path, 'rb') as f:
+                f.read()
+        stats = io.to_dict()
+
+        with rasterio.open(compressed_path) as src:
+            stored = sum(int(src.get_tag_item(f'BLOCK_SIZE_{col}_{row}', 'TIFF', bidx=1))
+                         for row in range(4) for col in range(4))
+        assert stats['bytes_read'] == stored < 64 * 64 * 4
+        assert stats['requests'] == 16
+
+    def test_overview_reads_count_overview_blocks(self, tmp_path):
+        """A decimated read that GDAL serves from an overview counts that overview's blocks."""
+        path = str(tmp_path / "pyramid.tif")
+        with rasterio.open(
+            path, 'w', driver='GTiff', height=512, width=512, count=1, dtype='float32',
+            tiled=True, blockxsize=128, blockysize=128
+        ) as dst:
+            dst.write(np.arange(512 * 512, dtype=np.float32).reshape(1, 512, 512))
+            dst.build_overviews([2, 4], Resampling.average)
+
+        with track_io():
+            full = stream_band_stats(path)['io_stats']
+            approximate = approximate_band_stats(path, max_pixels=128 * 128)['io_stats']
+
+        with rasterio.open(path) as src:
+            overview_block = int(src.get_tag_item('BLOCK_SIZE_0_0', 'TIFF', bidx=1, ovr=1))
+        assert full['blocks_decoded'] == 16
+        assert approximate['blocks_decoded'] == 1               # the 128 x 128 overview is one tile
+        assert approximate['bytes_read'] == overview_block < full['bytes_read']
+
+    def test_only_outermost_call_reports(self, raster_path, tmp_path, monkeypatch):
+        """create_raster_summary() reports the I/O of every function it calls."""
+        monkeypatch.setenv("RASTERIO_STATS_CACHE", str(tmp_path / "stats.sqlite"))
+        with track_io() as io:
+            summary = create_raster_summary(raster_path, use_cache=True)
+
+        assert 'io_stats' not in summary['file_info']
+        assert summary['io_stats']['opens'] >= 2
+        assert summary['io_stats']['cache_hits'] >= 1        # the dataset cache handed one back
+        assert io.to_dict()['blocks_decoded'] == summary['io_stats']['blocks_decoded']
+
+    def test_dataset_cache_hits(self, raster_path):
+        """A dataset handed back by the dataset cache counts as a cache hit."""
+        with track_io() as io, use_dataset_cache():
+            read_raster_info(raster_path)
+            read_raster_info(raster_path)
+        stats = io.to_dict()
+        assert stats['opens'] == 2
+        assert stats['phases']['open']['cache_hits'] == 1
+
+    def test_other_threads_are_not_counted(self, raster_path):
+        """A track_io() block only counts its own thread, plus the tile scheduler's workers."""
+        with track_io() as io:
+            thread = threading.Thread(target=stream_band_stats, args=(raster_path,))
+            thread.start()
+            thread.join()
+        assert io.to_dict()['opens'] == 0
+
+        with track_io() as io:
+            result = parallel_band_stats(raster_path, max_workers=4, blocks_per_task=2)
+        assert result['io_stats']['blocks_decoded'] == 16
+        assert io.to_dict()['opens'] >= 2
+
+    def test_buffer_and_zonal_stats(self, raster_path):
+        """buffer_stats() and zonal_stats() report their I/O too."""
+        with track_io():
+            buffers = buffer_stats(raster_path, np.array([400500.0]), np.array([3599500.0]), radius=60)
+            zones = gpd.GeoDataFrame(geometry=[box(400000, 3598080, 400960, 3600000)], crs='EPSG:32612')
+            zonal = zonal_stats(raster_path, zones, stats=['mean'])
+
+        assert buffers['io_stats']['label'] == 'buffer_stats'
+        assert buffers['io_stats']['blocks_decoded'] >= 1
+        assert zonal.attrs['io_stats']['label'] == 'zonal_stats'
+        assert zonal.attrs['io_stats']['opens'] == 1
+        assert 'io_stats' not in buffer_stats(raster_path, np.array([400500.0]), np.array([3599500.0]), 60)
+
+    def test_remote_requests(self, raster_path, range_server):
+        """Remote reads through a RangeCache count HTTP requests and downloaded bytes."""
+        with open(raster_path, 'rb') as f:
+            body = f.read()
+        _, base_url = range_server({'dem.tif': body}, etag='"io"')
+        with track_io():
+            result = read_remote_raster(f"{base_url}/dem.tif", range_cache=RangeCache(':memory:'))
+
+        assert 'error' not in result
+        np.testing.assert_array_equal(result['data_array'], np.arange(64 * 64).reshape(64, 64))
+        stats = result['io_stats']
+        assert stats['requests'] >= 1
+        assert 0 < stats['bytes_read'] <= 2 * len(body)
+        assert stats['phases']['open']['requests'] >= 1
+
+    def test_remote_without_range_cache(self, raster_path, monkeypatch):
+        """A URL opened without a RangeCache is opened unchanged: blocks are counted, requests are not."""
+        opened = []
+
+        @contextmanager
+        def open_local_copy(url, **options):
+            opened.append(options)
+            with rasterio.open(raster_path) as src:
+                yield src
+
+        monkeypatch.setattr(dataset_cache, '_open_dataset', open_local_copy)
+        with track_io():
+            result = read_remote_raster("https://example.com/dem.tif")
+
+        assert opened == [{}]
+        stats = result['io_stats']
+        assert stats['requests'] == 0
+        assert stats['blocks_decoded'] == 16
+        assert stats['bytes_read'] == 64 * 64 * 4
+
+    def test_write_phase(self, raster_path):
+        """COG outputs are timed as the 'write' phase and their size is counted."""
+        output_path = os.path.join(os.path.dirname(raster_path), "out.tif")
+        profile = {'width': 64, 'height': 64, 'count': 1, 'dtype': 'float32', 'crs': 'EPSG:32612',
+                   'transform': rasterio.transform.from_origin(400000, 3600000, 30, 30)}
+        with track_io():
+            summary = write_cog(output_path, np.ones((64, 64), dtype=np.float32), profile)
+
+        stats = summary['io_stats']
+        assert stats['bytes_written'] == os.path.getsize(output_path)
+        assert stats['phases']['write']['seconds'] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+"""
+Tests for Overview-Based Approximate Statistics
+
+These tests check that approximate statistics pick a sensible overview
+level, stay within the pixel budget and land close to the exact answer.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.enums import Resampling
+
+try:
+    from src.rasterio_analysis.applications import create_raster_summary
+    from src.rasterio_analysis.band_math import calculate_ndvi
+    from src.rasterio_analysis.overviews import (
+        approximate_band_stats,
+        approximate_multiband_stats,
+        choose_decimation,
+        choose_overview_for_resolution,
+        read_at_resolution,
+    )
+    from src.rasterio_analysis.raster_basics import get_raster_stats
+except ImportError as e:
+    pytest.skip(f"Could not import the overview helpers: {e}", allow_module_level=True)
+
+
+def write_raster(raster_path, count=1, overviews=None):
+    """Write a smooth 256x256 raster, optionally with internal overviews."""
+    rows, cols = np.mgrid[0:256, 0:256]
+    band = (1000 + 3 * rows + 2 * cols).astype(np.float32)
+    data = np.stack([band + 50 * i for i in range(count)])
+    data[:, :8, :8] = -9999
+
+    transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 256, 256)
+    with rasterio.open(
+        raster_path, 'w', driver='GTiff', height=256, width=256, count=count,
+        dtype='float32', crs='EPSG:4326', transform=transform, nodata=-9999,
+        tiled=True, blockxsize=64, blockysize=64
+    ) as dst:
+        dst.write(data)
+        if overviews:
+            dst.build_overviews(overviews, Resampling.nearest)
+
+
+class TestOverviews:
+    """Tests for approximate statistics."""
+
+    @pytest.fixture
+    def pyramid_path(self, tmp_path):
+        path = str(tmp_path / "pyramid.tif")
+        write_raster(path, overviews=[2, 4, 8])
+        return path
+
+    @pytest.fixture
+    def flat_path(self, tmp_path):
+        path = str(tmp_path / "flat.tif")
+        write_raster(path)
+        return path
+
+    def test_picks_finest_overview_within_budget(self, pyramid_path):
+        """With room for 128x128 pixels the 2x overview should be chosen."""
+        with rasterio.open(pyramid_path) as src:
+            plan = choose_decimation(src, max_pixels=128 * 128)
+            small_plan = choose_decimation(src, max_pixels=1000)
+            full_plan = choose_decimation(src, max_pixels=10**9)
+
+        assert plan['method'] == 'overview'
+        assert plan['overview_level'] == 0
+        assert plan['decimation_factor'] == 2
+
+        # 1000 pixels is smaller than every overview, so decimate further
+        assert small_plan['method'] == 'decimated'
+        assert small_plan['out_shape'][0] * small_plan['out_shape'][1] <= 1000
+
+        assert full_plan['method'] == 'full'
+
+    def test_approximate_close_to_exact(self, pyramid_path):
+        """Approximate statistics should be close to the exact ones."""
+        exact = get_raster_stats(pyramid_path)
+        approx = get_raster_stats(pyramid_path, approximate=True, max_pixels=64 * 64)
+
+        assert approx['approximation']['overview_level'] == 1
+        assert approx['approximation']['sampled_pixels'] == 64 * 64
+        assert approx['mean'] == pytest.approx(exact['mean'], rel=0.01)
+        assert approx['std'] == pytest.approx(exact['std'], rel=0.05)
+        assert approx['nodata_count'] == pytest.approx(exact['nodata_count'], rel=0.3)
+        assert approx['approximation']['mean_standard_error'] > 0
+
+    def test_decimated_read_without_overviews(self, flat_path):
+        """Files without overviews still get a decimated read within budget."""
+        result = approximate_band_stats(flat_path, max_pixels=5000)
+
+        assert result['approximation']['method'] == 'decimated'
+        assert result['approximation']['sampled_pixels'] <= 5000
+        assert result['min'] is not None
+
+    def test_multiband_and_summary(self, tmp_path):
+        """Approximate mode works for all bands, NDVI and the summary."""
+        path = str(tmp_path / "landsat.tif")
+        write_raster(path, count=4, overviews=[2, 4])
+
+        all_bands = approximate_multiband_stats(path, max_pixels=64 * 64)
+        assert sorted(all_bands) == [1, 2, 3, 4]
+
+        ndvi = calculate_ndvi(path, max_pixels=64 * 64)
+        assert ndvi['ndvi_array'].shape == (64, 64)
+        assert ndvi['approximation']['decimation_factor'] == 4
+
+        summary = create_raster_summary(path, max_pixels=64 * 64)
+        assert summary['approximation']['overview_level'] == 1
+        assert 'min_ndvi' in summary['ndvi_analysis']
+
+    def test_invalid_budget(self, flat_path):
+        with rasterio.open(flat_path) as src:
+            with pytest.raises(ValueError):
+                choose_decimation(src, max_pixels=0)
+
+    def test_overview_for_target_resolution(self, pyramid_path):
+        """The finest level that is no finer than the target is used."""
+        pixel = 1 / 256
+        with rasterio.open(pyramid_path) as src:
+            assert choose_overview_for_resolution(src, 1.5 * pixel)['decimation_factor'] == 2
+            assert choose_overview_for_resolution(src, 3.5 * pixel)['decimation_factor'] == 4
+            assert choose_overview_for_resolution(src, 4 * pixel)['decimation_factor'] == 4
+            assert choose_overview_for_resolution(src, (6 * pixel, 3 * pixel))['overview_level'] == 2
+            assert choose_overview_for_resolution(src, 20 * pixel)['overview_level'] == 2   # the coarsest
+            assert choose_overview_for_resolution(src, 1 * pixel)['method'] == 'full'
+            assert choose_overview_for_resolution(src, 0.5 * pixel)['method'] == 'full'
+
+    def test_read_at_resolution_uses_overview(self, pyramid_path):
+        """The read matches the chosen overview and reports the bytes saved."""
+        data, info = read_at_resolution(pyramid_path, 4 / 256)
+        with rasterio.open(pyramid_path, overview_level=1) as level:
+            expected = level.read(1)
+
+        assert data.shape == (1, 64, 64)
+        np.testing.assert_array_equal(data[0], expected)
+        assert info['transform'].a == pytest.approx(4 / 256)
+        assert info['full_resolution_bytes'] == 256 * 256 * 4
+        assert info['bytes_read'] == 64 * 64 * 4
+        assert info['saved_fraction'] == pytest.approx(1 - 1 / 16)
+
+    def test_read_at_resolution_bbox(self, pyramid_path, flat_path):
+        """A bbox read keeps its bounds, and a raster without overviews reads full resolution."""
+        bbox = (-112.25, 33.25, -112.0, 33.5)        # 64 x 64 pixels at full resolution
+        data, info = read_at_resolution(pyramid_path, 2 / 256, bbox=bbox)
+        assert data.shape == (1, 32, 32)
+        assert info['overview_level'] == 0
+        assert (info['transform'].c, info['transform'].f) == pytest.approx((-112.25, 33.5))
+        assert info['bytes_saved'] == 64 * 64 * 4 - 32 * 32 * 4
+
+        data, info = read_at_resolution(flat_path, 2 / 256, bbox=bbox)
+        assert data.shape == (1, 32, 32) and info['method'] == 'full'
+        assert info['bytes_saved'] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
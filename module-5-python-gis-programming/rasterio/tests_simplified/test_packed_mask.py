@@ -0,0 +1,119 @@
+"""
+Tests for Packed Masks
+
+These tests check that 1-bit-per-pixel masks give exactly the same answers
+as normal numpy boolean arrays, while using 8 times less memory.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.band_expressions import iter_expression_windows
+    from src.rasterio_analysis.band_math import calculate_ndvi
+    from src.rasterio_analysis.classification import VEGETATION_CLASSES
+    from src.rasterio_analysis.packed_mask import PackedMask
+except ImportError as e:
+    pytest.skip(f"Could not import packed masks: {e}", allow_module_level=True)
+
+
+class TestPackedMask:
+    """Tests for the PackedMask class."""
+
+    @pytest.fixture
+    def random_masks(self):
+        """Two random boolean masks with a width that is not a multiple of 8."""
+        rng = np.random.default_rng(9)
+        return rng.random((37, 61)) < 0.7, rng.random((37, 61)) < 0.4
+
+    def test_round_trip(self, random_masks):
+        first, _ = random_masks
+        packed = PackedMask.from_bool(first)
+
+        np.testing.assert_array_equal(packed.to_bool(), first)
+        assert packed.nbytes == 37 * 8  # 61 columns fit in 8 bytes per row
+
+    def test_logic_and_popcount(self, random_masks):
+        """&, | and ~ match numpy, and padding bits are never counted."""
+        first, second = random_masks
+        a, b = PackedMask.from_bool(first), PackedMask.from_bool(second)
+
+        assert (a & b).count() == np.sum(first & second)
+        assert (a | b).count() == np.sum(first | second)
+        assert (~a).count() == np.sum(~first)
+        assert a.count_false() == np.sum(~first)
+        np.testing.assert_array_equal((~a).to_bool(), ~first)
+
+    def test_from_nodata(self):
+        """Nodata values and NaN are both treated as invalid."""
+        data = np.array([[1.0, -9999.0, np.nan], [4.0, 5.0, -9999.0]], dtype=np.float32)
+        mask = PackedMask.from_nodata(data, -9999)
+
+        np.testing.assert_array_equal(mask.to_bool(), [[True, False, False], [True, True, False]])
+        assert PackedMask.full((2, 3)).count() == 6
+        assert PackedMask.full((2, 3), value=False).count() == 0
+
+    def test_fill_invalid(self):
+        data = np.arange(6, dtype=np.float32).reshape(2, 3)
+        mask = PackedMask.from_bool([[True, False, True], [False, True, True]])
+        mask.fill_invalid(data)
+
+        assert np.isnan(data[0, 1]) and np.isnan(data[1, 0])
+        assert data[1, 2] == 5.0
+
+    def test_shape_mismatch(self):
+        with pytest.raises(ValueError):
+            PackedMask.full((2, 3)) & PackedMask.full((3, 2))
+
+    def test_dataset_mask_matches_nodata(self):
+        """GDAL's dataset mask gives the same valid pixels as the nodata value."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "masked.tif")
+        rng = np.random.default_rng(2)
+        data = rng.integers(0, 4, size=(2, 300, 45)).astype(np.uint8)  # 0 is nodata
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 45, 300)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=300, width=45, count=2, dtype='uint8',
+            crs='EPSG:4326', transform=transform, nodata=0
+        ) as dst:
+            dst.write(data)
+
+        with rasterio.open(raster_path) as src:
+            mask = PackedMask.from_dataset(src, 1) & PackedMask.from_dataset(src, 2)
+
+        expected = (data[0] != 0) & (data[1] != 0)
+        np.testing.assert_array_equal(mask.to_bool(), expected)
+
+        ndvi = calculate_ndvi(raster_path, red_band=1, nir_band=2)
+        assert ndvi['total_pixels'] == int(expected.sum())
+        assert ndvi['nodata_pixels'] == int((~expected).sum())
+
+        # The band-math window iterator hands out packed masks too
+        valid_pixels = 0
+        for window, _, valid in iter_expression_windows("b2 - b1", raster_path, block_size=32):
+            assert isinstance(valid, PackedMask)
+            np.testing.assert_array_equal(valid.to_bool(), expected[window.toslices()])
+            valid_pixels += valid.count()
+        assert valid_pixels == int(expected.sum())
+
+    def test_classification_mask(self):
+        """The classifier marks NaN and nodata pixels from a packed mask."""
+        values = np.array([[0.1, np.nan, 0.5], [-32768, 0.8, 0.3]], dtype=np.float32)
+        valid = VEGETATION_CLASSES.valid_mask(values, nodata=-32768)
+        assert valid.count_false() == 2
+
+        classes = VEGETATION_CLASSES.classify(values, valid=valid)
+        np.testing.assert_array_equal(classes, [[1, -1, 3], [-1, 4, 2]])
+        np.testing.assert_array_equal(VEGETATION_CLASSES.classify(values[0]), [1, -1, 3])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,166 @@
+"""
+Tests for Vectorized Point Sampling
+
+These tests check that sampling all points at once gives the same values
+as the one-point-at-a-time approach (rowcol() and a 1 x 1 read), and that
+every touched block is read only once.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import rowcol
+from rasterio.windows import Window
+
+try:
+    from src.rasterio_analysis.applications import sample_raster_at_points
+    from src.rasterio_analysis.point_sampling import (
+        points_to_pixels,
+        sample_points,
+        sample_raster_points,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the point sampling functions: {e}", allow_module_level=True)
+
+
+def sample_one_at_a_time(raster_path, xs, ys):
+    """The slow reference: one rowcol() and one 1 x 1 read per point."""
+    values = []
+    with rasterio.open(raster_path) as src:
+        for x, y in zip(xs, ys, strict=True):
+            row, col = rowcol(src.transform, x, y)
+            if 0 <= row < src.height and 0 <= col < src.width:
+                value = src.read(1, window=Window(col, row, 1, 1))[0, 0]
+                values.append(np.nan if value == src.nodata else float(value))
+            else:
+                values.append(np.nan)
+    return np.array(values)
+
+
+class TestPointSampling:
+    """Tests for block-grouped point sampling."""
+
+    @pytest.fixture(scope="class")
+    def tiled_path(self):
+        """Create a tiled 2-band raster (16 x 16 blocks) with some nodata."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "tiled.tif")
+
+        rng = np.random.default_rng(15)
+        data = rng.integers(1, 1000, size=(2, 70, 90)).astype(np.int16)
+        data[:, 10:20, 10:20] = -9999  # nodata
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 90, 70)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=70, width=90, count=2, dtype='int16',
+            crs='EPSG:4326', transform=transform, nodata=-9999, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+
+        return raster_path
+
+    @pytest.fixture(scope="class")
+    def random_points(self):
+        """Random points, some of them outside the raster."""
+        rng = np.random.default_rng(7)
+        xs = rng.uniform(-112.6, -111.4, 3000)
+        ys = rng.uniform(32.9, 34.1, 3000)
+        return xs, ys
+
+    def test_matches_rowcol(self, tiled_path, random_points):
+        """Pixel positions match rasterio's rowcol()."""
+        xs, ys = random_points
+        with rasterio.open(tiled_path) as src:
+            rows, cols, inside = points_to_pixels(src.transform, xs, ys, src.width, src.height)
+            expected_rows, expected_cols = rowcol(src.transform, xs, ys)
+
+        expected_rows, expected_cols = np.asarray(expected_rows), np.asarray(expected_cols)
+        np.testing.assert_array_equal(rows[inside], expected_rows[inside])
+        np.testing.assert_array_equal(cols[inside], expected_cols[inside])
+
+    def test_matches_one_at_a_time(self, tiled_path, random_points):
+        """Values match reading every point separately, including nodata and outside points."""
+        xs, ys = random_points
+        values, info = sample_raster_points(tiled_path, xs, ys)
+        expected = sample_one_at_a_time(tiled_path, xs, ys)
+
+        np.testing.assert_array_equal(values[:, 0], expected)
+        assert info['points_inside'] + info['points_outside'] == len(xs)
+        assert info['points_outside'] > 0
+
+    def test_each_block_read_once(self, tiled_path, random_points):
+        """3000 points need at most one read per block (6 x 5 blocks)."""
+        xs, ys = random_points
+        _, info = sample_raster_points(tiled_path, xs, ys)
+        assert info['blocks_read'] == 30
+
+        # Points in a single block need a single read
+        _, info = sample_raster_points(tiled_path, np.full(500, -112.49), np.full(500, 33.99))
+        assert info['blocks_read'] == 1
+
+        # Points that all fall outside the raster need no reads at all
+        values, info = sample_raster_points(tiled_path, np.full(3, -120.0), np.full(3, 33.5))
+        assert np.isnan(values).all()
+        assert info['blocks_read'] == 0
+
+    def test_orders_give_same_values(self, tiled_path, random_points):
+        """Every reading order returns the values in the caller's point order."""
+        xs, ys = random_points
+        expected, _ = sample_raster_points(tiled_path, xs, ys, order=None)
+        for order in ('hilbert', 'morton', 'row'):
+            values, info = sample_raster_points(tiled_path, xs, ys, order=order)
+            np.testing.assert_array_equal(values, expected)
+            assert info['order'] == order
+
+    def test_blocks_grouped_without_curve(self, tiled_path, random_points):
+        """Without a curve (the default) random points are still grouped by block."""
+        xs, ys = random_points
+        _, unordered = sample_raster_points(tiled_path, xs, ys, cache_blocks=4)
+        _, ordered = sample_raster_points(tiled_path, xs, ys, order='hilbert', cache_blocks=4)
+
+        assert unordered['order'] is None
+        assert unordered['blocks_read'] == ordered['blocks_read'] == 30
+        assert unordered['bytes_read'] == ordered['bytes_read']
+
+    def test_unknown_order(self, tiled_path):
+        """An unknown order name raises ValueError."""
+        with pytest.raises(ValueError):
+            sample_raster_points(tiled_path, [-112.0], [33.5], order='spiral')
+
+    def test_several_bands(self, tiled_path, random_points):
+        """Each band gets its own column of values."""
+        xs, ys = random_points
+        values, _ = sample_raster_points(tiled_path, xs, ys, bands=[2, 1])
+
+        with rasterio.open(tiled_path) as src:
+            band_2, _ = sample_points(src, xs, ys, bands=[2])
+        np.testing.assert_array_equal(values[:, 0], band_2[:, 0])
+        np.testing.assert_array_equal(values[:, 1], sample_one_at_a_time(tiled_path, xs, ys))
+
+    def test_sample_raster_at_points(self, tiled_path):
+        """The Part 3 function keeps its result format."""
+        points = [(-112.49, 33.99), (-120.0, 33.5), (-112.5 + 15.5 / 90, 34.0 - 15.5 / 70)]
+        result = sample_raster_at_points(tiled_path, points)
+
+        assert result['coordinates'] == points
+        assert result['points_inside_raster'] == 2
+        assert result['points_outside_raster'] == 1
+        assert isinstance(result['point_values'][0], float)
+        assert result['point_values'][1] is None   # outside
+        assert result['point_values'][2] is None   # nodata
+
+    def test_bad_band(self, tiled_path):
+        """Asking for a band that does not exist raises ValueError."""
+        with pytest.raises(ValueError):
+            sample_raster_points(tiled_path, [-112.0], [33.5], bands=[3])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
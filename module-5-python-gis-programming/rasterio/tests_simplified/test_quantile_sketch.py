@@ -0,0 +1,96 @@
+"""
+Tests for the Quantile Sketch
+
+These tests check that the approximate median and percentiles stay within
+the promised relative error and that sketches can be merged.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.block_stats import accumulate_band_stats
+    from src.rasterio_analysis.quantile_sketch import QuantileSketch
+except ImportError as e:
+    pytest.skip(f"Could not import the quantile sketch: {e}", allow_module_level=True)
+
+
+class TestQuantileSketch:
+    """Tests for approximate percentiles."""
+
+    @pytest.fixture(scope="class")
+    def elevation_values(self):
+        """Realistic elevation values including some below sea level."""
+        rng = np.random.default_rng(7)
+        return rng.normal(400, 600, size=50_000)
+
+    def test_quantiles_within_error_bound(self, elevation_values):
+        """Median and quartiles should be within about 1% of numpy's answer."""
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        sketch.add_values(elevation_values)
+
+        estimates = sketch.quantiles([0.25, 0.5, 0.75])
+        exact = np.percentile(elevation_values, [25, 50, 75])
+        for estimate, truth in zip(estimates, exact, strict=True):
+            assert estimate == pytest.approx(truth, rel=0.02, abs=1.0)
+
+    def test_merged_sketches_match_single_sketch(self, elevation_values):
+        """Feeding blocks to separate sketches and merging gives the same answer."""
+        single = QuantileSketch()
+        single.add_values(elevation_values)
+
+        merged = QuantileSketch()
+        for chunk in np.array_split(elevation_values, 9):
+            part = QuantileSketch()
+            part.add_values(chunk)
+            merged.merge(part)
+
+        assert merged.count == single.count
+        assert merged.quantiles([0.1, 0.5, 0.9]) == single.quantiles([0.1, 0.5, 0.9])
+
+    def test_extremes_and_zeros(self):
+        """Quantiles 0 and 1 are the exact min and max, and zeros are handled."""
+        sketch = QuantileSketch()
+        sketch.add_values(np.array([0.0, 0.0, 0.0, -5.0, 12.0]))
+
+        assert sketch.quantile(0.0) == -5.0
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == 12.0
+
+    def test_empty_sketch_and_bad_input(self):
+        """An empty sketch returns None, and invalid settings raise errors."""
+        assert QuantileSketch().quantile(0.5) is None
+
+        with pytest.raises(ValueError):
+            QuantileSketch(relative_accuracy=0)
+        with pytest.raises(ValueError):
+            QuantileSketch().merge(QuantileSketch(relative_accuracy=0.05))
+
+    def test_sketch_fed_block_by_block(self):
+        """accumulate_band_stats() can feed a sketch while it streams blocks."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "tiled.tif")
+        data = np.arange(64 * 64, dtype=np.float32).reshape(64, 64) + 1
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=64, width=64, count=1,
+            dtype='float32', tiled=True, blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data, 1)
+
+        sketch = QuantileSketch()
+        with rasterio.open(raster_path) as src:
+            stats = accumulate_band_stats(src, 1, sketch=sketch)
+
+        assert sketch.count == stats.count == data.size
+        assert sketch.quantile(0.5) == pytest.approx(np.median(data), rel=0.01)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+"""
+Tests for the Byte-Range Cache
+
+These tests serve a tiled GeoTIFF from a local web server that supports
+HTTP range requests and counts every request, then check that a second
+read of the same area needs no requests at all.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.applications import read_remote_raster
+    from src.rasterio_analysis.range_cache import RangeCache
+except ImportError as e:
+    pytest.skip(f"Could not import the range cache: {e}", allow_module_level=True)
+
+
+class TestRangeCache:
+    """Tests for the persistent byte-range cache."""
+
+    @pytest.fixture
+    def server(self, range_server):
+        """A local web server with a 1024 x 1024 tiled GeoTIFF (about 2 MB)."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "dem.tif")
+        rng = np.random.default_rng(21)
+        data = rng.normal(1500, 50, size=(1024, 1024)).astype(np.float32)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=1024, width=1024, count=1, dtype='float32',
+            crs='EPSG:32612', transform=rasterio.transform.from_origin(400000, 3600000, 30, 30),
+            tiled=True, blockxsize=256, blockysize=256
+        ) as dst:
+            dst.write(data, 1)
+
+        with open(raster_path, 'rb') as f:
+            httpd, base_url = range_server({'dem.tif': f.read()})
+        return httpd, f"{base_url}/dem.tif", data, temp_dir
+
+    def test_second_read_needs_no_requests(self, server):
+        """A new run reading the same bbox is served entirely from the cache."""
+        httpd, url, data, temp_dir = server
+        db_path = os.path.join(temp_dir, "ranges.sqlite")
+        bbox = (403000, 3590100, 408100, 3595200)  # rows 160-330, cols 100-270
+
+        first = read_remote_raster(url, bbox, range_cache=RangeCache(db_path))
+        first_requests = len(httpd.requests)
+        assert first_requests > 0
+        assert first['range_cache']['bytes_downloaded'] < len(httpd.files['dem.tif']) / 2
+
+        second = read_remote_raster(url, bbox, range_cache=RangeCache(db_path))  # like a new session
+        assert len(httpd.requests) == first_requests
+        assert second['range_cache']['requests'] == 0
+        assert second['range_cache']['misses'] == 0
+        np.testing.assert_array_equal(second['data_array'], first['data_array'])
+        np.testing.assert_array_equal(first['data_array'], data[160:330, 100:270])
+
+    def test_missing_chunks_are_fetched_together(self, server):
+        """Neighbouring missing chunks are downloaded with one request."""
+        httpd, url, _, temp_dir = server
+        cache = RangeCache(os.path.join(temp_dir, "ranges.sqlite"), chunk_size=4096)
+        body = httpd.files['dem.tif']
+
+        assert cache.read_range(url, 10000, 50000) == body[10000:60000]
+        assert cache.stats()['requests'] == 2  # the first chunk (with the file size), then one range
+        assert cache.read_range(url, 20000, 100) == body[20000:20100]
+        assert cache.read_range(url, len(body) - 10, 100) == body[-10:]
+        assert cache.stats()['requests'] == 3
+
+    def test_size_limit_evicts_least_recently_used(self, server):
+        """When the cache is full, the least recently used chunks go first."""
+        httpd, url, _, temp_dir = server
+        cache = RangeCache(os.path.join(temp_dir, "ranges.sqlite"), chunk_size=4096, max_bytes=5 * 4096)
+        for chunk in range(8):
+            cache.read_range(url, chunk * 4096, 10)
+        stats = cache.stats()
+        assert stats['cached_bytes'] <= 5 * 4096
+
+        cache = RangeCache(os.path.join(temp_dir, "ranges.sqlite"), chunk_size=4096, max_bytes=5 * 4096)
+        requests = len(httpd.requests)
+        cache.read_range(url, 7 * 4096, 10)       # recently used: still cached
+        assert len(httpd.requests) == requests
+        cache.read_range(url, 1 * 4096, 10)       # evicted: downloaded again
+        assert len(httpd.requests) == requests + 1
+
+    def test_changed_file_is_not_mixed(self, server):
+        """A new ETag means the old chunks are not used."""
+        httpd, url, _, temp_dir = server
+        db_path = os.path.join(temp_dir, "ranges.sqlite")
+        RangeCache(db_path).read_range(url, 0, 100)
+
+        httpd.files['dem.tif'] = b'X' * 100 + httpd.files['dem.tif'][100:]
+        assert RangeCache(db_path).read_range(url, 0, 4) != b'XXXX'          # still fresh: cached bytes
+        assert RangeCache(db_path, max_age=0).read_range(url, 0, 4) == b'XXXX'
+
+    def test_missing_file(self, server):
+        """A 404 is reported as an error and remembered."""
+        httpd, url, _, temp_dir = server
+        cache = RangeCache(os.path.join(temp_dir, "ranges.sqlite"))
+        result = read_remote_raster(url.replace('dem.tif', 'nothing.tif'), range_cache=cache)
+        assert result['success'] is False
+        requests = len(httpd.requests)
+        with pytest.raises(FileNotFoundError):
+            cache.read_range(url.replace('dem.tif', 'nothing.tif'), 0, 10)
+        assert len(httpd.requests) == requests
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
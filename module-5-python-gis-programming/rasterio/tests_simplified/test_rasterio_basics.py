@@ -0,0 +1,89 @@
+"""
+Tests for the Rasterio Basics Helpers
+
+These tests check the statistics helpers in src/rasterio_basics.py that
+the student functions can use: the approximate (sketch) percentiles and
+the block-by-block streaming statistics.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_basics import (
+        _safe_stats_calculation,
+        _streaming_stats_calculation,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the rasterio basics helpers: {e}", allow_module_level=True)
+
+
+class TestStatsHelpers:
+    """Tests for the exact, sketch and streaming statistics helpers."""
+
+    @pytest.fixture(scope="class")
+    def elevation(self):
+        """Elevation values with a nodata value of -9999 in the first rows."""
+        rng = np.random.default_rng(21)
+        data = rng.normal(1500, 200, size=(120, 90)).astype(np.float32)
+        data[:3] = -9999
+        return data
+
+    @pytest.fixture(scope="class")
+    def raster_path(self, elevation):
+        """The elevation values as a raster with 32 x 32 tiles."""
+        path = os.path.join(tempfile.mkdtemp(), "dem.tif")
+        with rasterio.open(
+            path, 'w', driver='GTiff', height=120, width=90, count=1, dtype='float32',
+            crs='EPSG:32612', transform=rasterio.transform.from_origin(400000, 3600000, 30, 30),
+            nodata=-9999, tiled=True, blockxsize=32, blockysize=32
+        ) as dst:
+            dst.write(elevation, 1)
+        return path
+
+    def test_sketch_percentiles(self, elevation):
+        """exact=False gives percentiles within the sketch's relative accuracy."""
+        exact = _safe_stats_calculation(elevation, nodata_value=-9999)
+        approximate = _safe_stats_calculation(elevation, nodata_value=-9999, exact=False,
+                                              relative_accuracy=0.01)
+
+        for key in ('median', 'percentile_25', 'percentile_75'):
+            assert approximate[key] == pytest.approx(exact[key], rel=0.01)
+        for key in ('min', 'max', 'mean', 'std'):
+            assert approximate[key] == exact[key]
+
+    def test_streaming_matches_full_read(self, raster_path, elevation):
+        """Block-by-block statistics match the statistics of the whole array."""
+        exact = _safe_stats_calculation(elevation, nodata_value=-9999)
+        with rasterio.open(raster_path) as src:
+            streamed = _streaming_stats_calculation(src, 1)
+
+        assert streamed['valid_pixels'] == 117 * 90
+        assert streamed['total_pixels'] == 120 * 90
+        assert streamed['min'] == exact['min'] and streamed['max'] == exact['max']
+        assert streamed['mean'] == pytest.approx(exact['mean'])
+        assert streamed['std'] == pytest.approx(exact['std'], rel=1e-5)
+        assert streamed['median'] == pytest.approx(exact['median'], rel=0.01)
+
+    def test_import_from_src_folder(self, elevation, monkeypatch):
+        """The helpers also work when src/ is on sys.path (like in the notebooks)."""
+        src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+        monkeypatch.syspath_prepend(src_dir)
+        monkeypatch.delitem(sys.modules, "rasterio_basics", raising=False)
+        basics = importlib.import_module("rasterio_basics")
+
+        stats = basics._safe_stats_calculation(elevation, nodata_value=-9999, exact=False)
+        assert stats['median'] == pytest.approx(np.median(elevation[3:]), rel=0.01)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
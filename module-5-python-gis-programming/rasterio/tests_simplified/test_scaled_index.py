@@ -0,0 +1,169 @@
+"""
+Tests for Scaled Integer Index Rasters
+
+These tests check that NDVI and other indices can be stored as int16
+values scaled by 10000, and that statistics, band math and classification
+still work in real index units.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.band_expressions import evaluate_expression
+    from src.rasterio_analysis.band_math import analyze_vegetation, calculate_ndvi
+    from src.rasterio_analysis.classification import VEGETATION_CLASSES, classify_raster
+    from src.rasterio_analysis.raster_basics import get_raster_stats
+    from src.rasterio_analysis.scaled_index import (
+        INDEX_NODATA,
+        INDEX_SCALE,
+        decode_index,
+        encode_index,
+    )
+    from src.rasterio_analysis.spectral_indices import calculate_spectral_indices
+except ImportError as e:
+    pytest.skip(f"Could not import the scaled index functions: {e}", allow_module_level=True)
+
+
+class TestScaledIndex:
+    """Tests for int16 index storage."""
+
+    @pytest.fixture(scope="class")
+    def landsat_path(self):
+        """Create a 4-band Landsat-style raster with a few nodata pixels."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "landsat.tif")
+
+        rng = np.random.default_rng(14)
+        data = rng.integers(1, 4000, size=(4, 50, 60)).astype(np.uint16)
+        data[:, :2, :5] = 0  # nodata
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 60, 50)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=50, width=60, count=4, dtype='uint16',
+            crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+
+        return raster_path
+
+    @pytest.fixture(scope="class")
+    def scaled_ndvi_path(self, landsat_path):
+        """Write NDVI of the test raster as a scaled int16 GeoTIFF."""
+        output_path = os.path.join(os.path.dirname(landsat_path), "ndvi_int16.tif")
+        evaluate_expression("(b4 - b3) / (b4 + b3)", landsat_path, output_path=output_path,
+                            output_dtype='int16')
+        return output_path
+
+    def test_encode_and_decode(self):
+        """Values are rounded to 4 decimals, clipped, and NaN becomes nodata."""
+        values = np.array([0.42374, -1.0, 5.0, np.nan], dtype=np.float32)
+        stored = encode_index(values)
+
+        assert stored.dtype == np.int16
+        assert stored.tolist() == [4237, -10000, 32767, INDEX_NODATA]
+
+        decoded = decode_index(stored)
+        assert decoded[0] == pytest.approx(0.4237)
+        assert np.isnan(decoded[3])
+
+    def test_output_file_has_scale_metadata(self, scaled_ndvi_path):
+        """The int16 file records its scale, offset and nodata value."""
+        with rasterio.open(scaled_ndvi_path) as src:
+            assert src.dtypes[0] == 'int16'
+            assert src.nodata == INDEX_NODATA
+            assert src.scales[0] == pytest.approx(INDEX_SCALE)
+            assert src.offsets[0] == 0.0
+
+    def test_stats_are_in_real_units(self, landsat_path, scaled_ndvi_path):
+        """Statistics of the int16 file match the float NDVI to 4 decimals."""
+        float_ndvi = calculate_ndvi(landsat_path)
+
+        for stats in (get_raster_stats(scaled_ndvi_path),
+                      get_raster_stats(scaled_ndvi_path, streaming=True),
+                      get_raster_stats(scaled_ndvi_path, max_workers=2)):
+            assert stats['mean'] == pytest.approx(float_ndvi['mean_ndvi'], abs=1e-4)
+            assert stats['min'] == pytest.approx(float_ndvi['min_ndvi'], abs=1e-4)
+            assert stats['max'] == pytest.approx(float_ndvi['max_ndvi'], abs=1e-4)
+            assert stats['nodata_count'] == float_ndvi['nodata_pixels']
+
+    def test_band_math_reads_scaled_input(self, landsat_path, scaled_ndvi_path):
+        """Expressions on the int16 file see real NDVI values."""
+        float_ndvi = calculate_ndvi(landsat_path)
+        result = evaluate_expression("b1 * 2", scaled_ndvi_path)
+
+        assert result['mean'] == pytest.approx(2 * float_ndvi['mean_ndvi'], abs=2e-4)
+        assert result['valid_pixels'] == float_ndvi['total_pixels']
+
+    def test_scaled_ndvi_array(self, landsat_path):
+        """calculate_ndvi(scaled=True) returns int16 NDVI x 10000 with the same statistics."""
+        float_ndvi = calculate_ndvi(landsat_path)
+        scaled = calculate_ndvi(landsat_path, scaled=True)
+
+        assert scaled['ndvi_array'].dtype == np.int16
+        assert scaled['scale_factor'] == INDEX_SCALE
+        assert scaled['mean_ndvi'] == pytest.approx(float_ndvi['mean_ndvi'])
+        assert scaled['vegetation_pixels'] == float_ndvi['vegetation_pixels']
+        np.testing.assert_allclose(decode_index(scaled['ndvi_array']), float_ndvi['ndvi_array'],
+                                   atol=0.5 * INDEX_SCALE + 1e-6)
+
+    def test_classification_matches_float(self, landsat_path, scaled_ndvi_path):
+        """Classifying the int16 NDVI gives the same classes as the float NDVI."""
+        float_ndvi = calculate_ndvi(landsat_path)
+        scaled = calculate_ndvi(landsat_path, scaled=True)
+
+        expected = analyze_vegetation(float_ndvi['ndvi_array'])
+        from_array = analyze_vegetation(scaled['ndvi_array'], scale_factor=scaled['scale_factor'],
+                                        nodata_value=scaled['nodata_value'])
+        from_file = classify_raster(scaled_ndvi_path, VEGETATION_CLASSES)
+
+        # Only pixels within half a step of a break could change class
+        for name in VEGETATION_CLASSES.names:
+            assert from_array[name]['pixels'] == pytest.approx(expected[name]['pixels'], abs=2)
+            assert from_file[name]['pixels'] == from_array[name]['pixels']
+        assert from_array['total_valid_pixels'] == expected['total_valid_pixels']
+
+    def test_integers_are_not_assumed_scaled(self):
+        """An integer array is only treated as NDVI x 10000 when a scale is given."""
+        values = np.array([[-1, 0, 1], [INDEX_NODATA, 3000, 8000]], dtype=np.int16)
+
+        raw = analyze_vegetation(values)
+        assert raw['dense_vegetation']['pixels'] == 3       # 1, 3000 and 8000 as they are
+        assert raw['water_clouds']['pixels'] == 2
+        assert raw['total_valid_pixels'] == 6
+
+        scaled = analyze_vegetation(values, scale_factor=INDEX_SCALE, nodata_value=INDEX_NODATA)
+        assert scaled['total_valid_pixels'] == 5
+        assert scaled['sparse_vegetation']['pixels'] == 1   # 3000 -> 0.3
+        assert scaled['dense_vegetation']['pixels'] == 1    # 8000 -> 0.8
+
+    def test_spectral_indices_int16_output(self, landsat_path):
+        """Multi-index output can be written as scaled int16 bands."""
+        output_path = os.path.join(os.path.dirname(landsat_path), "indices_int16.tif")
+        result = calculate_spectral_indices(landsat_path, indices=('ndvi', 'savi'),
+                                            output_path=output_path, output_dtype='int16')
+
+        with rasterio.open(output_path) as src:
+            assert src.dtypes == ('int16', 'int16')
+            assert src.scales == (INDEX_SCALE, INDEX_SCALE)
+
+        stats = get_raster_stats(output_path, band_number=2)
+        assert stats['mean'] == pytest.approx(result['indices']['savi']['mean'], abs=1e-4)
+
+    def test_unknown_output_dtype(self, landsat_path):
+        """Only float32 and int16 outputs are supported."""
+        output_path = os.path.join(os.path.dirname(landsat_path), "bad.tif")
+        with pytest.raises(ValueError):
+            evaluate_expression("b1", landsat_path, output_path=output_path, output_dtype='uint8')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
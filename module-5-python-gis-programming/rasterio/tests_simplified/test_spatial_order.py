@@ -0,0 +1,62 @@
+"""
+Tests for Space-Filling Curve Keys
+
+These tests check that the Morton and Hilbert keys visit every cell of a
+grid exactly once, and that the Hilbert curve only steps to neighbouring
+cells.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import numpy as np
+import pytest
+
+try:
+    from src.rasterio_analysis.spatial_order import curve_keys, hilbert_key, morton_key
+except ImportError as e:
+    pytest.skip(f"Could not import the spatial order functions: {e}", allow_module_level=True)
+
+
+class TestSpatialOrder:
+    """Tests for Morton and Hilbert keys."""
+
+    @pytest.fixture
+    def grid(self):
+        """Every (row, col) cell of a 16 x 16 grid."""
+        rows, cols = np.divmod(np.arange(256), 16)
+        return rows, cols
+
+    def test_morton_interleaves_bits(self):
+        """Row bits and column bits alternate in the key."""
+        keys = morton_key(np.array([0, 0, 1, 1, 2, 3]), np.array([0, 1, 0, 1, 0, 3]))
+        assert keys.tolist() == [0, 1, 2, 3, 8, 15]
+
+    @pytest.mark.parametrize("order", ['hilbert', 'morton', 'row'])
+    def test_every_cell_once(self, grid, order):
+        """On a power-of-2 grid the keys are exactly 0 ... cells - 1."""
+        rows, cols = grid
+        keys = curve_keys(rows, cols, order, n_cols=16)
+        assert sorted(int(key) for key in keys) == list(range(256))
+
+    def test_hilbert_steps_to_neighbours(self, grid):
+        """Consecutive cells along the Hilbert curve always touch."""
+        rows, cols = grid
+        order = np.argsort(hilbert_key(rows, cols))
+        steps = np.abs(np.diff(rows[order])) + np.abs(np.diff(cols[order]))
+        assert np.all(steps == 1)
+
+    def test_hilbert_on_uneven_grid(self):
+        """Grids that are not a power of 2 still get unique keys."""
+        rows, cols = np.divmod(np.arange(5 * 7), 7)
+        keys = hilbert_key(rows, cols)
+        assert len(set(keys.tolist())) == 35
+
+    def test_unknown_order(self):
+        """Unknown orders raise ValueError."""
+        with pytest.raises(ValueError):
+            curve_keys(np.array([0]), np.array([0]), 'spiral')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
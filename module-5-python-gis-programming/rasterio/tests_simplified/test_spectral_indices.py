@@ -0,0 +1,108 @@
+"""
+Tests for the Spectral Index Pipeline
+
+These tests check that several indices calculated in one pass match the
+formulas calculated one at a time, and that each band is read only once.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.band_expressions import evaluate_expression
+    from src.rasterio_analysis.band_math import calculate_ndvi
+    from src.rasterio_analysis.spectral_indices import (
+        BAND_PRESETS,
+        calculate_spectral_indices,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the spectral index pipeline: {e}", allow_module_level=True)
+
+
+class TestSpectralIndices:
+    """Tests for multi-index calculation."""
+
+    @pytest.fixture(scope="class")
+    def landsat8_path(self):
+        """Create a 7-band Landsat 8 style scene (values are reflectance x 10000)."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "landsat8.tif")
+
+        rng = np.random.default_rng(21)
+        data = rng.integers(1, 6000, size=(7, 40, 48)).astype(np.uint16)
+        data[1] = rng.integers(200, 800, size=(40, 48))     # blue: dark
+        data[4] = rng.integers(2500, 5500, size=(40, 48))   # nir: brighter than red
+        data[:, 0, :3] = 0  # nodata
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 48, 40)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=40, width=48, count=7, dtype='uint16',
+            crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+
+        return raster_path
+
+    def test_matches_single_index_calculations(self, landsat8_path):
+        """Every index matches evaluating its formula on its own."""
+        result = calculate_spectral_indices(landsat8_path, bands='landsat8', reflectance_scale=0.0001)
+
+        preset = BAND_PRESETS['landsat8']
+        formulas = {
+            'ndvi': "(b5 - b4) / (b5 + b4)",
+            'ndwi': "(b3 - b5) / (b3 + b5)",
+            'nbr': "(b5 - b7) / (b5 + b7)",
+            'savi': "1.5 * (b5 - b4) / (b5 + b4 + 5000)",  # 0.5 reflectance = 5000
+            'evi': "2.5 * (b5 - b4) / (b5 + 6 * b4 - 7.5 * b2 + 10000)",
+        }
+        assert preset['nir'] == 5
+        for name, formula in formulas.items():
+            expected = evaluate_expression(formula, landsat8_path)
+            assert result['indices'][name]['mean'] == pytest.approx(expected['mean'], rel=1e-4), name
+            assert result['indices'][name]['nodata_count'] == expected['nodata_count'], name
+
+    def test_each_band_read_once(self, landsat8_path):
+        """Five indices need five bands, not eleven separate band reads."""
+        result = calculate_spectral_indices(landsat8_path, bands='landsat8')
+
+        assert result['bands_read'] == ['blue', 'green', 'nir', 'red', 'swir2']
+        assert result['windows'] == 9
+        assert result['band_reads'] == 5 * 9
+        assert result['band_reads_one_at_a_time'] == 11 * 9
+
+    def test_multiband_output(self, landsat8_path):
+        """The output has one band per index, in the order requested."""
+        output_path = os.path.join(os.path.dirname(landsat8_path), "indices.tif")
+        calculate_spectral_indices(landsat8_path, indices=['nbr', 'ndvi'], bands='landsat8',
+                                   output_path=output_path)
+
+        with rasterio.open(output_path) as out:
+            assert out.count == 2
+            assert out.descriptions == ('nbr', 'ndvi')
+            ndvi = out.read(2)
+
+        expected = calculate_ndvi(landsat8_path, red_band=4, nir_band=5)['ndvi_array']
+        np.testing.assert_allclose(ndvi, expected, equal_nan=True)
+
+    def test_custom_band_mapping(self, landsat8_path):
+        result = calculate_spectral_indices(landsat8_path, indices=['ndvi'], bands={'red': 4, 'nir': 5})
+        assert result['bands_read'] == ['nir', 'red']
+
+        with pytest.raises(ValueError):
+            calculate_spectral_indices(landsat8_path, indices=['nbr'], bands={'red': 4, 'nir': 5})
+        with pytest.raises(ValueError):
+            calculate_spectral_indices(landsat8_path, indices=['gndvi'])
+        with pytest.raises(ValueError):
+            calculate_spectral_indices(landsat8_path, bands='modis')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,128 @@
+"""
+Tests for the Statistics Cache
+
+These tests check that statistics stored on disk are reused for unchanged
+files and recalculated when a file changes.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis import stats_cache
+    from src.rasterio_analysis.applications import create_raster_summary
+    from src.rasterio_analysis.stats_cache import StatsCache, cached_multiband_stats
+except ImportError as e:
+    pytest.skip(f"Could not import the statistics cache: {e}", allow_module_level=True)
+
+
+def write_raster(raster_path, offset=0.0):
+    """Write a 4-band 16x16 float raster."""
+    data = np.arange(4 * 16 * 16, dtype=np.float32).reshape(4, 16, 16) + offset
+    transform = rasterio.transform.from_bounds(-120.0, 35.0, -119.0, 36.0, 16, 16)
+    with rasterio.open(
+        raster_path, 'w', driver='GTiff', height=16, width=16, count=4,
+        dtype='float32', crs='EPSG:4326', transform=transform, nodata=-9999
+    ) as dst:
+        dst.write(data)
+
+
+class TestStatsCache:
+    """Tests for the on-disk statistics cache."""
+
+    @pytest.fixture
+    def raster_path(self, tmp_path):
+        path = str(tmp_path / "scene.tif")
+        write_raster(path)
+        return path
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return StatsCache(tmp_path / "stats.sqlite")
+
+    @pytest.fixture
+    def count_pixel_reads(self, monkeypatch):
+        """Count how often the cache falls back to reading pixels."""
+        calls = []
+        original = stats_cache.stream_multiband_stats
+
+        def counting(raster_path, bands=None):
+            calls.append(list(bands))
+            return original(raster_path, bands)
+
+        monkeypatch.setattr(stats_cache, 'stream_multiband_stats', counting)
+        return calls
+
+    def test_put_and_get(self, cache, raster_path):
+        """A stored result comes back unchanged."""
+        cache.put(raster_path, 'band_stats', {'min': 1.0, 'max': 2.0}, band=1)
+
+        assert cache.get(raster_path, 'band_stats', band=1) == {'min': 1.0, 'max': 2.0}
+        assert cache.get(raster_path, 'band_stats', band=2) is None
+
+    def test_changed_file_is_a_miss(self, cache, raster_path):
+        """Rewriting the file should make the stored result stale."""
+        cache.put(raster_path, 'band_stats', {'min': 1.0}, band=1)
+
+        write_raster(raster_path, offset=100.0)
+        os.utime(raster_path, ns=(0, 10**18))
+
+        assert cache.get(raster_path, 'band_stats', band=1) is None
+
+    def test_cache_survives_new_instance(self, tmp_path, raster_path):
+        """Results are stored on disk, so a new StatsCache (a new run) still sees them."""
+        StatsCache(tmp_path / "stats.sqlite").put(raster_path, 'band_stats', {'mean': 5.0}, band=3)
+        assert StatsCache(tmp_path / "stats.sqlite").get(raster_path, 'band_stats', band=3) == {'mean': 5.0}
+
+    def test_cached_multiband_stats_reads_pixels_once(self, cache, raster_path, count_pixel_reads):
+        """The second call should come entirely from the cache."""
+        first = cached_multiband_stats(raster_path, cache=cache)
+        second = cached_multiband_stats(raster_path, cache=cache)
+
+        assert count_pixel_reads == [[1, 2, 3, 4]]
+        assert first == second
+        assert second[2]['min'] == 256.0
+
+    def test_only_missing_bands_are_read(self, cache, raster_path, count_pixel_reads):
+        """Bands already in the cache are not read again."""
+        cached_multiband_stats(raster_path, bands=[1, 2], cache=cache)
+        cached_multiband_stats(raster_path, cache=cache)
+
+        assert count_pixel_reads == [[1, 2], [3, 4]]
+
+    def test_file_replaced_while_calculating(self, cache, raster_path, monkeypatch):
+        """Statistics of the old file are never stored under the new file's fingerprint."""
+        original = stats_cache.stream_multiband_stats
+
+        def replace_during_read(path, bands=None):
+            result = original(path, bands)
+            write_raster(path, offset=100.0)
+            os.utime(path, ns=(0, 10**18))
+            return result
+
+        monkeypatch.setattr(stats_cache, 'stream_multiband_stats', replace_during_read)
+        cached_multiband_stats(raster_path, bands=[1], cache=cache)
+
+        assert cache.get(raster_path, 'band_stats', band=1) is None
+
+    def test_summary_uses_cache(self, tmp_path, raster_path, monkeypatch, count_pixel_reads):
+        """create_raster_summary(use_cache=True) reuses band and NDVI statistics."""
+        monkeypatch.setenv("RASTERIO_STATS_CACHE", str(tmp_path / "summary.sqlite"))
+
+        first = create_raster_summary(raster_path, use_cache=True)
+        second = create_raster_summary(raster_path, use_cache=True)
+
+        assert len(count_pixel_reads) == 1
+        assert first['band_statistics'] == second['band_statistics']
+        assert first['ndvi_analysis'] == second['ndvi_analysis']
+        assert StatsCache().get(raster_path, 'ndvi_analysis') is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
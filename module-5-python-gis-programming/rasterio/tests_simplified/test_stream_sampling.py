@@ -0,0 +1,144 @@
+"""
+Tests for Streaming Point Sampling
+
+These tests check that sampling points in chunks (from numpy arrays,
+Arrow tables and plain Python iterables) gives the same values as
+sampling them all at once, and that the Parquet and CSV files written
+chunk by chunk read back correctly.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.point_sampling import sample_raster_points
+    from src.rasterio_analysis.stream_sampling import (
+        iter_point_chunks,
+        iter_sample_batches,
+        write_sampled_points,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the streaming sampling functions: {e}", allow_module_level=True)
+
+
+class TestStreamSampling:
+    """Tests for chunked point sampling."""
+
+    @pytest.fixture(scope="class")
+    def raster(self):
+        """A 2-band 64 x 96 raster (1 map unit pixels, tiled 16 x 16) with nodata."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "two_bands.tif")
+
+        rng = np.random.default_rng(20)
+        data = rng.integers(0, 1000, size=(2, 64, 96)).astype(np.int16)
+        data[:, 10:14, 20:30] = -1  # nodata
+
+        transform = rasterio.transform.from_bounds(0, 0, 96, 64, 96, 64)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=64, width=96, count=2, dtype='int16',
+            crs='EPSG:32612', transform=transform, nodata=-1, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+
+        return raster_path, temp_dir
+
+    @pytest.fixture(scope="class")
+    def points(self):
+        """1,000 random points, some outside the raster."""
+        rng = np.random.default_rng(5)
+        return np.column_stack([rng.uniform(-5, 100, 1000), rng.uniform(-5, 70, 1000)])
+
+    def test_chunks_match_one_call(self, raster, points):
+        """Chunks of 128 points give the same values as one call with every point."""
+        raster_path, _ = raster
+        expected, _ = sample_raster_points(raster_path, points[:, 0], points[:, 1], bands=[1, 2])
+
+        batches = list(iter_sample_batches(raster_path, points, bands=[1, 2], chunk_points=128))
+        assert len(batches) == 8
+        combined = np.concatenate(batches)
+
+        np.testing.assert_array_equal(combined['point_id'], np.arange(1000))
+        np.testing.assert_array_equal(combined['x'], points[:, 0])
+        np.testing.assert_allclose(combined['band_1'], expected[:, 0], equal_nan=True)
+        np.testing.assert_allclose(combined['band_2'], expected[:, 1], equal_nan=True)
+        assert np.isnan(combined['band_1']).any()
+
+    def test_input_types(self, raster, points):
+        """numpy arrays, Arrow tables and generators of tuples give the same chunks."""
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({'lon': points[:, 0], 'lat': points[:, 1]})
+        generator = ((x, y) for x, y in points.tolist())
+
+        for source, columns in ((points, {}), (table, {'x_column': 'lon', 'y_column': 'lat'}),
+                                (table.to_batches()[0], {'x_column': 'lon', 'y_column': 'lat'}),
+                                (generator, {})):
+            chunks = list(iter_point_chunks(source, 300, **columns))
+            assert [xs.size for xs, _ in chunks] == [300, 300, 300, 100]
+            np.testing.assert_array_equal(np.concatenate([ys for _, ys in chunks]), points[:, 1])
+
+    def test_arrow_batches(self, raster, points):
+        """batch_format='arrow' yields pyarrow RecordBatches with the same columns."""
+        pa = pytest.importorskip("pyarrow")
+        raster_path, _ = raster
+        batches = list(iter_sample_batches(raster_path, points, chunk_points=400, batch_format='arrow'))
+
+        assert all(isinstance(batch, pa.RecordBatch) for batch in batches)
+        assert batches[0].schema.names == ['point_id', 'x', 'y', 'band_1']
+        assert sum(batch.num_rows for batch in batches) == 1000
+
+    def test_parquet_and_csv_output(self, raster, points):
+        """Parquet and CSV files hold every point, in the original order."""
+        pytest.importorskip("pyarrow")
+        raster_path, temp_dir = raster
+        expected, _ = sample_raster_points(raster_path, points[:, 0], points[:, 1], bands=[2])
+
+        for name in ("samples.parquet", "samples.csv"):
+            output_path = os.path.join(temp_dir, name)
+            summary = write_sampled_points(raster_path, points, output_path, bands=[2], chunk_points=256)
+            table = pd.read_parquet(output_path) if name.endswith('.parquet') else pd.read_csv(output_path)
+
+            assert summary['points'] == 1000 and summary['chunks'] == 4
+            assert summary['points_inside'] + summary['points_outside'] == 1000
+            assert list(table.columns) == ['point_id', 'x', 'y', 'band_2']
+            np.testing.assert_array_equal(table['point_id'], np.arange(1000))
+            np.testing.assert_allclose(table['band_2'], expected[:, 0], equal_nan=True)
+            assert not os.path.exists(output_path + '.tmp')
+
+    def test_blocks_shared_between_chunks(self, raster):
+        """Blocks still in the cache are not read again by the next chunk."""
+        raster_path, temp_dir = raster
+        # Every chunk samples the same 4 blocks
+        points = np.tile([[5.0, 60.0], [20.0, 60.0], [5.0, 45.0], [20.0, 45.0]], (50, 1))
+        summary = write_sampled_points(raster_path, points, os.path.join(temp_dir, "same.csv"), chunk_points=4)
+        assert summary['chunks'] == 50
+        assert summary['blocks_read'] == 4
+        assert summary['cache_hits'] == 49 * 4
+
+    def test_bad_arguments(self, raster, points):
+        """Bad formats, shapes and bands raise ValueError, and leave no file behind."""
+        raster_path, temp_dir = raster
+        with pytest.raises(ValueError):
+            next(iter_sample_batches(raster_path, points, batch_format='pandas'))
+        with pytest.raises(ValueError):
+            list(iter_point_chunks(np.zeros((10, 3))))
+        with pytest.raises(ValueError):
+            write_sampled_points(raster_path, points, os.path.join(temp_dir, "samples.xlsx"))
+
+        output_path = os.path.join(temp_dir, "bad_band.csv")
+        with pytest.raises(ValueError):
+            write_sampled_points(raster_path, points, output_path, bands=[3])
+        assert not os.path.exists(output_path) and not os.path.exists(output_path + '.tmp')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
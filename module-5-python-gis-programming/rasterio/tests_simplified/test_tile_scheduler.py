@@ -0,0 +1,155 @@
+"""
+Tests for the Parallel Tile Scheduler
+
+These tests check that multi-threaded block processing gives exactly the
+same answers as the single-threaded versions, whatever the number of
+workers.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pytest
+import rasterio
+
+try:
+    from src.rasterio_analysis.band_math import calculate_ndvi
+    from src.rasterio_analysis.block_stats import (
+        stream_band_stats,
+        stream_multiband_stats,
+    )
+    from src.rasterio_analysis.raster_basics import get_raster_stats
+    from src.rasterio_analysis.tile_scheduler import (
+        parallel_band_stats,
+        parallel_multiband_stats,
+        parallel_ndvi,
+        run_block_tasks,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import the tile scheduler: {e}", allow_module_level=True)
+
+
+class TestTileScheduler:
+    """Tests for multi-threaded block processing."""
+
+    @pytest.fixture(scope="class")
+    def landsat_path(self):
+        """Create a 4-band, 96x80 compressed raster with 16x16 tiles and a nodata corner."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "landsat.tif")
+
+        rng = np.random.default_rng(11)
+        data = rng.integers(1, 5000, size=(4, 80, 96)).astype(np.uint16)
+        data[:, :5, :5] = 0
+
+        transform = rasterio.transform.from_bounds(-112.5, 33.0, -111.5, 34.0, 96, 80)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=80, width=96, count=4, dtype='uint16',
+            crs='EPSG:4326', transform=transform, nodata=0, tiled=True,
+            blockxsize=16, blockysize=16, compress='deflate'
+        ) as dst:
+            dst.write(data)
+
+        return raster_path
+
+    def test_results_in_block_order(self, landsat_path):
+        """Batches come back in block order regardless of which thread ran them."""
+        def task(src, windows):
+            return [(window.row_off, window.col_off) for window in windows]
+
+        batches = run_block_tasks(landsat_path, task, max_workers=4, blocks_per_task=3)
+        offsets = [offset for batch in batches for offset in batch]
+
+        with rasterio.open(landsat_path) as src:
+            expected = [(w.row_off, w.col_off) for _, w in src.block_windows(1)]
+        assert offsets == expected
+
+    def test_same_answer_for_any_worker_count(self, landsat_path):
+        """The merge order is fixed, so results are identical for 1 or 4 workers."""
+        one = parallel_band_stats(landsat_path, 2, max_workers=1, blocks_per_task=2)
+        four = parallel_band_stats(landsat_path, 2, max_workers=4, blocks_per_task=2)
+        assert one == four
+
+    def test_matches_streaming_stats(self, landsat_path):
+        """Parallel statistics match the single-threaded streaming statistics."""
+        expected = stream_band_stats(landsat_path, 1)
+        result = get_raster_stats(landsat_path, 1, max_workers=3)
+
+        assert result['nodata_count'] == expected['nodata_count'] == 25
+        assert result['min'] == expected['min']
+        assert result['mean'] == pytest.approx(expected['mean'])
+        assert result['std'] == pytest.approx(expected['std'])
+
+    def test_multiband(self, landsat_path):
+        """All bands at once should match the single-threaded multi-band pass."""
+        expected = stream_multiband_stats(landsat_path)
+        result = parallel_multiband_stats(landsat_path, max_workers=4, blocks_per_task=5)
+
+        assert sorted(result) == [1, 2, 3, 4]
+        for band_number in result:
+            assert result[band_number]['mean'] == pytest.approx(expected[band_number]['mean'])
+            assert result[band_number]['max'] == expected[band_number]['max']
+
+    def test_parallel_ndvi_matches_calculate_ndvi(self, landsat_path):
+        """Block-wise NDVI written by several threads matches calculate_ndvi()."""
+        expected = calculate_ndvi(landsat_path, red_band=3, nir_band=4)
+        result = parallel_ndvi(landsat_path, red_band=3, nir_band=4, max_workers=4)
+
+        np.testing.assert_array_equal(result['ndvi_array'], expected['ndvi_array'])
+        assert result['vegetation_pixels'] == expected['vegetation_pixels']
+        assert result['total_pixels'] == expected['total_pixels']
+        assert result['nodata_pixels'] == expected['nodata_pixels']
+        assert result['mean_ndvi'] == pytest.approx(expected['mean_ndvi'], abs=1e-6)
+
+    @pytest.mark.parametrize("layout", ["scaled", "masked"])
+    def test_parallel_ndvi_uses_scale_and_masks(self, layout):
+        """Band scale/offset and internal masks give the same NDVI as calculate_ndvi()."""
+        raster_path = os.path.join(tempfile.mkdtemp(), f"{layout}.tif")
+        rng = np.random.default_rng(5)
+        data = rng.integers(7000, 20000, size=(4, 64, 64)).astype(np.uint16)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=64, width=64, count=4, dtype='uint16',
+            crs='EPSG:32612', transform=rasterio.transform.from_origin(400000, 3600000, 30, 30),
+            tiled=True, blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data)
+            if layout == "scaled":
+                # Landsat Collection 2 surface reflectance scaling
+                dst.scales = (2.75e-5,) * 4
+                dst.offsets = (-0.2,) * 4
+            else:
+                mask = np.full((64, 64), 255, dtype=np.uint8)
+                mask[:, :10] = 0
+                dst.write_mask(mask)
+
+        expected = calculate_ndvi(raster_path, red_band=3, nir_band=4)
+        result = parallel_ndvi(raster_path, red_band=3, nir_band=4, max_workers=4, blocks_per_task=3)
+
+        np.testing.assert_array_equal(result['ndvi_array'], expected['ndvi_array'])
+        assert result['total_pixels'] == expected['total_pixels']
+        assert result['nodata_pixels'] == expected['nodata_pixels']
+        assert result['vegetation_pixels'] == expected['vegetation_pixels']
+        assert result['mean_ndvi'] == pytest.approx(expected['mean_ndvi'], abs=1e-6)
+        if layout == "masked":
+            assert result['total_pixels'] == 64 * 54
+
+        scaled = parallel_ndvi(raster_path, red_band=3, nir_band=4, max_workers=2, scaled=True)
+        expected_scaled = calculate_ndvi(raster_path, red_band=3, nir_band=4, scaled=True)
+        np.testing.assert_array_equal(scaled['ndvi_array'], expected_scaled['ndvi_array'])
+        assert scaled['ndvi_array'].dtype == np.int16
+        assert scaled['scale_factor'] == expected_scaled['scale_factor']
+
+    def test_invalid_bands(self, landsat_path):
+        """Asking for a band that does not exist should raise an error."""
+        with pytest.raises(ValueError):
+            parallel_band_stats(landsat_path, 9)
+        with pytest.raises(ValueError):
+            parallel_ndvi(landsat_path, red_band=3, nir_band=8)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""
+Tests for Zonal Statistics
+
+These tests check the single-pass zonal statistics against masking the
+raster with one polygon at a time and calling numpy.
+
+Author: Instructor
+Course: GIST 604B - Open Source GIS Programming
+"""
+
+import os
+import tempfile
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import rasterio
+from rasterio.features import rasterize
+from shapely.geometry import Point, box
+
+try:
+    from src.rasterio_analysis.zonal_stats import ZoneAccumulator, zonal_stats
+except ImportError as e:
+    pytest.skip(f"Could not import the zonal statistics functions: {e}", allow_module_level=True)
+
+
+def one_polygon_stats(data, nodata, transform, geometry):
+    """Mask the raster with a single polygon and summarize it (the slow reference)."""
+    inside = rasterize([(geometry, 1)], out_shape=data.shape, transform=transform, fill=0) == 1
+    values = data[inside & (data != nodata)].astype(np.float64)
+    if values.size == 0:
+        return 0, np.nan, np.nan, np.nan, np.nan, np.nan
+    return values.size, values.sum(), values.mean(), values.std(), values.min(), values.max()
+
+
+class TestZonalStats:
+    """Tests for zonal statistics."""
+
+    @pytest.fixture(scope="class")
+    def dem(self):
+        """A 70 x 90 DEM (10 m pixels, tiled 16 x 16) with a nodata patch."""
+        temp_dir = tempfile.mkdtemp()
+        raster_path = os.path.join(temp_dir, "dem.tif")
+
+        rng = np.random.default_rng(19)
+        data = (1800 + rng.normal(0, 30, size=(70, 90))).astype(np.float32)
+        data[30:40, 10:20] = -9999  # nodata
+
+        transform = rasterio.transform.from_origin(500000, 4000700, 10, 10)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=70, width=90, count=1, dtype='float32',
+            crs='EPSG:32612', transform=transform, nodata=-9999, tiled=True,
+            blockxsize=16, blockysize=16
+        ) as dst:
+            dst.write(data, 1)
+
+        return raster_path, data, transform
+
+    @pytest.fixture(scope="class")
+    def zones(self):
+        """Non-overlapping circles and boxes, one partly outside the raster and one far away."""
+        geometries = [
+            Point(500200, 4000500).buffer(120),
+            Point(500650, 4000300).buffer(75),
+            box(500100, 4000250, 500210, 4000370),   # covers part of the nodata patch
+            box(500800, 4000550, 501000, 4000800),   # partly outside the raster
+            box(600000, 4100000, 600100, 4100100),   # completely outside
+            box(500420, 4000050, 500480, 4000140)
+        ]
+        return gpd.GeoDataFrame({'name': list('abcdef')}, geometry=geometries, crs='EPSG:32612')
+
+    @pytest.mark.parametrize("window_size", [16, 25, 1024])
+    def test_matches_one_polygon_at_a_time(self, dem, zones, window_size):
+        """Every statistic matches the per-polygon reference, whatever the window size."""
+        raster_path, data, transform = dem
+        result = zonal_stats(raster_path, zones, window_size=window_size)
+
+        expected = np.array([one_polygon_stats(data, -9999, transform, geometry) for geometry in zones.geometry])
+        np.testing.assert_array_equal(result['count'], expected[:, 0])
+        np.testing.assert_allclose(result['sum'], expected[:, 1], rtol=1e-9)
+        np.testing.assert_allclose(result['mean'], expected[:, 2], rtol=1e-9)
+        np.testing.assert_allclose(result['std'], expected[:, 3], rtol=1e-6)
+        np.testing.assert_allclose(result['min'], expected[:, 4])
+        np.testing.assert_allclose(result['max'], expected[:, 5])
+
+    def test_joined_to_geodataframe(self, dem, zones):
+        """The result is a copy of the input with prefixed statistic columns."""
+        raster_path, _, _ = dem
+        result = zonal_stats(raster_path, zones, stats=['mean', 'count'], prefix='elev_')
+
+        assert isinstance(result, gpd.GeoDataFrame)
+        assert list(result.columns) == ['name', 'geometry', 'elev_mean', 'elev_count']
+        assert result.index.equals(zones.index)
+        assert 'elev_mean' not in zones.columns
+        assert result['elev_count'].iloc[4] == 0
+        assert np.isnan(result['elev_mean'].iloc[4])
+
+    def test_reprojects_zones(self, dem, zones):
+        """Polygons in another CRS are reprojected to the raster's CRS first."""
+        raster_path, _, _ = dem
+        expected = zonal_stats(raster_path, zones, stats=['count'])
+        reprojected = zonal_stats(raster_path, zones.to_crs('EPSG:4326'), stats=['count'])
+        # Reprojecting twice moves edges by tiny amounts, so allow a pixel or two
+        np.testing.assert_allclose(reprojected['count'], expected['count'], atol=2)
+
+    def test_all_touched_counts_more_pixels(self, dem, zones):
+        """all_touched=True includes every pixel a polygon touches."""
+        raster_path, _, _ = dem
+        centre = zonal_stats(raster_path, zones, stats=['count'])
+        touched = zonal_stats(raster_path, zones, stats=['count'], all_touched=True)
+        assert (touched['count'] >= centre['count']).all()
+        assert touched['count'].sum() > centre['count'].sum()
+
+    def test_scaled_band(self):
+        """Stored integers with a scale and offset are reported in real units."""
+        raster_path = os.path.join(tempfile.mkdtemp(), "ndvi.tif")
+        stored = np.array([[1000, 2000], [3000, 4000]], dtype=np.int16)
+        with rasterio.open(
+            raster_path, 'w', driver='GTiff', height=2, width=2, count=1, dtype='int16',
+            crs='EPSG:32612', transform=rasterio.transform.from_origin(0, 2, 1, 1), nodata=-32768
+        ) as dst:
+            dst.write(stored, 1)
+            dst.scales = (0.0001,)
+            dst.offsets = (0.0,)
+
+        zones = gpd.GeoDataFrame(geometry=[box(0, 0, 2, 2)], crs='EPSG:32612')
+        result = zonal_stats(raster_path, zones)
+        assert result['mean'].iloc[0] == pytest.approx(0.25)
+        assert result['sum'].iloc[0] == pytest.approx(1.0)
+        assert result['std'].iloc[0] == pytest.approx(np.std([0.1, 0.2, 0.3, 0.4]))
+        assert (result['min'].iloc[0], result['max'].iloc[0]) == pytest.approx((0.1, 0.4))
+
+    def test_accumulator_background_zone(self):
+        """Zone 0 is left out of the results."""
+        totals = ZoneAccumulator(2)
+        totals.add(np.array([1, 1, 2, 0]), np.array([1.0, 3.0, 5.0, 9.0]))
+        results = totals.results()
+        np.testing.assert_array_equal(results['count'], [2, 1])
+        np.testing.assert_allclose(results['mean'], [2.0, 5.0])
+        np.testing.assert_allclose(results['std'], [1.0, 0.0])
+
+    def test_bad_arguments(self, dem, zones):
+        """Unknown statistics and bands raise ValueError."""
+        raster_path, _, _ = dem
+        with pytest.raises(ValueError):
+            zonal_stats(raster_path, zones, stats=['median'])
+        with pytest.raises(ValueError):
+            zonal_stats(raster_path, zones, band_number=2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])